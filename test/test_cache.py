@@ -0,0 +1,75 @@
+import unittest
+import asyncio
+import pickle
+import time
+
+from tinyagents import chainable, passthrough
+from tinyagents.cache import SemanticCache
+
+def embed(text: str) -> list:
+    # a bag of letters embedding, so inputs with the same letters are identical
+    return [text.lower().count(letter) for letter in "abcdefghijklmnopqrstuvwxyz"]
+
+class TestSemanticCache(unittest.TestCase):
+
+    def test_cache_hit(self):
+        calls = []
+
+        @chainable(kind="llm", semantic_cache=SemanticCache(embed, threshold=0.99))
+        def llm(question: str):
+            calls.append(question)
+            return f"answer to {question}"
+        
+        self.assertEqual(llm.invoke("What is Ray?").content, "answer to What is Ray?")
+        # a near-duplicate question returns the cached output without calling the model
+        self.assertEqual(llm.invoke("what is ray").content, "answer to What is Ray?")
+        self.assertEqual(llm.invoke("How do I deploy?").content, "answer to How do I deploy?")
+        self.assertEqual(calls, ["What is Ray?", "How do I deploy?"])
+        self.assertEqual((llm._semantic_cache.hits, llm._semantic_cache.misses), (1, 2))
+
+    def test_async(self):
+        async def aembed(text: str) -> list:
+            await asyncio.sleep(0)
+            return embed(text)
+
+        @chainable(kind="llm", semantic_cache=SemanticCache(aembed, threshold=0.99))
+        def llm(question: str):
+            return {"answer": question}
+
+        output = asyncio.run(llm.ainvoke("What is Ray?"))
+        self.assertEqual(llm.invoke("what is ray").content, {"answer": "What is Ray?"})
+
+        # cached outputs are copied, so changing an output doesn't change the cached output
+        output.content["answer"] = "changed"
+        asyncio.run(llm.ainvoke("what is ray")).content["answer"] = "changed"
+        self.assertEqual(asyncio.run(llm.ainvoke("what is ray")).content, {"answer": "What is Ray?"})
+        self.assertEqual(llm._semantic_cache.hits, 3)
+
+        # the sync path can be used within a running event loop
+        async def invoke():
+            return llm.invoke("what is ray")
+        self.assertEqual(asyncio.run(invoke()).content, {"answer": "What is Ray?"})
+
+    def test_eviction(self):
+        cache = SemanticCache(embed, max_entries=2, ttl=0.2)
+        for text in ["abc", "xyz"]:
+            cache.put(cache.create_key(text), passthrough(text))
+
+        cache.get(cache.create_key("abc"))
+        # the least recently used entry is replaced once the cache is full
+        cache.put(cache.create_key("mno"), passthrough("mno"))
+        self.assertIsNone(cache.get(cache.create_key("xyz")))
+        self.assertEqual(len(cache), 2)
+
+        time.sleep(0.2)
+        self.assertIsNone(cache.get(cache.create_key("abc")))
+        self.assertEqual(len(cache), 0)
+
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            chainable(kind="tool", semantic_cache=SemanticCache(embed))
+
+        # entries aren't copied when the cache is pickled (e.g. sent to a Ray replica)
+        cache = SemanticCache(embed)
+        cache.put(cache.create_key("abc"), passthrough("abc"))
+        self.assertEqual(len(pickle.loads(pickle.dumps(cache))), 0)
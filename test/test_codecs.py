@@ -0,0 +1,101 @@
+import unittest
+from unittest import mock
+import asyncio
+import json
+import sys
+
+import starlette.requests
+
+from tinyagents import chainable
+from tinyagents.codecs import get_codec, negotiate_codec, encode_payload, decode_payload, JSONCodec
+import tinyagents.nodes as nodes
+from tinyagents.graph import GraphDeployment
+
+@chainable
+def echo(x):
+    return x
+
+@chainable
+def length(x):
+    return len(x)
+
+def create_request(body: bytes, headers: dict) -> starlette.requests.Request:
+    scope = {
+        "type": "http", 
+        "method": "POST", 
+        "path": "/", 
+        "headers": [(key.encode(), value.encode()) for key, value in headers.items()]
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+    
+    return starlette.requests.Request(scope, receive)
+
+class TestCodecs(unittest.TestCase):
+
+    def test_get_codec(self):
+        self.assertEqual(get_codec("application/json; charset=utf-8").name, "json")
+        self.assertEqual(get_codec("application/x-msgpack").name, "msgpack")
+        self.assertIsNone(negotiate_codec("*/*"))
+        self.assertEqual(negotiate_codec("text/html, application/msgpack;q=0.9").name, "msgpack")
+
+        with self.assertRaises(KeyError):
+            get_codec("application/unknown")
+
+    def test_round_trip(self):
+        obj = {"messages": [{"role": "user", "content": "Hello!"}]}
+        for codec in ["json", "msgpack"]:
+            self.assertEqual(decode_payload(encode_payload(obj, codec)), obj)
+
+    def test_deployment_request(self):
+        deployment = GraphDeployment.func_or_class([echo], callbacks=None)
+        codec = get_codec("msgpack")
+
+        request = create_request(codec.encode({"a": 1}), {"content-type": codec.content_type})
+        response = asyncio.run(deployment(request))
+        self.assertEqual(response.media_type, codec.content_type)
+        self.assertEqual(codec.decode(response.body), {"a": 1})
+
+        # without a content type the body is parsed as JSON, or as text
+        self.assertEqual(asyncio.run(deployment(create_request(b"Hello!", {}))), "Hello!")
+        
+        # unregistered content types are parsed in the same way
+        self.assertEqual(asyncio.run(deployment(create_request(b'{"a": 1}', {"content-type": "application/unknown"}))), {"a": 1})
+        self.assertEqual(asyncio.run(deployment(create_request(b"a=1", {"content-type": "application/x-www-form-urlencoded"}))), "a=1")
+
+        response = asyncio.run(deployment(create_request(b"{", {"content-type": "application/json"})))
+        self.assertEqual(response.status_code, 400)
+
+    def test_response_codec(self):
+        deployment = GraphDeployment.func_or_class([echo], callbacks=None)
+
+        # outputs which the preferred codec can't encode use the next acceptable codec
+        request = create_request(b'{"a": 1}', {"content-type": "application/json", "accept": "text/plain, application/msgpack"})
+        response = asyncio.run(deployment(request))
+        self.assertEqual(response.media_type, "application/msgpack")
+
+        request = create_request(b"hello", {"content-type": "text/plain", "accept": "application/octet-stream"})
+        self.assertEqual(asyncio.run(deployment(request)).body, b"hello")
+
+        # otherwise the codec of the request is used, or the outputs are returned to Ray Serve as they are
+        request = create_request(b'{"a": 1}', {"content-type": "application/json", "accept": "application/octet-stream"})
+        self.assertEqual(asyncio.run(deployment(request)).media_type, "application/json")
+        request = create_request(b'{"a": 1}', {"content-type": "application/unknown", "accept": "text/plain"})
+        self.assertEqual(asyncio.run(deployment(request)), {"a": 1})
+
+    def test_node_outputs(self):
+        # only the content of the outputs of a parallel node is sent, with or without `orjson`
+        for orjson in [True, False]:
+            modules = {} if orjson else {"orjson": None}
+            with mock.patch.dict(sys.modules, modules), mock.patch.dict("tinyagents.codecs._CODECS", {"json": JSONCodec(), "application/json": JSONCodec()}):
+                deployment = GraphDeployment.func_or_class([nodes.Parallel(echo, length)], callbacks=None)
+                request = create_request(b'"hi"', {"content-type": "application/json"})
+                response = asyncio.run(deployment(request))
+                self.assertEqual(json.loads(response.body), {"echo": "hi", "length": 2})
+
+        # outputs which can't be encoded as JSON are returned to Ray Serve as they are
+        codec = JSONCodec()
+        self.assertIs(codec.can_encode({"a": [1, 2.0, None, "b"]}), True)
+        self.assertIs(codec.can_encode({"a": object()}), False)
+        self.assertIs(codec.can_encode({1: "a"}), False)
@@ -0,0 +1,100 @@
+import unittest
+import asyncio
+
+from tinyagents import chainable
+from tinyagents.deployment_utils import with_cold_start
+from tinyagents.autoscaling import recommend_replicas, recommend_options, KIND_DEFAULTS, MIN_SAMPLES
+from tinyagents.metrics import NodeStats, get_node_stats, reset_node_stats, export_node_metrics
+
+@chainable(warmup=["sample input"])
+class Model:
+    def __init__(self, size: int = 1):
+        self.size = size
+        self.calls = []
+
+    def run(self, x):
+        self.calls.append(x)
+        return x
+
+@chainable(warmup=["a b"])
+class StreamingModel:
+    def __init__(self):
+        self.chunks = []
+
+    async def run(self, x):
+        for chunk in x.split():
+            await asyncio.sleep(0)
+            self.chunks.append(chunk)
+            yield chunk
+
+@chainable(warmup=["a b"])
+class AsyncModel:
+    def __init__(self):
+        self.outputs = []
+
+    async def run(self, x):
+        await asyncio.sleep(0)
+        return x
+
+    def output_handler(self, x):
+        self.outputs.append(x)
+        return super().output_handler(x)
+
+class TestDeploymentUtils(unittest.TestCase):
+
+    def test_cold_start(self):
+        replica_cls = with_cold_start(Model)
+        self.assertEqual(replica_cls.__name__, "ChainableNode")
+
+        replica = replica_cls(size=2)
+        self.assertEqual(replica.size, 2)
+        # the warmup inputs are run before the replica is ready
+        self.assertEqual(replica.calls, ["sample input"])
+        self.assertEqual(set(replica._get_cold_start().keys()), {"init_seconds", "warmup_seconds"})
+
+    def test_warmup(self):
+        # the chunks of streaming nodes are consumed
+        self.assertEqual(with_cold_start(StreamingModel)().chunks, ["a", "b"])
+
+        # replicas can be created within an event loop
+        async def create():
+            return with_cold_start(AsyncModel)()
+        self.assertEqual(asyncio.run(create()).outputs, ["a b"])
+
+    def test_node_stats(self):
+        reset_node_stats()
+        node = Model()
+        for _ in range(3):
+            node.invoke("input")
+
+        stats = get_node_stats(node.name)
+        self.assertEqual(stats.count, 3)
+        self.assertEqual(stats.in_flight, 0)
+        self.assertEqual(stats.peak_in_flight, 1)
+
+        # the calls since the last export are exported as Ray metrics
+        export_node_metrics()
+        self.assertEqual(stats._exported, 3)
+
+    def test_autoscaling(self):
+        reset_node_stats()
+        # without enough samples the defaults for the kind of node are used
+        options = recommend_options(Model())
+        self.assertEqual(options["autoscaling_config"], KIND_DEFAULTS["other"])
+        self.assertGreater(options["max_ongoing_requests"], options["autoscaling_config"]["target_ongoing_requests"])
+
+        # the arrival rate only uses the most recent calls
+        stats = NodeStats("llm", window=3)
+        for _ in range(MIN_SAMPLES):
+            stats.finish(stats.start())
+        stats._starts.extend([10.0, 11.0, 12.0])
+        stats._latencies.extend([8.0] * 3)
+        self.assertEqual(stats.arrival_rate, 1.0)
+        self.assertEqual(recommend_options(Model(), stats=stats)["autoscaling_config"]["min_replicas"], 4)
+
+        # 20 requests to an llm node, with 10 requests in flight between t=0 and t=1 and again between t=1 and t=2
+        records = [{"node": "llm", "start": float(i // 10), "end": float(i // 10 + 1)} for i in range(20)]
+        config = recommend_replicas(records, node_kinds={"llm": "llm"}, headroom=1.0)["llm"]
+        self.assertEqual(config["target_ongoing_requests"], 4)
+        self.assertEqual(config["min_replicas"], 3)
+        self.assertEqual(config["max_replicas"], 3)
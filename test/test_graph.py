@@ -3,6 +3,8 @@ import unittest
 from tinyagents import chainable
 import tinyagents.nodes as nodes
 from tinyagents.graph import Graph
+from tinyagents.callbacks import BaseCallback
+from tinyagents.memory import MemoryLimitExceeded
 
 @chainable
 class Action1:
@@ -47,3 +49,42 @@ class TestGraph(unittest.TestCase):
             graph._state,
             [node1, node2]
         )
+
+    def test_memory_tracking(self):
+        @chainable
+        def large_output(x):
+            return "x" * 10_000
+        
+        usage = []
+
+        class MemoryCallback(BaseCallback):
+            def memory_usage(self, node_name, node_bytes, run_bytes, run_id):
+                usage.append((node_name, node_bytes))
+
+        runner = (Action1() | large_output).compile(callbacks=[MemoryCallback()], verbose=False, track_memory=True)
+        runner.invoke(".")
+
+        self.assertEqual([name for name, _ in usage], ["Action1", "large_output"])
+        self.assertGreater(usage[1][1], 10_000)
+
+        runner = (Action1() | large_output).compile(verbose=False, max_run_memory=5_000)
+        with self.assertRaises(MemoryLimitExceeded):
+            runner.invoke(".")
+
+    def test_memory_limit_subnodes(self):
+        calls = []
+
+        @chainable
+        def large_output(x):
+            return "x" * 10_000
+
+        @chainable
+        def after(x):
+            calls.append(x)
+            return x
+
+        # the limit is checked as each item finishes, rather than once the whole list has been produced
+        runner = (nodes.Map(large_output, max_concurrency=1) | after).compile(verbose=False, max_run_memory=25_000)
+        with self.assertRaisesRegex(MemoryLimitExceeded, r"map_large_output\[2\]"):
+            runner.invoke([1, 2, 3, 4])
+        self.assertEqual(calls, [])
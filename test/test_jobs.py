@@ -0,0 +1,97 @@
+import unittest
+import os
+import json
+import tempfile
+from contextlib import redirect_stdout, redirect_stderr
+from io import StringIO
+
+from tinyagents import chainable
+from tinyagents.graph import GraphRunner
+from tinyagents.jobs import run_job, read_jsonl, main
+
+@chainable
+def double(x):
+    if x == "fail":
+        raise ValueError("can't double")
+    return x * 2
+
+def create_graph():
+    return double.as_graph()
+
+class Interrupted(Exception):
+    pass
+
+def read_outputs(directory: str) -> list:
+    outputs = []
+    for name in sorted(os.listdir(directory)):
+        if name.startswith("outputs-"):
+            with open(os.path.join(directory, name)) as f:
+                outputs.extend(json.loads(line) for line in f)
+    return outputs
+
+class TestJobs(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.inputs = [os.path.join(self.directory.name, f"inputs-{i}.jsonl") for i in range(2)]
+        with open(self.inputs[0], "w") as f:
+            f.write("\n".join(json.dumps(i) for i in range(10)) + "\n\n")
+        with open(self.inputs[1], "w") as f:
+            f.write('10\n"fail"\nnot json\n11')
+        self.output_dir = os.path.join(self.directory.name, "outputs")
+        self.runner = GraphRunner([double])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read_jsonl(self):
+        lines = list(read_jsonl(self.inputs[1]))
+        self.assertEqual([line for _, line in lines], [b"10\n", b'"fail"\n', b"not json\n", b"11"])
+        # reading from an offset continues after the given line
+        self.assertEqual([line for _, line in read_jsonl(self.inputs[1], lines[1][0])], [b"not json\n", b"11"])
+
+    def test_run_job(self):
+        progress = run_job(self.runner.invoke, self.inputs, self.output_dir, concurrency=4, shard_size=5, include_inputs=True)
+        self.assertEqual(progress.records, 14)
+        self.assertEqual(progress.failed, 2)
+        self.assertEqual(progress.bytes_read, progress.total_bytes)
+
+        outputs = read_outputs(self.output_dir)
+        self.assertEqual(len(os.listdir(self.output_dir)), 4)
+        self.assertEqual([output["index"] for output in outputs], list(range(14)))
+        self.assertEqual([output.get("output") for output in outputs[:10]], [i * 2 for i in range(10)])
+        self.assertEqual(outputs[11], {"index": 11, "input": "fail", "error": "ValueError: can't double"})
+        self.assertTrue(outputs[12]["error"].startswith("JSONDecodeError"))
+
+    def test_resume(self):
+        interrupted_at = []
+
+        def interrupt(progress):
+            if progress.records >= 6:
+                interrupted_at.append(progress.records)
+                raise Interrupted()
+
+        with self.assertRaises(Interrupted):
+            run_job(self.runner.invoke, self.inputs, self.output_dir, concurrency=2, shard_size=4, checkpoint_interval=4, on_progress=interrupt, progress_interval=0)
+
+        reports = []
+        progress = run_job(self.runner.invoke, self.inputs, self.output_dir, concurrency=2, shard_size=4, checkpoint_interval=4, on_progress=reports.append)
+        self.assertEqual(progress.records, 14)
+        # several records can be written between progress reports
+        self.assertEqual(progress.resumed_records, interrupted_at[0])
+        self.assertLess(progress.resumed_records, 14)
+        self.assertIsNotNone(reports[-1].eta)
+
+        # every record has exactly one output
+        self.assertEqual([output["index"] for output in read_outputs(self.output_dir)], list(range(14)))
+
+        # restarting a job removes the previous outputs
+        progress = run_job(self.runner.invoke, self.inputs[:1], self.output_dir, resume=False)
+        self.assertEqual(len(read_outputs(self.output_dir)), 10)
+
+    def test_cli(self):
+        output = StringIO()
+        with redirect_stdout(output), redirect_stderr(StringIO()):
+            main(["--factory", f"{__name__}:create_graph", "--inputs", *self.inputs, "--output-dir", self.output_dir, "--concurrency", "2"])
+
+        self.assertEqual(json.loads(output.getvalue()), {"records": 14, "failed": 2, "shards": 1})
@@ -0,0 +1,50 @@
+import unittest
+import os
+import json
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+
+from tinyagents.mocks import mock_node, MockNodeError
+from tinyagents.loadtest import run_load_test, LatencyCallback, main
+
+def create_graph():
+    return mock_node("retriever", latency=0.01, kind="retriever") | mock_node("llm", latency=0.02, distribution="lognormal", kind="llm", seed=0)
+
+class TestLoadTest(unittest.TestCase):
+
+    def test_mock_node(self):
+        node = mock_node("tool", latency=0, output=lambda x: x * 2)
+        self.assertEqual(node.invoke(2).content, 4)
+
+        with self.assertRaises(MockNodeError):
+            mock_node("failing", latency=0, failure_rate=1).invoke(".")
+
+    def test_run_load_test(self):
+        latency_callback = LatencyCallback()
+        runner = create_graph().compile(callbacks=[latency_callback], verbose=False)
+
+        report = run_load_test(runner.invoke, ["a", "b"], concurrency=4, num_requests=8, latency_callback=latency_callback)
+        summary = report.summary()
+        self.assertEqual(summary["requests"], 8)
+        self.assertEqual(summary["error_rate"], 0)
+        self.assertEqual(set(summary["nodes"].keys()), {"retriever", "llm"})
+        self.assertGreaterEqual(summary["latency_seconds"]["p50"], 0.01)
+
+    def test_errors(self):
+        runner = mock_node("failing", latency=0, failure_rate=1).as_graph().compile(verbose=False)
+        report = run_load_test(runner.invoke, ["a"], rate=100, num_requests=3, seed=0)
+        self.assertEqual(report.errors, {"MockNodeError": 3})
+        self.assertEqual(report.summary()["error_rate"], 1)
+
+    def test_cli(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "inputs.jsonl")
+            with open(path, "w") as f:
+                f.write('"a"\n"b"\n')
+
+            output = StringIO()
+            with redirect_stdout(output):
+                main(["--factory", f"{__name__}:create_graph", "--inputs", path, "--concurrency", "2", "--json"])
+
+        self.assertEqual(json.loads(output.getvalue())["requests"], 2)
@@ -0,0 +1,75 @@
+import unittest
+import asyncio
+import time
+import contextlib
+
+from tinyagents import chainable
+import tinyagents.nodes as nodes
+from tinyagents.callbacks import BaseCallback
+
+@chainable
+class Double:
+    def run(self, x):
+        return x * 2
+
+@chainable
+class Sleep:
+    def run(self, x):
+        time.sleep(x)
+        return x
+
+class TestMapNode(unittest.TestCase):
+
+    def test_construction(self):
+        node = nodes.Map(Double(), max_concurrency=2, chunk_size=2)
+        self.assertIs(isinstance(node, nodes.Map), True)
+        self.assertEqual(node.name, "map_Double")
+
+    def test_node_execution(self):
+        node = nodes.Map(Double(), max_concurrency=2, chunk_size=2)
+        self.assertEqual([output.content for output in node.invoke([1, 2, 3, 4, 5])], [2, 4, 6, 8, 10])
+        self.assertEqual([output.content for output in asyncio.run(node.ainvoke([1, 2, 3]))], [2, 4, 6])
+
+    def test_unordered(self):
+        node = nodes.Map(Sleep(), ordered=False)
+        self.assertEqual([output.content for output in node.stream([0.2, 0.0])], [0.0, 0.2])
+
+    def test_item_events(self):
+        events = []
+
+        class Events(BaseCallback):
+            def node_start(self, inputs, node_name, run_id):
+                events.append(("start", node_name))
+
+            def node_finish(self, outputs, node_name, run_id):
+                events.append(("finish", node_name))
+
+        node = nodes.Map(Double(), max_concurrency=1)
+        node.invoke([1, 2], callbacks=[Events()])
+        self.assertEqual(events, [("start", "map_Double"), ("start", "Double"), ("finish", "Double"), ("start", "Double"), ("finish", "Double"), ("finish", "map_Double")])
+
+        events.clear()
+        asyncio.run(node.ainvoke([1, 2], callbacks=[Events()]))
+        self.assertEqual(events.count(("finish", "Double")), 2)
+
+    def test_stop_early(self):
+        finished = []
+
+        @chainable
+        class SlowItem:
+            async def run(self, x):
+                try:
+                    await asyncio.sleep(x)
+                finally:
+                    finished.append(x)
+                return x
+
+        async def first():
+            outputs = nodes.Map(SlowItem()).astream([0.0, 10.0])
+            async with contextlib.aclosing(outputs):
+                async for output in outputs:
+                    break
+            return list(finished)
+
+        # the remaining items have stopped by the time the stream is closed
+        self.assertEqual(asyncio.run(first()), [0.0, 10.0])
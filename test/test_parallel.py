@@ -1,6 +1,9 @@
 import unittest
+import asyncio
+import time
 
 from tinyagents import chainable
+from tinyagents.loadtest import LatencyCallback
 import tinyagents.nodes as nodes
 
 @chainable
@@ -13,6 +16,12 @@ class Action2:
     def run(self, x):
         return "action_2_output"
 
+@chainable
+class Slow:
+    def run(self, x):
+        time.sleep(0.5)
+        return "slow_output"
+
 class TestParallelNode(unittest.TestCase):
 
     def test_construction(self):
@@ -32,3 +41,29 @@ class TestParallelNode(unittest.TestCase):
             },
             node.invoke(".")
         )
+
+    def test_reduce(self):
+        def collect(outputs, node_name, output):
+            return outputs + [output]
+
+        node = (Slow() & Action1() & Action2()).reduce(collect, initial=[], until=lambda outputs: len(outputs) == 2)
+        self.assertIs(isinstance(node, nodes.ParallelReduce), True)
+
+        start = time.perf_counter()
+        self.assertEqual(sorted(node.invoke(".").content), ["action_1_output", "action_2_output"])
+        # the slow subnode isn't waited for once the reducer has enough outputs
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(len(asyncio.run(node.ainvoke(".")).content), 2)
+
+        # the subnode which wasn't needed is reported to the callbacks as cancelled
+        callback = LatencyCallback()
+        node.invoke(".", callbacks=[callback], run_id="run")
+        self.assertEqual(sorted(callback.node_latencies), ["Action1", "Action2"])
+        asyncio.run(node.ainvoke(".", callbacks=[callback], run_id="run"))
+        self.assertEqual(callback._started, {})
+
+        # adding subnodes to the original node doesn't change the reduce node
+        parallel = Action1() & Action2()
+        node = parallel.reduce(collect, initial=[])
+        parallel & Slow()
+        self.assertEqual(len(node.nodes), 2)
@@ -0,0 +1,92 @@
+import unittest
+import asyncio
+import threading
+import time
+
+from ray import cloudpickle
+
+from tinyagents import chainable
+import tinyagents.nodes as nodes
+
+@chainable(pool_size=3)
+class Session:
+    """ A stateful node which can't be used by more than one call at a time """
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.current = None
+
+    def run(self, x):
+        self.current = x
+        time.sleep(self.delay)
+        # another call would have overwritten `current`
+        return self.current, id(self)
+
+@chainable(pool_size=2)
+class AsyncSession:
+    def __init__(self):
+        self.busy = False
+
+    async def run(self, x):
+        assert not self.busy
+        self.busy = True
+        await asyncio.sleep(0.05)
+        self.busy = False
+        return x
+
+@chainable(pool_size=2)
+class SlowStart:
+    def __init__(self, delay: float = 0.3):
+        self.delay = delay
+        time.sleep(delay)
+
+    def run(self, x):
+        return x
+
+class TestPooling(unittest.TestCase):
+
+    def test_parallel_calls(self):
+        node = Session(delay=0.05)
+        mapped = nodes.Map(node, max_concurrency=6)
+
+        start = time.perf_counter()
+        outputs = [output.content for output in mapped.invoke(list(range(6)))]
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual([x for x, _ in outputs], list(range(6)))
+        self.assertEqual(len({instance for _, instance in outputs}), 3)
+        # calls run in parallel on the three instances, rather than one at a time
+        self.assertLess(elapsed, 0.25)
+
+        pool = node._get_instance_pool()
+        self.assertEqual(pool.stats()["size"], 3)
+        self.assertIn(node, pool._instances)
+        self.assertEqual({instance.delay for instance in pool._instances}, {0.05})
+
+    def test_async_calls(self):
+        node = nodes.Map(AsyncSession(), max_concurrency=4)
+        outputs = asyncio.run(node.ainvoke([1, 2, 3, 4]))
+        self.assertEqual([output.content for output in outputs], [1, 2, 3, 4])
+
+    def test_pickle(self):
+        node = Session()
+        node.invoke(1)
+        copy = cloudpickle.loads(cloudpickle.dumps(node))
+        self.assertNotIn("_instance_pool", copy.__dict__)
+        self.assertEqual(copy.invoke(2).content[0], 2)
+
+    def test_pool_creation(self):
+        slow = SlowStart()
+        thread = threading.Thread(target=slow._get_instance_pool)
+        thread.start()
+        time.sleep(0.05)
+
+        # creating the pool of one node doesn't wait for the pool of another
+        start = time.perf_counter()
+        Session(delay=0)._get_instance_pool()
+        self.assertLess(time.perf_counter() - start, 0.2)
+        thread.join()
+
+    def test_functions(self):
+        with self.assertRaises(ValueError):
+            chainable(pool_size=2)(lambda x: x)
@@ -0,0 +1,113 @@
+import unittest
+import asyncio
+import os
+import time
+from multiprocessing.shared_memory import SharedMemory
+
+from tinyagents import chainable
+from tinyagents.process_utils import nodes_to_process_nodes
+import tinyagents.nodes as nodes
+import tinyagents.nodes.process as process
+
+@chainable(process_options={"num_workers": 1, "shared_memory_threshold": 1024})
+class Worker:
+    def __init__(self, suffix: str):
+        self.suffix = suffix
+
+    def run(self, x):
+        return (os.getpid(), x + self.suffix)
+
+@chainable(process_options={"num_workers": 1, "shared_memory_threshold": 1024})
+class SlowWorker:
+    def run(self, x):
+        time.sleep(0.2)
+        return len(x)
+
+@chainable(pool_size=2, process_options={"num_workers": 1})
+class PooledWorker:
+    async def run(self, x):
+        return (os.getpid(), x * 2)
+
+class Handle:
+    """ Behaves like a Ray deployment handle, which returns a (truthy) value for any attribute """
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+class TestProcessNode(unittest.TestCase):
+
+    def test_node_execution(self):
+        runner = Worker("!").as_graph().compile(verbose=False)
+        node = runner.nodes[0]
+        self.assertIs(isinstance(node, nodes.ProcessNode), True)
+
+        try:
+            pid, output = runner.invoke("hello")
+            self.assertNotEqual(pid, os.getpid())
+            self.assertEqual(output, "hello!")
+
+            # large inputs and outputs are moved through shared memory
+            large_input = "x" * 10_000
+            _, output = asyncio.run(runner.ainvoke(large_input))
+            self.assertEqual(output, large_input + "!")
+        finally:
+            node.shutdown()
+
+
+    def test_pooled_async_nodes(self):
+        runner = PooledWorker().as_graph().compile(verbose=False)
+        try:
+            pid, output = runner.invoke(2)
+            self.assertNotEqual(pid, os.getpid())
+            self.assertEqual(output, 4)
+        finally:
+            runner.nodes[0].shutdown()
+
+    def test_unsupported_nodes(self):
+        @chainable(resources=["tokenizer"], process_options={"num_workers": 1})
+        class UsesResources:
+            def run(self, x, tokenizer):
+                return x
+
+        @chainable(process_options={"num_workers": 1})
+        def streams(x):
+            yield x
+
+        with self.assertRaisesRegex(ValueError, "resources"):
+            nodes.ProcessNode(UsesResources())
+        with self.assertRaisesRegex(ValueError, "streams its output"):
+            nodes.ProcessNode(streams)
+
+    def test_composites_are_copied(self):
+        worker = Worker("!")
+        parallel = nodes.Parallel(worker, SlowWorker())
+        converted = nodes_to_process_nodes([parallel])[0]
+
+        self.assertIsNot(converted, parallel)
+        self.assertIs(isinstance(converted.nodes["Worker"], nodes.ProcessNode), True)
+        self.assertIs(parallel.nodes["Worker"], worker)
+
+    def test_deployment_handles(self):
+        handle = Handle()
+        self.assertEqual(nodes_to_process_nodes([handle]), [handle])
+        self.assertIs(nodes_to_process_nodes([nodes.Parallel(nodes={"a": handle})])[0].nodes["a"], handle)
+
+    def test_cancelled_calls_release_shared_memory(self):
+        node = nodes.ProcessNode(SlowWorker())
+        payloads = []
+        dump = process._dump
+
+        def record(obj, threshold):
+            payloads.append(dump(obj, threshold))
+            return payloads[-1]
+
+        process._dump = record
+        try:
+            futures = [node._submit("x" * 10_000) for _ in range(4)]
+            # the last call is still queued behind the others
+            self.assertIs(futures[-1].cancel(), True)
+            with self.assertRaises(FileNotFoundError):
+                SharedMemory(name=payloads[-1][1])
+            self.assertEqual([process._load(future.result()).content for future in futures[:-1]], [10_000] * 3)
+        finally:
+            process._dump = dump
+            node.shutdown()
@@ -0,0 +1,94 @@
+import unittest
+import asyncio
+import time
+
+from tinyagents import chainable, race
+from tinyagents.loadtest import LatencyCallback
+import tinyagents.nodes as nodes
+
+@chainable
+class Fast:
+    def run(self, x):
+        return "fast_output"
+
+@chainable
+class Slow:
+    def run(self, x):
+        time.sleep(0.3)
+        return "slow_output"
+
+@chainable
+class AsyncSlow:
+    async def run(self, x):
+        await asyncio.sleep(0.3)
+        return "slow_output"
+
+@chainable
+class Failing:
+    def run(self, x):
+        raise ValueError("provider unavailable")
+
+class TestRaceNode(unittest.TestCase):
+
+    def test_construction(self):
+        node = race(Fast(), Slow())
+        self.assertIs(isinstance(node, nodes.Race), True)
+        self.assertEqual(node.name, "race_Fast_Slow")
+
+        with self.assertRaises(ValueError):
+            race(Fast(), Slow(), quorum=3)
+
+    def test_first_output(self):
+        node = race(Slow(), Fast(), Failing())
+
+        start = time.perf_counter()
+        self.assertEqual(node.invoke(".").content, "fast_output")
+        # the slow subnode isn't waited for
+        self.assertLess(time.perf_counter() - start, 0.3)
+
+        stats = node.get_stats()
+        self.assertEqual(stats["Fast"]["wins"], 1)
+        self.assertEqual(stats["Slow"]["wins"], 0)
+
+        node = race(AsyncSlow(), Fast())
+        self.assertEqual(asyncio.run(node.ainvoke(".")).content, "fast_output")
+
+    def test_callbacks(self):
+        # every racer which started either finishes or is cancelled, so the callbacks don't keep their start times
+        callback = LatencyCallback()
+        race(Slow(), Fast(), Failing()).invoke(".", callbacks=[callback], run_id="run")
+        asyncio.run(race(AsyncSlow(), Fast(), Failing()).ainvoke(".", callbacks=[callback], run_id="run"))
+        self.assertEqual(list(callback.node_latencies), ["Fast"])
+        self.assertEqual(callback._started, {})
+
+    def test_validator(self):
+        node = race(AsyncSlow(), Fast(), validator=lambda output: output == "slow_output")
+        self.assertEqual(asyncio.run(node.ainvoke(".")).content, "slow_output")
+        self.assertEqual(node.get_stats()["Fast"]["rejected"], 1)
+
+        node = race(Fast(), Failing(), validator=lambda output: output == "slow_output")
+        with self.assertRaises(nodes.RaceFailed):
+            node.invoke(".")
+        self.assertEqual(node.get_stats()["Failing"]["errors"], 1)
+
+    def test_quorum(self):
+        node = race(Fast(), Slow(), Failing(), quorum=2)
+        outputs = node.invoke(".")
+        self.assertEqual({name: output.content for name, output in outputs.items()}, {"Fast": "fast_output", "Slow": "slow_output"})
+
+    def test_skip_slow(self):
+        node = nodes.Race(Fast(), AsyncSlow(), skip_below=0.1, min_samples=3, probe_interval=5)
+
+        async def run():
+            for _ in range(4):
+                await node.ainvoke(".")
+
+            # the slow subnode has lost enough races to be skipped
+            start = time.perf_counter()
+            await node.ainvoke(".")
+            return time.perf_counter() - start
+
+        self.assertLess(asyncio.run(run()), 0.3)
+        # the slow subnode was skipped in the fourth race, then took part in the fifth to keep its statistics up to date
+        self.assertEqual(node.get_stats()["AsyncSlow"]["races"], 4)
+        self.assertEqual(node._select_racers(), ["Fast"])
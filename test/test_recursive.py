@@ -1,6 +1,8 @@
 import unittest
+import asyncio
 
-from tinyagents import chainable, loop, respond, passthrough
+from tinyagents import chainable, loop, respond, passthrough, end_loop, identical_outputs, score_threshold, get_loop_history
+from tinyagents.types import Action, ConvergencePredicate
 import tinyagents.nodes as nodes
 
 @chainable
@@ -19,11 +21,84 @@ class Action2:
         
         return passthrough(x)
 
+@chainable
+class Capped:
+    def run(self, x):
+        return min(x, 2)
+
+@chainable
+class History:
+    def run(self, x):
+        return [step.node_name for step in get_loop_history()]
+    
+    def output_handler(self, x):
+        return end_loop(x)
+
 class TestResursiveNode(unittest.TestCase):
 
     def test_construction(self):
         self.assertIs(isinstance(loop(Action1(), Action2()), nodes.Recursive), True)
 
     def test_max_iterations(self):
-        node = loop(Action1(), Action2(), max_iter=3)
-        self.assertEqual(node.invoke(0).content, 4)
\ No newline at end of file
+        node = loop(Action1(), Action1(), max_iter=3)
+        self.assertEqual(node.invoke(0).content, 6)
+
+    def test_respond(self):
+        node = loop(Action1(), Action2(), max_iter=8)
+        output = node.invoke(0)
+        self.assertEqual(output.content, 3)
+        self.assertEqual(output.action, Action.Respond)
+        self.assertEqual(asyncio.run(node.ainvoke(0)).content, 3)
+
+    def test_convergence(self):
+        node = loop(Action1(), Capped(), max_iter=100, until=identical_outputs, history_size=2)
+        self.assertEqual(node.invoke(0).content, 2)
+
+        node = loop(Action1(), Action1(), max_iter=100, until=score_threshold(lambda x: x, 5))
+        self.assertEqual(node.invoke(0).content, 6)
+
+        # a round which outputs None converges once the next round does the same
+        rounds = []
+        @chainable
+        def nothing(x):
+            rounds.append(x)
+            return None
+
+        node = loop(nothing, nothing, max_iter=100, until=identical_outputs)
+        self.assertIsNone(node.invoke(0).content)
+        self.assertEqual(len(rounds), 4)
+
+        # without `requires_previous` the predicate is also checked after the first round
+        rounds.clear()
+        node = loop(nothing, nothing, max_iter=100, until=ConvergencePredicate(lambda previous, current: previous == current))
+        self.assertIsNone(node.invoke(0).content)
+        self.assertEqual(len(rounds), 2)
+
+    def test_history_in_parallel_nodes(self):
+        @chainable
+        class Steps:
+            def run(self, x):
+                return len(get_loop_history())
+
+        @chainable
+        class MoreSteps:
+            def run(self, x):
+                return len(get_loop_history())
+
+        # the history is available to nodes run in a thread pool
+        node = loop(Action1(), Steps() & MoreSteps(), max_iter=1, history_size=5)
+        self.assertEqual({name: output.content for name, output in node.invoke(0).items()}, {"Steps": 1, "MoreSteps": 1})
+
+        @chainable
+        def pairs(x):
+            return [x, x]
+
+        node = loop(pairs, nodes.Map(Steps(), max_concurrency=2), max_iter=1, history_size=5)
+        self.assertEqual([output.content for output in node.invoke(0)], [1, 1])
+
+    def test_end_loop(self):
+        node = loop(Action1(), History(), max_iter=3, history_size=1)
+        output = node.invoke(0)
+        # `end_loop` ends the loop without ending the graph
+        self.assertEqual(output.content, ["Action1"])
+        self.assertIsNone(output.action)
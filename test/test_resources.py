@@ -0,0 +1,157 @@
+import unittest
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock
+
+from tinyagents import chainable
+from tinyagents.graph import GraphRunner
+from tinyagents.resources import Resource, ResourceRegistry
+
+class Connection:
+    created = 0
+
+    def __init__(self):
+        Connection.created += 1
+        self.closed = False
+        self.busy = False
+
+    def query(self, x):
+        # connections can't be used by more than one invocation at a time
+        assert not self.busy
+        self.busy = True
+        time.sleep(0.05)
+        self.busy = False
+        return x
+
+@chainable(resources=["db", "tokenizer"])
+def search(x, db, tokenizer):
+    return tokenizer(db.query(x))
+
+@chainable(resources=["tokenizer"])
+class Tokenize:
+    async def run(self, x, tokenizer):
+        return tokenizer(x)
+
+def create_registry(pool_size=2, health_check=None) -> ResourceRegistry:
+    registry = ResourceRegistry()
+    registry.register("db", setup=Connection, teardown=lambda conn: setattr(conn, "closed", True), pool_size=pool_size, health_check=health_check)
+    registry.register("tokenizer", setup=lambda: str.split)
+    return registry
+
+class TestResources(unittest.TestCase):
+
+    def test_injection(self):
+        runner = GraphRunner([search], resources=create_registry())
+        self.assertEqual(runner.invoke("a b"), ["a", "b"])
+
+        # the subnodes of a parallel node use the registry of the runner
+        runner = GraphRunner([search & Tokenize()], resources=create_registry())
+        output = asyncio.run(runner.ainvoke("a b"))
+        self.assertEqual({name: output_.content for name, output_ in output.items()}, {"search": ["a", "b"], "Tokenize": ["a", "b"]})
+
+    def test_pool(self):
+        registry = create_registry(pool_size=2)
+        runner = GraphRunner([search], resources=registry)
+        Connection.created = 0
+
+        threads = [threading.Thread(target=runner.invoke, args=("a",)) for _ in range(6)]
+        [thread.start() for thread in threads]
+        [thread.join() for thread in threads]
+
+        stats = registry.get("db").stats()
+        self.assertEqual(Connection.created, 2)
+        self.assertEqual(stats["size"], 2)
+        self.assertEqual(stats["in_use"], 0)
+        self.assertEqual(stats["leases"], 6)
+        self.assertGreater(stats["waits"], 0)
+
+        # the shared resource is only created once
+        self.assertEqual(registry.get("tokenizer").stats()["size"], 1)
+
+    def test_cancelled_lease(self):
+        resource = Resource("x", setup=object, pool_size=1)
+
+        async def lease():
+            async with resource.alease() as instance:
+                return instance
+
+        async def run():
+            async with resource.alease() as instance:
+                waiter = asyncio.ensure_future(lease())
+                await asyncio.sleep(0.01)
+                waiter.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await waiter
+
+            # the cancelled lease didn't take the instance once it was released
+            return await asyncio.wait_for(lease(), timeout=1), instance
+
+        leased, instance = asyncio.run(run())
+        self.assertIs(leased, instance)
+        self.assertEqual(resource.stats()["in_use"], 0)
+
+    def test_lifecycle(self):
+        registry = create_registry(pool_size=2, health_check=lambda conn: not conn.closed)
+        with registry:
+            self.assertEqual(registry.get("db").stats()["size"], 2)
+            connection = registry.get("db")._instances[0]
+            connection.closed = True
+
+            with registry.lease(["db"]) as resources:
+                self.assertFalse(resources["db"].closed)
+            self.assertEqual(registry.get("db").stats()["replaced"], 1)
+
+        self.assertEqual(registry.stats()["db"]["size"], 0)
+        with self.assertRaises(KeyError):
+            registry.get("cache")
+
+    def test_shared_replacement(self):
+        registry = create_registry(pool_size=None, health_check=lambda conn: not conn.closed)
+        db = registry.get("db")
+
+        with registry.lease(["db"]) as first:
+            first["db"].closed = True
+            # the shared instance is still being used, so it isn't replaced
+            with registry.lease(["db"]) as second:
+                self.assertIs(second["db"], first["db"])
+            self.assertEqual(db.stats()["replaced"], 0)
+
+        with registry.lease(["db"]) as resources:
+            self.assertFalse(resources["db"].closed)
+        self.assertEqual((db.stats()["replaced"], db.stats()["size"]), (1, 1))
+
+        # only the given resources are torn down
+        registry.setup(["tokenizer"])
+        registry.teardown(["db"])
+        self.assertEqual((db.stats()["size"], registry.get("tokenizer").stats()["size"]), (0, 1))
+
+    def test_pooled_replacement(self):
+        registry = create_registry(pool_size=2, health_check=lambda conn: not conn.closed)
+        registry.setup(["db"])
+        for connection in registry.get("db")._instances:
+            connection.closed = True
+
+        leased = []
+        def lease():
+            with registry.lease(["db"]) as resources:
+                leased.append(resources["db"])
+                resources["db"].query("a")
+
+        # unhealthy instances are replaced in place, so every lease gets a connection even when the pool is full
+        threads = [threading.Thread(target=lease) for _ in range(6)]
+        [thread.start() for thread in threads]
+        [thread.join() for thread in threads]
+        self.assertEqual(len(leased), 6)
+        self.assertFalse(any(connection is None or connection.closed for connection in leased))
+        self.assertEqual(registry.get("db").stats()["replaced"], 2)
+
+    def test_callbacks(self):
+        callback = MagicMock()
+        runner = GraphRunner([search], callbacks=[callback], resources=create_registry())
+        runner.invoke("a")
+
+        reported = {call.kwargs["resource_name"]: call.kwargs["stats"] for call in callback.resource_usage.call_args_list}
+        self.assertEqual(set(reported), {"db", "tokenizer"})
+        self.assertEqual(reported["db"]["max_size"], 2)
+        self.assertEqual(reported["db"]["in_use"], 0)
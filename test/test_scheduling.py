@@ -0,0 +1,73 @@
+import unittest
+import asyncio
+
+from tinyagents import chainable
+from tinyagents.scheduling import PriorityScheduler
+from tinyagents.graph import GraphRunner
+
+@chainable
+def echo(x):
+    return x
+
+async def grant_order(scheduler: PriorityScheduler, priorities: list) -> list:
+    """ Queue a request for each priority while the only slot is held, then record the order they are granted """
+    order = []
+
+    async def request(i, priority):
+        async with scheduler.slot(priority):
+            order.append(i)
+            await asyncio.sleep(0)
+
+    async with scheduler.slot("holder"):
+        tasks = [asyncio.create_task(request(i, priority)) for i, priority in enumerate(priorities)]
+        await asyncio.sleep(0)
+
+    await asyncio.gather(*tasks)
+    return order
+
+class TestScheduling(unittest.TestCase):
+
+    def test_strict_priority(self):
+        scheduler = PriorityScheduler(slots=1, weights={"interactive": 10, "batch": 1}, policy="strict", max_wait=None)
+        order = asyncio.run(grant_order(scheduler, ["batch", "batch", "interactive", "interactive"]))
+        self.assertEqual(order, [2, 3, 0, 1])
+
+    def test_max_wait(self):
+        # every request has waited longer than `max_wait`, so they are served in arrival order
+        scheduler = PriorityScheduler(slots=1, weights={"interactive": 10, "batch": 1}, policy="strict", max_wait=0)
+        order = asyncio.run(grant_order(scheduler, ["batch", "batch", "interactive", "interactive"]))
+        self.assertEqual(order, [0, 1, 2, 3])
+
+    def test_weighted_fair(self):
+        scheduler = PriorityScheduler(slots=1, weights={"interactive": 3, "batch": 1})
+        priorities = ["batch"] * 4 + ["interactive"] * 6
+        order = asyncio.run(grant_order(scheduler, priorities))
+
+        # the batch requests aren't starved, they receive a slot for every three interactive requests
+        granted = [priorities[i] for i in order]
+        self.assertEqual(granted[:4].count("batch"), 1)
+        self.assertEqual(granted[:8].count("batch"), 2)
+        self.assertEqual(sorted(order), list(range(10)))
+
+    def test_cancelled_request(self):
+        async def run():
+            scheduler = PriorityScheduler(slots=1)
+            await scheduler.acquire()
+            waiting = asyncio.create_task(scheduler.acquire("batch"))
+            await asyncio.sleep(0)
+            waiting.cancel()
+            await asyncio.gather(waiting, return_exceptions=True)
+            scheduler.release()
+            return scheduler
+
+        scheduler = asyncio.run(run())
+        self.assertEqual(scheduler.num_waiting, 0)
+        self.assertEqual(scheduler._available, 1)
+
+    def test_runner(self):
+        runner = GraphRunner([echo], scheduler=PriorityScheduler(slots=2))
+
+        async def run():
+            return await asyncio.gather(*[runner.ainvoke(i, priority="batch" if i % 2 else None) for i in range(5)])
+
+        self.assertEqual(asyncio.run(run()), [0, 1, 2, 3, 4])
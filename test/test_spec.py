@@ -0,0 +1,101 @@
+import unittest
+import tempfile
+import json
+import os
+
+from tinyagents import chainable, identical_outputs
+from tinyagents.graph import Graph
+from tinyagents.spec import graph_to_spec, graph_from_spec, save_spec, load_spec, GraphSpecError
+from tinyagents.mocks import mock_node
+from tinyagents.cache import SemanticCache
+import tinyagents.nodes as nodes
+
+@chainable(ray_options={"num_cpus": 1})
+class Multiply:
+    def __init__(self, factor: int = 2):
+        self.factor = factor
+
+    def run(self, x):
+        return x * self.factor
+
+@chainable
+def increment(x):
+    return x + 1
+
+def add(total, name, output):
+    return total + output
+
+def embed(text):
+    return [len(text), 1.0]
+
+@chainable(kind="llm", warmup=["hello"], semantic_cache=SemanticCache(embed, threshold=0.9), resources=["tokenizer"], pool_size=2, streaming_input=True)
+class Model:
+    async def run(self, x, tokenizer):
+        return x
+
+class TestSpec(unittest.TestCase):
+
+    def test_round_trip(self):
+        graph = Multiply(3) | nodes.ParallelReduce(Multiply(2), increment, reducer=add, initial=0) | nodes.Recursive(increment, Multiply(), max_iter=2, until=identical_outputs)
+        spec = graph_to_spec(graph)
+
+        self.assertEqual(spec["nodes"][0]["import_path"], f"{__name__}:Multiply")
+        self.assertEqual(spec["nodes"][0]["args"], {"factor": 3})
+        self.assertEqual(spec["nodes"][1]["reducer"], {"$import": f"{__name__}:add"})
+        # the spec can be stored as JSON
+        spec = json.loads(json.dumps(spec))
+
+        loaded = graph_from_spec(spec)
+        self.assertEqual(str(loaded), str(graph))
+        self.assertEqual(graph_to_spec(loaded), spec)
+        self.assertEqual(
+            loaded.compile(verbose=False).invoke(1),
+            graph.compile(verbose=False).invoke(1)
+        )
+
+    def test_node_options(self):
+        spec = json.loads(json.dumps(graph_to_spec(Model().as_graph())))
+        self.assertEqual(spec["nodes"][0]["semantic_cache"]["embed"], {"$import": f"{__name__}:embed"})
+
+        loaded = graph_from_spec(spec)._state[0]
+        self.assertEqual((loaded._warmup_inputs, loaded._resources, loaded._pool_size, loaded._streaming_input), (["hello"], ["tokenizer"], 2, True))
+        self.assertEqual((loaded._semantic_cache.embed, loaded._semantic_cache.threshold), (embed, 0.9))
+        self.assertEqual(graph_to_spec(loaded.as_graph())["nodes"], spec["nodes"])
+
+    def test_function_nodes(self):
+        spec = graph_to_spec(increment.as_graph())
+        spec["nodes"][0]["name"] = "renamed"
+        spec["nodes"][0]["ray_options"] = {"num_cpus": 2}
+
+        loaded = graph_from_spec(spec)._state[0]
+        self.assertEqual((loaded.name, loaded._ray_options), ("renamed", {"num_cpus": 2}))
+        # the module-level node is unchanged
+        self.assertEqual((increment.name, increment._ray_options), ("increment", {}))
+        self.assertEqual(loaded.invoke(1).content, 2)
+
+    def test_precompiled(self):
+        graph = Multiply(3) | increment
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "graph.json")
+            save_spec(graph, path, precompile=True, autoscale=True)
+            with open(path) as f:
+                spec = json.load(f)
+
+            loaded = load_spec(path)
+
+        self.assertTrue(spec["precompiled"])
+        self.assertIn("autoscaling_config", spec["nodes"][0]["ray_options"])
+        self.assertEqual(spec["nodes"][0]["ray_options"]["num_cpus"], 1)
+        # the constructor arguments are cached, so they don't need to be found again when deploying
+        self.assertEqual(loaded._state[0]._init_args, {"factor": 3})
+        self.assertEqual(loaded.compile(verbose=False).invoke(1), 4)
+
+    def test_invalid_spec(self):
+        with self.assertRaises(GraphSpecError):
+            graph_to_spec(Multiply() | mock_node("mock"))
+
+        spec = graph_to_spec(Graph() | Multiply())
+        spec["nodes"][0]["args"]["unknown"] = 1
+        with self.assertRaises(GraphSpecError):
+            graph_from_spec(spec)
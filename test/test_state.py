@@ -0,0 +1,87 @@
+import unittest
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+import ray
+
+from tinyagents import chainable, get_state
+from tinyagents.graph import GraphRunner
+from tinyagents.state import RunState
+
+@chainable
+class AddDocument:
+    def run(self, x):
+        state = get_state()
+        state["documents"] = state.get("documents", []) + [x]
+        return x
+
+@chainable
+class SlowWriter:
+    def run(self, x):
+        time.sleep(0.1)
+        # other subnodes of a `Parallel` node don't see each other's writes
+        get_state()["seen_by_slow"] = "fast" in get_state()
+        get_state()["winner"] = "slow"
+        return x
+
+@chainable
+class FastWriter:
+    def run(self, x):
+        get_state()["fast"] = True
+        get_state()["winner"] = "fast"
+        return x
+
+@chainable
+class ReadState:
+    def run(self, x):
+        return get_state().to_dict()
+
+class RemoteNode:
+    """ Behaves like a Ray DeploymentHandle """
+    def __init__(self, node):
+        self.name = node.name
+        self.ainvoke = MagicMock()
+        self.ainvoke.remote = self._remote
+        self._node = node
+        self.kwargs = None
+
+    async def _remote(self, inputs, **kwargs):
+        self.kwargs = kwargs
+        # the deployment runs in another process, so it can't see the caller's state
+        return await asyncio.get_running_loop().run_in_executor(None, lambda: asyncio.run(self._node.ainvoke(inputs=inputs, **kwargs)))
+
+class TestRunState(unittest.TestCase):
+
+    def test_snapshots(self):
+        state = RunState({"history": ["a"], "unused": 1})
+        snapshot = state.snapshot()
+        snapshot["history"] = snapshot["history"] + ["b"]
+        del snapshot["unused"]
+
+        self.assertEqual(state.to_dict(), {"history": ["a"], "unused": 1})
+        state.merge(snapshot)
+        self.assertEqual(state.to_dict(), {"history": ["a", "b"]})
+
+    def test_parallel_merge(self):
+        runner = GraphRunner([AddDocument(), SlowWriter() & FastWriter(), ReadState()])
+
+        state = runner.invoke("doc")
+        self.assertEqual(state, {"documents": ["doc"], "seen_by_slow": False, "fast": True, "winner": "fast"})
+
+        # writes are merged in the order the subnodes were added, not the order they finished
+        runner = GraphRunner([FastWriter() & SlowWriter(), ReadState()])
+        state = RunState()
+        self.assertEqual(asyncio.run(runner.ainvoke("doc", state=state))["winner"], "slow")
+        self.assertEqual(state["winner"], "slow")
+
+    def test_object_store(self):
+        ray.init(num_cpus=1, include_dashboard=False, log_to_driver=False)
+        try:
+            remote = RemoteNode(AddDocument())
+            runner = GraphRunner([AddDocument(), remote, ReadState()], state_store="ray")
+            self.assertEqual(asyncio.run(runner.ainvoke("doc")), {"documents": ["doc", "doc"]})
+            # only references to the values are sent to the deployment
+            self.assertIsInstance(remote.kwargs["run_state"]["documents"], ray.ObjectRef)
+        finally:
+            ray.shutdown()
@@ -0,0 +1,172 @@
+import unittest
+import asyncio
+from contextlib import aclosing
+
+from tinyagents import chainable, loop, respond, passthrough
+from tinyagents.graph import Graph, GraphRunner
+from tinyagents.cache import SemanticCache
+from tinyagents.metrics import get_node_stats, reset_node_stats
+import tinyagents.nodes as nodes
+
+events = []
+
+@chainable
+async def llm(prompt: str):
+    for token in prompt.split():
+        await asyncio.sleep(0.02)
+        events.append(("llm", token))
+        yield token + " "
+
+@chainable(streaming_input=True)
+async def tts(tokens):
+    async for token in tokens:
+        events.append(("tts", token.strip()))
+        yield token.strip().upper()
+
+@chainable
+def count(text: str):
+    return len(text.split())
+
+@chainable
+def words(text: str):
+    # synchronous generators are run in a thread
+    for word in text.split():
+        yield word
+
+@chainable
+class Guardrail:
+    def run(self, text):
+        return text
+
+    def output_handler(self, text):
+        return respond("blocked") if "blocked" in text else passthrough(text)
+
+def collect(runner: GraphRunner, inputs, **kwargs) -> list:
+    async def run():
+        return [chunk async for chunk in runner.astream(inputs, **kwargs)]
+    return asyncio.run(run())
+
+class TestStreaming(unittest.TestCase):
+
+    def setUp(self):
+        events.clear()
+
+    def test_pipeline(self):
+        chunks = collect(GraphRunner([llm, tts]), "one two three")
+        self.assertEqual(chunks, ["ONE", "TWO", "THREE"])
+        # `tts` starts before `llm` has produced its last token
+        self.assertLess(events.index(("tts", "one")), events.index(("llm", "three")))
+
+    def test_collected_input(self):
+        # nodes which don't consume streams receive the concatenated tokens
+        self.assertEqual(collect(GraphRunner([llm, count]), "one two three"), [3])
+        self.assertEqual(collect(GraphRunner([words, Guardrail()]), "a b c"), ["abc"])
+
+    def test_backpressure(self):
+        produced = []
+
+        @chainable
+        async def fast(n):
+            for i in range(n):
+                produced.append(i)
+                yield i
+
+        @chainable(streaming_input=True)
+        async def slow(chunks):
+            async for i in chunks:
+                await asyncio.sleep(0.005)
+                # the producer can only get ahead by the size of the buffers between the nodes
+                yield len(produced) - i
+
+        ahead = collect(GraphRunner([fast, slow]), 50, buffer_size=2)
+        self.assertEqual(len(ahead), 50)
+        self.assertLessEqual(max(ahead), 8)
+
+    def test_break(self):
+        self.assertEqual(collect(GraphRunner([llm, Guardrail(), tts]), "blocked"), ["blocked"])
+
+    def test_subgraph_and_recursive(self):
+        graph = Graph()
+        graph.next(llm)
+        graph.next(tts)
+        subgraph = nodes.SubGraph(graph, name="speech")
+        self.assertEqual(collect(GraphRunner([subgraph, count]), "a b"), [1])
+
+        @chainable
+        def double(x):
+            yield x
+            yield x
+
+        @chainable(streaming_input=True)
+        async def add(chunks):
+            return sum([chunk async for chunk in chunks])
+
+        # each round streams `double` into `add`
+        self.assertEqual(collect(GraphRunner([loop(double, add, max_iter=3)]), 1), [8])
+
+    def test_errors(self):
+        @chainable
+        async def failing(x):
+            yield x
+            raise ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            collect(GraphRunner([failing, tts]), "a")
+
+    def test_failed_stage_stops_the_pipeline(self):
+        @chainable
+        async def numbers(n):
+            for i in range(n):
+                yield i
+
+        @chainable(streaming_input=True)
+        async def boom(chunks):
+            async for chunk in chunks:
+                raise ValueError("failed")
+            yield
+
+        async def run():
+            with self.assertRaises(ValueError):
+                async for _ in GraphRunner([numbers, boom, tts]).astream(100, buffer_size=2):
+                    pass
+            await asyncio.sleep(0.05)
+            # the tasks of the previous stages have finished, rather than waiting on a full buffer
+            return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+        self.assertEqual(asyncio.run(run()), [])
+
+        @chainable(streaming_input=True)
+        async def forward(chunks):
+            async for chunk in chunks:
+                yield chunk
+
+        async def stop_early():
+            async with aclosing(GraphRunner([numbers, forward]).astream(100, buffer_size=2)) as chunks:
+                async for _ in chunks:
+                    break
+            await asyncio.sleep(0.05)
+            return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+        self.assertEqual(asyncio.run(stop_early()), [])
+
+    def test_streaming_nodes_are_tracked(self):
+        reset_node_stats()
+        calls = []
+
+        @chainable(kind="llm", semantic_cache=SemanticCache(lambda text: [len(text), 1]))
+        async def cached_llm(prompt: str):
+            calls.append(prompt)
+            for token in prompt.split():
+                yield token + " "
+
+        runner = GraphRunner([cached_llm, tts])
+        self.assertEqual(collect(runner, "one two"), ["ONE", "TWO"])
+        # the second run is answered by the semantic cache as a single chunk
+        self.assertEqual(collect(runner, "one two"), ["ONE TWO"])
+        self.assertEqual(calls, ["one two"])
+        self.assertEqual((get_node_stats("cached_llm").count, get_node_stats("tts").count), (2, 2))
+        self.assertEqual(get_node_stats("tts").in_flight, 0)
+
+    def test_streaming_input_requires_async(self):
+        with self.assertRaises(ValueError):
+            chainable(streaming_input=True)(lambda chunks: chunks)
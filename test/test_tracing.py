@@ -1,11 +1,34 @@
 import unittest
+import asyncio
+import json
+import os
+import tempfile
 from unittest.mock import patch, MagicMock
 
 from opentelemetry.trace import Tracer
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
 
 from tinyagents import chainable
 from tinyagents.tracing import init_all_tracers
+from tinyagents.tracing.exporters import FileSpanExporter, read_span_files
+import tinyagents.tracing.exporters as exporters
 from tinyagents.nodes import NodeMeta
+from tinyagents.graph import GraphRunner
+
+class RemoteNode:
+    """ Behaves like a Ray DeploymentHandle, which can only receive arguments that can be sent to another process """
+    def __init__(self, node):
+        self.name = node.name
+        self.ainvoke = MagicMock()
+        self.ainvoke.remote = self._remote
+        self._node = node
+        self.kwargs = None
+
+    async def _remote(self, inputs, **kwargs):
+        self.kwargs = kwargs
+        return await self._node.ainvoke(inputs=inputs, **kwargs)
 
 class TestTracing(unittest.TestCase):
     @patch('tinyagents.tracing.utils._init_node_tracer')
@@ -36,5 +59,101 @@ class TestTracing(unittest.TestCase):
         # ensure that the tracer started a new span
         graph._state[0]._tracer.start_as_current_span.assert_called_once()
 
+    def test_trace_context_propagation(self):
+        exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        tracer = provider.get_tracer(__name__)
+
+        @chainable
+        def local_node(x):
+            return x
+
+        @chainable
+        def remote_node(x):
+            return x
+
+        local_node._tracer = tracer
+        remote_node._tracer = tracer
+        remote = RemoteNode(remote_node)
+
+        runner = GraphRunner([local_node, remote])
+        runner._tracer = tracer
+        asyncio.run(runner.ainvoke("input", run_id="run-1"))
+
+        # the remote node receives W3C trace context headers rather than the context object
+        self.assertNotIn("parent_context", remote.kwargs)
+        self.assertIn("traceparent", remote.kwargs["trace_context"])
+        self.assertEqual(remote.kwargs["run_id"], "run-1")
+
+        spans = {span.name: span for span in exporter.get_finished_spans()}
+        self.assertEqual(set(spans), {"flow", "local_node", "remote_node"})
+        for name in ["local_node", "remote_node"]:
+            self.assertEqual(spans[name].parent.span_id, spans["flow"].context.span_id)
+            self.assertEqual(spans[name].context.trace_id, spans["flow"].context.trace_id)
+        self.assertTrue(all(span.attributes["run_id"] == "run-1" for span in spans.values()))
+
+    def test_file_span_exporter(self):
+        with tempfile.TemporaryDirectory() as directory:
+            exporter = FileSpanExporter(directory, max_bytes=1, compress=True)
+            provider = TracerProvider()
+            provider.add_span_processor(SimpleSpanProcessor(exporter))
+            tracer = provider.get_tracer(__name__)
+
+            for name in ["span1", "span2"]:
+                with tracer.start_as_current_span(name):
+                    pass
+                exporter.force_flush()
+
+            provider.shutdown()
+
+            # every write exceeds `max_bytes`, so each span is rotated into its own compressed file
+            self.assertEqual(len([f for f in os.listdir(directory) if f.endswith(".jsonl.gz")]), 2)
+            span_names = [
+                span.name 
+                for request in read_span_files(directory) 
+                for resource_spans in request.resource_spans 
+                for scope_spans in resource_spans.scope_spans 
+                for span in scope_spans.spans
+            ]
+            self.assertEqual(sorted(span_names), ["span1", "span2"])
+
+    def test_file_span_exporter_ids(self):
+        with tempfile.TemporaryDirectory() as directory:
+            exporter = FileSpanExporter(directory, compress=False)
+            provider = TracerProvider()
+            provider.add_span_processor(SimpleSpanProcessor(exporter))
+            with provider.get_tracer(__name__).start_as_current_span("span") as span:
+                trace_id = format(span.get_span_context().trace_id, "032x")
+            provider.shutdown()
+
+            # OTLP/JSON stores IDs as lowercase hex
+            with open(os.path.join(directory, os.listdir(directory)[0])) as f:
+                stored = json.loads(f.readline())["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+            self.assertEqual(stored["traceId"], trace_id)
+            request = next(read_span_files(directory))
+            self.assertEqual(request.resource_spans[0].scope_spans[0].spans[0].trace_id.hex(), trace_id)
+
+    def test_file_span_exporter_errors(self):
+        with tempfile.TemporaryDirectory() as directory:
+            exporter = FileSpanExporter(directory, compress=False)
+            provider = TracerProvider()
+            provider.add_span_processor(SimpleSpanProcessor(exporter))
+            tracer = provider.get_tracer(__name__)
+
+            with patch.object(exporters, "encode_spans", side_effect=ValueError("failed")), self.assertLogs(exporters.logger, "ERROR"):
+                with tracer.start_as_current_span("span1"):
+                    pass
+                self.assertTrue(exporter.force_flush(timeout_millis=1000))
+
+            # the writer keeps running after a failed write
+            with tracer.start_as_current_span("span2"):
+                pass
+            provider.shutdown()
+
+            self.assertEqual(exporter.dropped_spans, 1)
+            span_names = [span.name for request in read_span_files(directory) for resource_spans in request.resource_spans for scope_spans in resource_spans.scope_spans for span in scope_spans.spans]
+            self.assertEqual(span_names, ["span2"])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,2 +1,5 @@
 from tinyagents.decorators import chainable
-from tinyagents.handlers import loop, respond, passthrough, end_loop
\ No newline at end of file
+from tinyagents.handlers import loop, race, respond, passthrough, end_loop, identical_outputs, score_threshold
+from tinyagents.nodes import get_loop_history
+from tinyagents.state import get_state
+from tinyagents.resources import register_resource
\ No newline at end of file
@@ -0,0 +1,165 @@
+from typing import Any, Dict, Iterable, List, Optional
+import json
+import logging
+import math
+import threading
+import time
+
+from tinyagents.callbacks import BaseCallback
+from tinyagents.metrics import NodeStats, get_node_stats
+
+# sensible starting points for each kind of node, e.g. llm nodes are slow and often limited by the provider,
+# whereas retrievers and tools are usually cheap and can handle many concurrent requests per replica
+KIND_DEFAULTS: Dict[str, Dict[str, int]] = {
+    "llm": {"target_ongoing_requests": 4, "min_replicas": 1, "max_replicas": 8},
+    "agent": {"target_ongoing_requests": 4, "min_replicas": 1, "max_replicas": 8},
+    "retriever": {"target_ongoing_requests": 16, "min_replicas": 1, "max_replicas": 8},
+    "tool": {"target_ongoing_requests": 8, "min_replicas": 1, "max_replicas": 16},
+    "other": {"target_ongoing_requests": 2, "min_replicas": 1, "max_replicas": 4},
+}
+
+MIN_SAMPLES = 20
+
+logger = logging.getLogger(__name__)
+
+def _replicas_for(concurrency: float, target_ongoing_requests: int) -> int:
+    return max(1, math.ceil(concurrency / target_ongoing_requests))
+
+def autoscaling_config(
+        kind: Optional[str],
+        mean_concurrency: Optional[float] = None,
+        peak_concurrency: Optional[float] = None,
+        headroom: float = 1.25
+    ) -> Dict[str, int]:
+    """
+    Create a Ray Serve autoscaling config for a node.
+
+    Args:
+        kind (Optional[str]): The kind of node (e.g. `llm`), which determines the defaults.
+        mean_concurrency (Optional[float]): The average number of requests being processed by the node.
+        peak_concurrency (Optional[float]): The maximum number of requests being processed by the node.
+        headroom (float): The factor applied to the peak concurrency when setting the maximum number of replicas.
+
+    Returns:
+        Dict[str, int]: The autoscaling config.
+    """
+    config = dict(KIND_DEFAULTS.get(kind or "other", KIND_DEFAULTS["other"]))
+    target = config["target_ongoing_requests"]
+
+    if mean_concurrency is not None:
+        config["min_replicas"] = _replicas_for(mean_concurrency, target)
+    if peak_concurrency is not None:
+        config["max_replicas"] = max(config["min_replicas"], _replicas_for(peak_concurrency * headroom, target))
+
+    config["max_replicas"] = max(config["min_replicas"], config["max_replicas"])
+    return config
+
+def config_from_stats(kind: Optional[str], stats: Optional[NodeStats], headroom: float = 1.25) -> Dict[str, int]:
+    """ Create an autoscaling config using the statistics recorded for a node, or the defaults for its kind if there aren't enough samples """
+    if stats is None or stats.count < MIN_SAMPLES:
+        count = stats.count if stats is not None else 0
+        logger.info("Using the autoscaling defaults for `%s` nodes, as the node has %d of the %d samples needed.", kind or "other", count, MIN_SAMPLES)
+        return autoscaling_config(kind)
+
+    # Little's law: the average number of requests in the node is the arrival rate multiplied by the service time
+    mean_concurrency = stats.arrival_rate * stats.mean_latency
+    return autoscaling_config(kind, mean_concurrency, max(mean_concurrency, stats.peak_in_flight), headroom)
+
+def recommend_options(node, headroom: float = 1.25, stats: Optional[NodeStats] = None) -> Dict[str, Any]:
+    """
+    Recommend the Ray Serve deployment options for a node based on its kind and its recorded statistics.
+
+    Args:
+        node: The node to deploy.
+        headroom (float): The factor applied to the peak concurrency when setting the maximum number of replicas.
+        stats (Optional[NodeStats]): The statistics of the node (e.g. from a load test), by default those recorded in this process. When the graph is compiled these are usually empty, so the defaults for the kind of node are used.
+
+    Returns:
+        Dict[str, Any]: The deployment options.
+    """
+    stats = stats if stats is not None else get_node_stats(node.name)
+    config = config_from_stats(getattr(node, "_kind", None), stats, headroom)
+    return {
+        "autoscaling_config": config,
+        # each replica must accept more requests than the autoscaling target
+        "max_ongoing_requests": config["target_ongoing_requests"] * 2
+    }
+
+class LoadProfileCallback(BaseCallback):
+    """ Record when each node starts and finishes, so the load can be replayed using `recommend_replicas` """
+    records: List[Dict[str, Any]]
+
+    def __init__(self):
+        self.records = []
+        self._started: Dict[tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def node_start(self, inputs: Any, node_name: str, run_id: Optional[str]):
+        with self._lock:
+            self._started.setdefault((run_id, node_name), []).append(time.time())
+
+    def node_finish(self, outputs: Any, node_name: str, run_id: Optional[str]):
+        with self._lock:
+            if (run_id, node_name) not in self._started:
+                return
+            self.records.append({"node": node_name, "start": self._pop_start(node_name, run_id), "end": time.time()})
+
+    def node_cancel(self, node_name: str, run_id: Optional[str]):
+        with self._lock:
+            if (run_id, node_name) in self._started:
+                self._pop_start(node_name, run_id)
+
+    def _pop_start(self, node_name: str, run_id: Optional[str]) -> float:
+        """ Remove the earliest start time of a node, removing the entry once every call has finished so runs aren't kept """
+        started = self._started[(run_id, node_name)]
+        start = started.pop(0)
+        if not started:
+            del self._started[(run_id, node_name)]
+        return start
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            for record in self.records:
+                f.write(json.dumps(record) + "\n")
+
+def load_profile(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def recommend_replicas(
+        records: Iterable[Dict[str, Any]],
+        node_kinds: Optional[Dict[str, str]] = None,
+        headroom: float = 1.25
+    ) -> Dict[str, Dict[str, int]]:
+    """
+    Replay a recorded load profile to recommend the autoscaling config for each node.
+
+    Args:
+        records (Iterable[Dict[str, Any]]): Records with the `node` name and the `start` and `end` time of each request.
+        node_kinds (Optional[Dict[str, str]]): The kind of each node, nodes without a kind use the `other` defaults.
+        headroom (float): The factor applied to the peak concurrency when setting the maximum number of replicas.
+
+    Returns:
+        Dict[str, Dict[str, int]]: The autoscaling config for each node.
+    """
+    events: Dict[str, List[tuple]] = {}
+    for record in records:
+        events.setdefault(record["node"], []).extend([(record["start"], 1), (record["end"], -1)])
+
+    recommendations = {}
+    for node_name, node_events in events.items():
+        # sweep over the events (finishing before starting at the same time) to find the concurrency over time
+        node_events.sort(key=lambda event: (event[0], event[1]))
+        concurrency, peak, busy_time = 0, 0, 0.0
+        for (time_, change), (next_time, _) in zip(node_events, node_events[1:] + [node_events[-1]]):
+            concurrency += change
+            peak = max(peak, concurrency)
+            busy_time += concurrency * (next_time - time_)
+
+        duration = node_events[-1][0] - node_events[0][0]
+        mean_concurrency = busy_time / duration if duration > 0 else peak
+
+        kind = (node_kinds or {}).get(node_name)
+        recommendations[node_name] = autoscaling_config(kind, mean_concurrency, peak, headroom)
+
+    return recommendations
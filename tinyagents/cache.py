@@ -0,0 +1,139 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Union
+from copy import deepcopy
+from dataclasses import replace
+from inspect import iscoroutinefunction
+import asyncio
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("The `numpy` package is required to use a semantic cache, install it using `pip install \"tinyagents[cache]\"`.")
+
+from tinyagents.types import NodeOutput
+from tinyagents.utils import run_coroutine
+
+class SemanticCache:
+    """ A cache which returns the output for a previous input that is similar to the given input """
+    threshold: float
+    max_entries: int
+    ttl: Optional[float]
+    hits: int
+    misses: int
+
+    def __init__(
+            self,
+            embed: Callable[[Any], Union[Sequence[float], Awaitable[Sequence[float]]]],
+            threshold: float = 0.95,
+            max_entries: int = 1024,
+            ttl: Optional[float] = None
+        ):
+        """
+        Args:
+            embed (Callable[[Any], Union[Sequence[float], Awaitable[Sequence[float]]]]): A function which creates an embedding for the inputs of a node, `ainvoke` awaits async functions and runs other functions in a thread.
+            threshold (float): The minimum cosine similarity for a cached output to be returned.
+            max_entries (int): The maximum number of entries, the least recently used entry is replaced once the cache is full.
+            ttl (Optional[float]): The number of seconds after which an entry expires.
+        """
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._reset()
+
+    def _reset(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        # the embedding matrix is allocated once the embedding size is known
+        self._embeddings: Optional[np.ndarray] = None
+        self._outputs: List[Optional[NodeOutput]] = [None] * self.max_entries
+        self._valid = np.zeros(self.max_entries, dtype=bool)
+        self._created = np.zeros(self.max_entries)
+        self._last_used = np.zeros(self.max_entries)
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # entries aren't shared when the cache is copied to another process (e.g. a Ray replica)
+        return {"embed": self.embed, "threshold": self.threshold, "max_entries": self.max_entries, "ttl": self.ttl}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._reset()
+
+    def __len__(self) -> int:
+        return int(self._valid.sum())
+
+    def create_key(self, inputs: Any) -> np.ndarray:
+        """ Create the (normalised) embedding used to look up the inputs """
+        if iscoroutinefunction(self.embed):
+            return self._normalise(run_coroutine(self.embed(inputs)))
+        return self._normalise(self.embed(inputs))
+
+    async def acreate_key(self, inputs: Any) -> np.ndarray:
+        """ Create the key without blocking the event loop (e.g. while a remote embedding model is called) """
+        if iscoroutinefunction(self.embed):
+            return self._normalise(await self.embed(inputs))
+        return self._normalise(await asyncio.to_thread(self.embed, inputs))
+
+    @staticmethod
+    def _normalise(embedding: Any) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def get(self, key: np.ndarray) -> Optional[NodeOutput]:
+        """ Get the cached output with the most similar key, if its similarity is above the threshold """
+        with self._lock:
+            if self._embeddings is None:
+                self.misses += 1
+                return None
+
+            now = time.monotonic()
+            self._evict_expired(now)
+
+            scores = self._embeddings @ key
+            scores[~self._valid] = -np.inf
+            index = int(np.argmax(scores))
+            output = self._outputs[index]
+
+            if output is None or scores[index] < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._last_used[index] = now
+
+        # outputs are copied when they are stored and returned, so changes made by callers aren't seen by later hits
+        return replace(output, content=deepcopy(output.content))
+
+    def put(self, key: np.ndarray, output: NodeOutput) -> None:
+        with self._lock:
+            if self._embeddings is None:
+                self._embeddings = np.zeros((self.max_entries, key.shape[0]), dtype=np.float32)
+
+            now = time.monotonic()
+            self._evict_expired(now)
+
+            # use an empty slot if there is one, otherwise replace the least recently used entry
+            empty = np.flatnonzero(~self._valid)
+            index = int(empty[0]) if len(empty) else int(np.argmin(self._last_used))
+
+            self._embeddings[index] = key
+            self._outputs[index] = replace(output, content=deepcopy(output.content))
+            self._valid[index] = True
+            self._created[index] = now
+            self._last_used[index] = now
+
+    def clear(self) -> None:
+        with self._lock:
+            self._valid[:] = False
+            self._outputs = [None] * self.max_entries
+
+    def _evict_expired(self, now: float) -> None:
+        if self.ttl is None:
+            return
+
+        for index in np.flatnonzero(self._valid & (self._created < now - self.ttl)):
+            self._valid[index] = False
+            self._outputs[index] = None
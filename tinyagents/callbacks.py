@@ -1,5 +1,5 @@
 from abc import ABC
-from typing import Any
+from typing import Any, Dict, Optional
 import json
 from inspect import iscoroutine
 from ray.serve.handle import DeploymentResponse
@@ -10,29 +10,41 @@ from tinyagents.types import NodeOutput
 class BaseCallback(ABC):
     """ A base class for callbacks """
 
-    def flow_start(self, inputs: Any, run_id: str):
+    def flow_start(self, inputs: Any, run_id: Optional[str]):
         # runs when a graph is executed
         pass
 
-    def flow_end(self, outputs: Any, run_id: str):
+    def flow_end(self, outputs: Any, run_id: Optional[str]):
         # runs when a graph execution has finished
         pass
     
-    def node_start(self, inputs: Any, node_name: str, run_id: str):
+    def node_start(self, inputs: Any, node_name: str, run_id: Optional[str]):
         # runs when a node has started
         pass
 
-    def node_finish(self, outputs: Any, node_name: str, run_id: str):
+    def node_finish(self, outputs: Any, node_name: str, run_id: Optional[str]):
         # runs when a node has finished
         pass
 
+    def node_cancel(self, node_name: str, run_id: Optional[str]):
+        # runs when a node which has started won't finish (e.g. it lost a race, or raised an exception)
+        pass
+
+    def memory_usage(self, node_name: str, node_bytes: int, run_bytes: int, run_id: Optional[str]):
+        # runs after each node when memory tracking is enabled
+        pass
+
+    def resource_usage(self, resource_name: str, stats: Dict[str, Any], node_name: str, run_id: Optional[str]):
+        # runs after a node has released a resource, with the size and health of its pool
+        pass
+
 class StdoutCallback(BaseCallback):
     """ Print the inputs and outputs of nodes """
-    def node_start(self, inputs: Any, node_name: str, run_id: str):
+    def node_start(self, inputs: Any, node_name: str, run_id: Optional[str]):
         print(create_colored_text(f"\n > Running node: {node_name}\n", "blue"))
         print(create_colored_text(f"\tInput: {inputs}\n", "yellow"))
 
-    def node_finish(self, outputs: Any, node_name: str, run_id: str):
+    def node_finish(self, outputs: Any, node_name: str, run_id: Optional[str]):
         print(create_colored_text(f"\tOutput ({node_name}): {self.output_to_str(outputs)}", "green"))
 
     @staticmethod
@@ -0,0 +1,171 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Type
+from types import ModuleType
+import json
+
+from tinyagents.types import EncodedPayload
+
+class Codec(ABC):
+    """ A base class for encoding and decoding payloads """
+    name: str
+    content_type: str
+
+    @abstractmethod
+    def encode(self, obj: Any) -> bytes:
+        pass
+
+    @abstractmethod
+    def decode(self, data: bytes) -> Any:
+        pass
+
+    def can_encode(self, obj: Any) -> bool:
+        """ Whether the codec can encode the object, used to pick a codec for a response """
+        return True
+
+def _only_contains(obj: Any, scalar_types: tuple) -> bool:
+    """ Check whether an object only contains lists, tuples, dictionaries with string keys and the given scalar types """
+    seen = set()
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, scalar_types):
+            continue
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+
+        if isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+        elif isinstance(obj, dict) and all(isinstance(key, str) for key in obj):
+            stack.extend(obj.values())
+        else:
+            return False
+    return True
+
+class JSONCodec(Codec):
+    """ Encode payloads as JSON, using `orjson` when it is installed """
+    name = "json"
+    content_type = "application/json"
+    _orjson: Optional[ModuleType]
+
+    def __init__(self):
+        try:
+            import orjson
+            self._orjson = orjson
+        except ImportError:
+            self._orjson = None
+
+    def encode(self, obj: Any) -> bytes:
+        if self._orjson is not None:
+            return self._orjson.dumps(obj)
+        return json.dumps(obj).encode("utf-8")
+
+    def can_encode(self, obj: Any) -> bool:
+        # the same types are accepted whether or not `orjson` is installed, so responses don't depend on it
+        return _only_contains(obj, (str, int, float, bool, type(None)))
+
+    def decode(self, data: bytes) -> Any:
+        if self._orjson is not None:
+            return self._orjson.loads(data)
+        return json.loads(data)
+
+class MsgpackCodec(Codec):
+    """ Encode payloads using MessagePack """
+    name = "msgpack"
+    content_type = "application/msgpack"
+
+    def __init__(self):
+        try:
+            import msgpack
+        except ImportError:
+            raise ImportError("The `msgpack` package is required to use the msgpack codec, install it using `pip install msgpack`.")
+        self._msgpack = msgpack
+
+    def encode(self, obj: Any) -> bytes:
+        return self._msgpack.packb(obj)
+
+    def can_encode(self, obj: Any) -> bool:
+        return _only_contains(obj, (str, bytes, int, float, bool, type(None)))
+
+    def decode(self, data: bytes) -> Any:
+        return self._msgpack.unpackb(data)
+
+class BytesCodec(Codec):
+    """ Pass raw bytes through unchanged """
+    name = "bytes"
+    content_type = "application/octet-stream"
+
+    def encode(self, obj: Any) -> bytes:
+        if isinstance(obj, str):
+            return obj.encode("utf-8")
+        return bytes(obj)
+
+    def can_encode(self, obj: Any) -> bool:
+        return isinstance(obj, (str, bytes, bytearray, memoryview))
+
+    def decode(self, data: bytes) -> Any:
+        return data
+
+class TextCodec(Codec):
+    """ Encode payloads as UTF-8 text """
+    name = "text"
+    content_type = "text/plain"
+
+    def encode(self, obj: Any) -> bytes:
+        return str(obj).encode("utf-8")
+
+    def can_encode(self, obj: Any) -> bool:
+        # other objects (e.g. dicts) would be sent as their `repr`
+        return isinstance(obj, (str, int, float))
+
+    def decode(self, data: bytes) -> Any:
+        return data.decode("utf-8")
+
+_CODEC_TYPES: Dict[str, Type[Codec]] = {}
+_CODECS: Dict[str, Codec] = {}
+
+def register_codec(codec_cls: Type[Codec], *aliases: str) -> None:
+    """ Register a codec so it can be selected by its name, content type or any of the given aliases (e.g. other content types) """
+    for key in [codec_cls.name, codec_cls.content_type, *aliases]:
+        _CODEC_TYPES[key.lower()] = codec_cls
+        _CODECS.pop(key.lower(), None)
+
+def get_codec(name: str) -> Codec:
+    """ Get a codec by name (e.g. `msgpack`) or by content type (parameters such as `charset` are ignored) """
+    key = name.split(";")[0].strip().lower()
+    if key not in _CODEC_TYPES:
+        raise KeyError(f"No codec has been registered for `{key}`, available codecs are {sorted(_CODEC_TYPES.keys())}.")
+
+    # codecs are created on first use, so optional dependencies are only needed if the codec is used
+    if key not in _CODECS:
+        _CODECS[key] = _CODEC_TYPES[key]()
+    return _CODECS[key]
+
+_ANY = object()
+
+def negotiate_codec(accept: Optional[str], outputs: Any = _ANY) -> Optional[Codec]:
+    """ Select the first registered codec listed in an `Accept` header (which can encode the outputs, if given), returns None if there is no preference """
+    if not accept:
+        return None
+
+    for media_type in accept.split(","):
+        key = media_type.split(";")[0].strip().lower()
+        if key in _CODEC_TYPES:
+            codec = get_codec(key)
+            if outputs is _ANY or codec.can_encode(outputs):
+                return codec
+
+    return None
+
+def encode_payload(obj: Any, codec: str) -> EncodedPayload:
+    """ Encode an object so it can be sent between deployments """
+    codec_ = get_codec(codec)
+    return EncodedPayload(data=codec_.encode(obj), content_type=codec_.content_type)
+
+def decode_payload(payload: EncodedPayload) -> Any:
+    return get_codec(payload.content_type).decode(payload.data)
+
+register_codec(JSONCodec)
+register_codec(MsgpackCodec, "application/x-msgpack")
+register_codec(BytesCodec)
+register_codec(TextCodec)
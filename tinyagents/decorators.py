@@ -1,8 +1,9 @@
-from typing import Callable, Dict, Any, Union, Type, Optional, Literal, TYPE_CHECKING
-from inspect import isclass
+from typing import Callable, Dict, Any, Union, Type, Optional, Literal, List, TYPE_CHECKING
+from inspect import isclass, iscoroutinefunction, isasyncgenfunction
 
 if TYPE_CHECKING:
     from opentelemetry.trace import Tracer
+    from tinyagents.cache import SemanticCache
 
 from tinyagents.nodes import NodeMeta
 
@@ -15,26 +16,52 @@ def chainable(
         node_name: Optional[str] = None,
         kind: Optional[Literal["tool", "llm", "retriever", "agent", "other"]] = "other",
         ray_options: Optional[Dict[str, Any]] = None,
-        metadata: Optional[Dict[str, Any]] = None
+        process_options: Optional[Dict[str, Any]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        warmup: Optional[List[Any]] = None,
+        semantic_cache: Optional["SemanticCache"] = None,
+        resources: Optional[List[str]] = None,
+        pool_size: Optional[int] = None,
+        streaming_input: bool = False
     ):
     if ray_options is None:
         ray_options = {}
+    if process_options is None:
+        process_options = {}
     if metadata is None:
         metadata = {}
 
     if kind not in ["tool", "llm", "retriever", "agent", "other"]:
         raise ValueError(f"`{kind}` is not a valid node type, must be one of ['tool', 'llm', 'retriever', 'agent', 'other']")
+    
+    if semantic_cache is not None and kind not in ["llm", "retriever"]:
+        raise ValueError(f"A semantic cache can only be used by `llm` and `retriever` nodes, not `{kind}` nodes")
+
+    if pool_size is not None and pool_size < 1:
+        raise ValueError("`pool_size` must be at least 1.")
 
     def decorator(cls: Union[Type, Callable]) -> Type:
-        func_cls = Function if not isclass(cls) else cls
-        if not isclass(cls):
-            func_cls.run = staticmethod(cls)
+        if pool_size is not None and not isclass(cls):
+            raise ValueError("`pool_size` can only be used with classes, decorated functions don't hold state.")
+
+        run = cls.run if isclass(cls) else cls
+        if streaming_input and not (iscoroutinefunction(run) or isasyncgenfunction(run)):
+            raise ValueError("Nodes with `streaming_input` receive an async iterator, so `run` must be an async function or an async generator.")
+
+        # each function gets its own subclass of `Function`, so that decorated functions don't share a `run` method
+        func_cls = cls if isclass(cls) else type(cls.__name__, (Function,), {"run": staticmethod(cls)})
 
         class ChainableNode(func_cls, NodeMeta):
             name: str = node_name if node_name else getattr(cls, 'name', cls.__name__)
             _kind: str = kind
             _metadata: Dict[str, Any] = metadata
             _ray_options: Dict[str, Any] = ray_options
+            _process_options: Optional[Dict[str, Any]] = process_options
+            _warmup_inputs: Optional[List[Any]] = warmup
+            _semantic_cache: Optional["SemanticCache"] = semantic_cache
+            _resources: Optional[List[str]] = resources
+            _pool_size: Optional[int] = pool_size
+            _streaming_input: bool = streaming_input
             _tracer: Union["Tracer", None] = None
 
             def __repr__(self) -> str:
@@ -1,39 +1,63 @@
-import inspect
+from typing import Any
+import time
 from ray import serve
 import tinyagents.nodes as nodes
+from tinyagents.utils import get_init_args
+from tinyagents.autoscaling import recommend_options
+from tinyagents.resources import get_registry
 
-def nodes_to_deployments(graph_nodes: list) -> list[serve.Deployment]:
-    deployments = [convert_node_to_deployment(node) for node in graph_nodes]
+def nodes_to_deployments(graph_nodes: list, autoscale: bool = False) -> list[serve.Deployment]:
+    deployments = [convert_node_to_deployment(node, autoscale) for node in graph_nodes]
     return deployments
 
-def convert_node_to_deployment(node) -> serve.Deployment:
+def convert_node_to_deployment(node, autoscale: bool = False) -> serve.Deployment:
     if isinstance(node, nodes.Parallel):
-        return parralel_node_to_deployment(node)
+        return parralel_node_to_deployment(node, autoscale)
     elif isinstance(node, nodes.ConditionalBranch):
-        return conditional_node_to_deployment(node)
+        return conditional_node_to_deployment(node, autoscale)
     elif isinstance(node, nodes.Recursive):
-        return recursive_node_to_deployment(node)
+        return recursive_node_to_deployment(node, autoscale)
+    elif isinstance(node, nodes.Map):
+        return map_node_to_deployment(node, autoscale)
     else:
-        return node_to_deployment(node)
+        return node_to_deployment(node, autoscale)
 
-def parralel_node_to_deployment(node) -> serve.Deployment:
-    node.nodes = {name: node_to_deployment(node_) for name, node_ in node.nodes.items()}
+def parralel_node_to_deployment(node, autoscale: bool = False) -> serve.Deployment:
+    node.nodes = {name: node_to_deployment(node_, autoscale) for name, node_ in node.nodes.items()}
     return node
 
-def conditional_node_to_deployment(node) -> serve.Deployment:
-    node.branches = {name: node_to_deployment(node_) for name, node_ in node.branches.items()}
+def conditional_node_to_deployment(node, autoscale: bool = False) -> serve.Deployment:
+    node.branches = {name: node_to_deployment(node_, autoscale) for name, node_ in node.branches.items()}
     return node
 
-def recursive_node_to_deployment(node) -> serve.Deployment:
-    node.node1 = node_to_deployment(node.node1)
-    node.node2 = node_to_deployment(node.node2)
+def recursive_node_to_deployment(node, autoscale: bool = False) -> serve.Deployment:
+    node.node1 = node_to_deployment(node.node1, autoscale)
+    node.node2 = node_to_deployment(node.node2, autoscale)
     return node
 
-def node_to_deployment(node):
+def map_node_to_deployment(node, autoscale: bool = False) -> serve.Deployment:
+    node.node = node_to_deployment(node.node, autoscale)
+    return node
+
+def node_to_deployment(node, autoscale: bool = False):
     options = node._ray_options
-    argnames = [arg for arg in inspect.signature(node.__init__).parameters if arg not in {"args", "kwargs", "self"}]
-    try:
-        args = {anno: getattr(node, anno) for anno in argnames}
-    except AttributeError:
-        raise Exception(f"In order to compile the graph using Ray, arguments that are passed to the constructor must be stored as attributes of the class `{node.name}`.")
-    return serve.deployment(node.__class__, name=node.name).options(**options).bind(**args)
\ No newline at end of file
+    # generate an autoscaling config unless the number of replicas has been configured
+    if autoscale and "num_replicas" not in options and "autoscaling_config" not in options:
+        options = {**recommend_options(node), **options}
+    args = get_init_args(node)
+    return serve.deployment(with_cold_start(node.__class__), name=node.name).options(**options).bind(**args)
+
+def with_cold_start(node_cls: type[Any]) -> type:
+    """ Subclass a node so that replicas only become ready (i.e. receive traffic) once they have been warmed up, and tear down their resources when they are stopped """
+    def __init__(self, *args, **kwargs):
+        start_time = time.time_ns()
+        start = time.perf_counter()
+        node_cls.__init__(self, *args, **kwargs)
+        self._cold_start(start_time=start_time, init_seconds=time.perf_counter() - start)
+
+    def __del__(self):
+        # each replica creates its own instances of the resources, only those used by the node are torn down
+        if self._resources:
+            get_registry().teardown(self._resources)
+
+    return type(node_cls.__name__, (node_cls,), {"__init__": __init__, "__del__": __del__, "_node_cls": node_cls})
\ No newline at end of file
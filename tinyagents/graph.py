@@ -1,58 +1,102 @@
-from typing import Any, Optional, Union, List
+from typing import Any, AsyncIterator, Dict, Optional, Union, List, Literal
 from json.decoder import JSONDecodeError
 
 from ray.serve import deployment
 import starlette
 import starlette.requests
+import starlette.responses
 
 from tinyagents.callbacks import BaseCallback, StdoutCallback
-from tinyagents.utils import check_for_break, get_content, create_run_id
+from tinyagents.utils import check_for_break, get_content, get_nested_content, create_run_id, ainvoke_node
+from tinyagents.codecs import get_codec, negotiate_codec
 import tinyagents.deployment_utils as deploy_utils
+import tinyagents.process_utils as process_utils
 from tinyagents.tracing import trace_flow, init_all_tracers, create_tracer, check_tracing_enabled
 from tinyagents.types import NodeOutput
+from tinyagents.memory import RunMemory, use_memory
+from tinyagents.scheduling import PriorityScheduler
+from tinyagents.state import RunState, create_state, use_state
+from tinyagents.resources import ResourceRegistry, use_registry
+from tinyagents.metrics import check_metrics_export_enabled, start_metrics_export
+from tinyagents.streaming import DEFAULT_BUFFER_SIZE, aclose, as_chunks, buffered, pipe_nodes
+
+PRIORITY_HEADER = "x-tinyagents-priority"
+RUN_ID_HEADER = "x-tinyagents-run-id"
+TRACE_CONTEXT_HEADERS = ["traceparent", "tracestate", "baggage"]
 
 class GraphRunner:
     """ A runner for executing the graph. """
 
-    def __init__(self, nodes: list, callbacks: Optional[List[BaseCallback]] = None):
+    def __init__(
+            self, 
+            nodes: list, 
+            callbacks: Optional[List[BaseCallback]] = None,
+            track_memory: bool = False,
+            max_run_memory: Optional[int] = None,
+            wire_codec: Optional[str] = None,
+            scheduler: Optional[PriorityScheduler] = None,
+            state_store: Literal["local", "ray"] = "local",
+            resources: Optional[ResourceRegistry] = None
+        ):
         """
         Initializes the GraphRunner with a list of nodes and an optional callback.
 
         Args:
             nodes (list): A list of nodes to be executed in the graph.
             callback (Optional[BaseCallback]): An optional callback for tracking execution.
+            track_memory (bool): Whether to report the approximate memory held by each run to the callbacks.
+            max_run_memory (Optional[int]): The approximate number of bytes a run may hold before it is stopped (enables memory tracking), checked whenever a node or subnode finishes.
+            wire_codec (Optional[str]): The codec (e.g. `msgpack`) used to encode payloads sent to Ray Deployments, by default payloads are pickled.
+            scheduler (Optional[PriorityScheduler]): Limits the number of concurrent `ainvoke` and `astream` runs, granting slots to waiting runs according to their priority (`invoke` isn't scheduled).
+            state_store (str): Where the run state is kept, `ray` keeps values in the Ray object store so deployments only fetch the keys they read.
+            resources (Optional[ResourceRegistry]): The resources injected into local nodes, by default the resources registered using `register_resource` are used (Ray deployments always use these).
         """
-        self.nodes = nodes
+        # nodes with `process_options` are moved to a pool of worker processes
+        self.nodes = process_utils.nodes_to_process_nodes(nodes)
         self.callbacks = callbacks
+        self.track_memory = track_memory or max_run_memory is not None
+        self.max_run_memory = max_run_memory
+        self.wire_codec = wire_codec
+        self.scheduler = scheduler
+        self.state_store = state_store
+        self.resources = resources
         self._tracer = None
 
         if check_tracing_enabled():
             self._tracer = create_tracer() 
-            init_all_tracers(nodes)
+            init_all_tracers(self.nodes)
 
     @trace_flow
     def invoke(self, inputs: Any, **kwargs):
         """
         Executes the graph synchronously with the given inputs.
 
+        The scheduler is asyncio-based, so synchronous runs bypass it and don't take a slot; use `ainvoke` for runs which should be scheduled.
+
         Args:
             inputs (Any): The input data for the graph execution.
+            state (Optional[Union[RunState, dict]]): The initial run state, pass a `RunState` to read the state once the run has finished.
             **kwargs: Additional keyword arguments.
 
         Returns:
             Any: The output of the graph execution.
         """
         run_id = create_run_id() if "run_id" not in kwargs else kwargs.pop("run_id")
+        state = self._create_state(kwargs.pop("state", None))
 
         if self.callbacks: [callback.flow_start(inputs=inputs, run_id=run_id) for callback in self.callbacks]
+        memory = RunMemory(run_id, inputs, max_bytes=self.max_run_memory) if self.track_memory else None
 
+        # each output is only referenced until the next node has consumed it
         x = inputs
-        for node in self.nodes:
-            x = get_content(x)
-            x = node.invoke(x, callbacks=self.callbacks, run_id=run_id, **kwargs) 
-            stop = check_for_break(x)
-            if stop:
-                break
+        with use_state(state), use_registry(self.resources), use_memory(memory):
+            for node in self.nodes:
+                x = get_content(x)
+                x = node.invoke(x, callbacks=self.callbacks, run_id=run_id, **kwargs) 
+                if memory: self._record_memory(memory, node.name, x)
+                stop = check_for_break(x)
+                if stop:
+                    break
 
         if isinstance(x, NodeOutput):
             x = x.content
@@ -62,33 +106,43 @@ class GraphRunner:
         return x
     
     @trace_flow
-    async def ainvoke(self, inputs: Any, **kwargs):
+    async def ainvoke(self, inputs: Any, priority: Optional[str] = None, **kwargs):
         """
         Executes the graph asynchronously with the given inputs.
 
         Args:
             inputs (Any): The input data for the graph execution.
+            priority (Optional[str]): The priority class (or tenant) of the run, used by the scheduler.
+            state (Optional[Union[RunState, dict]]): The initial run state, pass a `RunState` to read the state once the run has finished.
             **kwargs: Additional keyword arguments.
 
         Returns:
             Any: The output of the graph execution.
         """
+        if self.scheduler is None:
+            return await self._arun(inputs, **kwargs)
+
+        async with self.scheduler.slot(priority):
+            return await self._arun(inputs, **kwargs)
+
+    async def _arun(self, inputs: Any, **kwargs):
         run_id = create_run_id() if "run_id" not in kwargs else kwargs.pop("run_id")
+        state = self._create_state(kwargs.pop("state", None))
         if self.callbacks: [callback.flow_start(inputs=inputs, run_id=run_id) for callback in self.callbacks]
+        memory = RunMemory(run_id, inputs, max_bytes=self.max_run_memory) if self.track_memory else None
 
         x = inputs
-        for node in self.nodes:
-            x = get_content(x)
+        with use_state(state), use_registry(self.resources), use_memory(memory):
+            for node in self.nodes:
+                x = get_content(x)
 
-            if hasattr(node.ainvoke, "remote"):
-                x = await node.ainvoke.remote(inputs=x, callbacks=self.callbacks, **kwargs)
-            else:
-                x = await node.ainvoke(inputs=x, callbacks=self.callbacks, **kwargs)
+                x = await ainvoke_node(node, x, callbacks=self.callbacks, run_id=run_id, wire_codec=self.wire_codec, **kwargs)
 
-            stop = check_for_break(x)
+                if memory: self._record_memory(memory, node.name, x)
+                stop = check_for_break(x)
 
-            if stop:
-                break
+                if stop:
+                    break
 
         if isinstance(x, NodeOutput):
             x = x.content
@@ -97,31 +151,98 @@ class GraphRunner:
 
         return x
     
+    async def astream(self, inputs: Any, priority: Optional[str] = None, buffer_size: int = DEFAULT_BUFFER_SIZE, **kwargs) -> AsyncIterator[Any]:
+        """
+        Executes the graph as a pipeline, yielding the chunks of the output as they are produced.
+
+        Nodes whose `run` method is a generator stream their output, and each node starts as soon as the previous node produces its first chunk. Nodes created using `chainable(streaming_input=True)` consume the chunks as they arrive, other nodes receive the collected chunks (see `NodeMeta.collect_input`).
+
+        Args:
+            inputs (Any): The input data for the graph execution, an async iterator is streamed to the first node.
+            priority (Optional[str]): The priority class (or tenant) of the run, used by the scheduler.
+            buffer_size (int): The number of chunks each node can produce before waiting for the next node to consume them.
+            state (Optional[Union[RunState, dict]]): The initial run state, pass a `RunState` to read the state once the run has finished.
+            **kwargs: Additional keyword arguments.
+
+        Yields:
+            Any: The chunks of the output of the final node.
+        """
+        run_id = create_run_id() if "run_id" not in kwargs else kwargs.pop("run_id")
+        state = self._create_state(kwargs.pop("state", None))
+
+        if self.scheduler is None:
+            async for chunk in self._astream(inputs, state, buffer_size, run_id=run_id, **kwargs):
+                yield chunk
+            return
+
+        async with self.scheduler.slot(priority):
+            async for chunk in self._astream(inputs, state, buffer_size, run_id=run_id, **kwargs):
+                yield chunk
+
+    async def _astream(self, inputs: Any, state: RunState, buffer_size: int, run_id: str, **kwargs) -> AsyncIterator[Any]:
+        if self.callbacks: [callback.flow_start(inputs=inputs, run_id=run_id) for callback in self.callbacks]
+
+        async def pipeline():
+            # the pipeline runs in its own task, so the run state isn't set in the context of the consumer
+            with use_state(state), use_registry(self.resources):
+                chunks = pipe_nodes(self.nodes, as_chunks(inputs), callbacks=self.callbacks, buffer_size=buffer_size, run_id=run_id, wire_codec=self.wire_codec, **kwargs)
+                try:
+                    async for chunk in chunks:
+                        yield chunk
+                finally:
+                    await aclose(chunks)
+
+        # the pipeline is stopped as soon as the consumer stops (or fails), rather than when it is garbage collected
+        chunks = buffered(pipeline(), buffer_size)
+        try:
+            async for chunk in chunks:
+                yield get_content(chunk)
+        finally:
+            await aclose(chunks)
+
+        if self.callbacks: [callback.flow_end(outputs=None, run_id=run_id) for callback in self.callbacks]
+
+    def _create_state(self, state: Optional[Union[RunState, dict]]) -> RunState:
+        """ Create the state of a run, which nodes access using `get_state()` """
+        return state if isinstance(state, RunState) else create_state(state, self.state_store)
+
+    def _record_memory(self, memory: RunMemory, node_name: str, outputs: Any) -> None:
+        """ Record the memory held after a node has finished, raising `MemoryLimitExceeded` if the limit is exceeded """
+        try:
+            memory.record(node_name, outputs)
+        finally:
+            if self.callbacks: [callback.memory_usage(node_name=node_name, node_bytes=memory.node_bytes[node_name], run_bytes=memory.current_bytes, run_id=memory.run_id) for callback in self.callbacks]
+
 @deployment(name="runner")
 class GraphDeployment:
     """ A deployment class for executing the graph in a deployment context. """
 
-    def __init__(self, nodes: list, callbacks: Optional[List[BaseCallback]] = None):
+    def __init__(self, nodes: list, callbacks: Optional[List[BaseCallback]] = None, **runner_kwargs):
         """
         Initializes the GraphDeployment with a list of nodes and an optional callback.
 
         Args:
             nodes (list): A list of nodes to be executed in the graph.
             callback: An optional callback for tracking execution.
+            **runner_kwargs: Additional keyword arguments passed to the `GraphRunner`.
         """
-        self.runner = GraphRunner(nodes, callbacks=callbacks)
+        self.runner = GraphRunner(nodes, callbacks=callbacks, **runner_kwargs)
+        if check_metrics_export_enabled():
+            start_metrics_export()
     
-    async def ainvoke(self, inputs: Any):
+    async def ainvoke(self, inputs: Any, priority: Optional[str] = None, **kwargs):
         """
         Asynchronously invokes the graph with the given inputs.
 
         Args:
             inputs (Any): The input data for the graph execution.
+            priority (Optional[str]): The priority class (or tenant) of the request.
+            **kwargs: Additional keyword arguments, e.g. the `run_id` or the W3C `trace_context` of the caller.
 
         Returns:
             Any: The output of the graph execution.
         """
-        return await self.runner.ainvoke(inputs)
+        return await self.runner.ainvoke(inputs, priority=priority, **kwargs)
 
     async def __call__(self, request: starlette.requests.Request):
         """
@@ -135,13 +256,45 @@ class GraphDeployment:
         """
         assert(isinstance(request, starlette.requests.Request)), "The `__call__` method is only used for handling REST requests. Use the `ainvoke()` method instead."
         
+        content_type = request.headers.get("content-type")
         try:
-            request = await request.json()
-        except JSONDecodeError:
-            request = await request.body()
-            request = request.decode("utf-8")
-
-        return await self.runner.ainvoke(request)
+            request_codec = get_codec(content_type) if content_type else None
+        except KeyError:
+            # unregistered content types (e.g. forms) are parsed in the same way as requests without one
+            request_codec = None
+
+        body = await request.body()
+
+        if request_codec is not None:
+            try:
+                inputs = request_codec.decode(body)
+            except ValueError as e:
+                return starlette.responses.PlainTextResponse(f"The request body couldn't be decoded as `{request_codec.content_type}`: {e}", status_code=400)
+        else:
+            # fall back to JSON then plain text
+            try:
+                inputs = get_codec("json").decode(body)
+            except (JSONDecodeError, ValueError):
+                inputs = body.decode("utf-8")
+
+        # join the trace of the caller if it sent W3C trace context headers
+        trace_context = {key: request.headers[key] for key in TRACE_CONTEXT_HEADERS if key in request.headers}
+        kwargs: Dict[str, Any] = dict(trace_context=trace_context) if trace_context else {}
+        if RUN_ID_HEADER in request.headers:
+            kwargs["run_id"] = request.headers[RUN_ID_HEADER]
+
+        outputs = await self.runner.ainvoke(inputs, priority=request.headers.get(PRIORITY_HEADER), **kwargs)
+        # only the content of node outputs is sent (e.g. the outputs of a parallel node), not their actions or state
+        outputs = get_nested_content(outputs)
+
+        # use the codec the caller prefers, or the codec of the request, if it can encode the outputs
+        response_codec = negotiate_codec(request.headers.get("accept"), outputs)
+        if response_codec is None and request_codec is not None and request_codec.can_encode(outputs):
+            response_codec = request_codec
+        if response_codec is None:
+            return outputs
+        
+        return starlette.responses.Response(content=response_codec.encode(outputs), media_type=response_codec.content_type)
     
     async def _get_meta(self):
         """
@@ -169,7 +322,12 @@ class Graph:
             single_deployment: bool = False,
             runner_ray_options: dict = {}, 
             callbacks: Optional[List[BaseCallback]] = None, 
-            verbose: bool = True
+            verbose: bool = True,
+            track_memory: bool = False,
+            max_run_memory: Optional[int] = None,
+            wire_codec: Optional[str] = None,
+            autoscale: bool = False,
+            scheduler: Optional[PriorityScheduler] = None
         ) -> Union["GraphRunner", "GraphDeployment"]:
         """
         Creates a GraphRunner or GraphDeployment that can be used to execute the graph.
@@ -180,6 +338,11 @@ class Graph:
             runner_ray_options (dict): The Ray Actor options for the GraphRunner deployment.
             callbacks (List[BaseCallback]): A list of callbacks that should be used.
             verbose (bool): Whether to print the node outputs to the console.
+            track_memory (bool): Whether to report the approximate memory held by each run to the callbacks.
+            max_run_memory (Optional[int]): The approximate number of bytes a run may hold before it is stopped, checked whenever a node or subnode finishes.
+            wire_codec (Optional[str]): The codec (e.g. `msgpack`) used to encode payloads sent between Ray Deployments.
+            autoscale (bool): Whether to generate autoscaling configs for nodes which don't set `num_replicas` or `autoscaling_config`.
+            scheduler (Optional[PriorityScheduler]): Schedules concurrent `ainvoke` and `astream` runs (including REST requests) by priority, e.g. so interactive requests aren't queued behind batch jobs.
 
         Returns:
             Union[GraphRunner, GraphDeployment]: The created GraphRunner or GraphDeployment.
@@ -187,15 +350,20 @@ class Graph:
         if verbose and (not callbacks or not any(isinstance(callback, StdoutCallback) for callback in callbacks)):
             callbacks = [StdoutCallback()] + (callbacks if callbacks is not None else [])
 
+        runner_kwargs: Dict[str, Any] = dict(track_memory=track_memory, max_run_memory=max_run_memory, wire_codec=wire_codec, scheduler=scheduler)
+
+        # nodes deployed separately read the run state from the Ray object store
+        runner_kwargs["state_store"] = "ray" if use_ray and not single_deployment else "local"
+
         if not use_ray:
-            return GraphRunner(nodes=self._state, callbacks=callbacks)
+            return GraphRunner(nodes=self._state, callbacks=callbacks, **runner_kwargs)
 
         # check if nodes have already been converted to deployments
         if not self._compiled and not single_deployment:
-            self._state = deploy_utils.nodes_to_deployments(graph_nodes=self._state)
+            self._state = deploy_utils.nodes_to_deployments(graph_nodes=self._state, autoscale=autoscale)
             self._compiled = True
 
-        return GraphDeployment.options(**runner_ray_options).bind(self._state, callbacks=callbacks)
+        return GraphDeployment.options(**runner_ray_options).bind(self._state, callbacks=callbacks, **runner_kwargs)
 
     def next(self, node: Any) -> None:
         """
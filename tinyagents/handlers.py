@@ -1,6 +1,7 @@
-from typing import Any, Optional
+from typing import Any, Optional, Callable
+from functools import partial
 
-from tinyagents.types import NodeOutput, Action
+from tinyagents.types import NodeOutput, Action, ConvergencePredicate
 import tinyagents.nodes as nodes
 
 def respond(response: str) -> NodeOutput:
@@ -20,5 +21,34 @@ def end_loop(outputs: Any):
         action=Action.EndLoop
     )
 
-def loop(node1, node2, max_iter: int = 3, name: Optional[str] = None):
-    return nodes.Recursive(node1, node2, max_iter, name)
\ No newline at end of file
+def loop(
+        node1, 
+        node2, 
+        max_iter: int = 3, 
+        name: Optional[str] = None, 
+        until: Optional[Callable[[Any, Any], bool]] = None,
+        history_size: int = 0,
+        timeout: Optional[float] = None
+    ):
+    return nodes.Recursive(node1, node2, max_iter, name, until=until, history_size=history_size, timeout=timeout)
+
+def race(
+        *args,
+        validator: Optional[Callable[[Any], bool]] = None,
+        quorum: int = 1,
+        skip_below: Optional[float] = None,
+        name: Optional[str] = None
+    ):
+    return nodes.Race(*args, validator=validator, quorum=quorum, skip_below=skip_below, name=name)
+
+# there's no previous output to compare with after the first round (rather than a previous output of None)
+@partial(ConvergencePredicate, requires_previous=True)
+def identical_outputs(previous: Any, current: Any) -> bool:
+    """ A convergence predicate for `loop` which ends the loop once a round gives the same output as the last """
+    return previous == current
+
+def score_threshold(score: Callable[[Any], float], threshold: float) -> Callable[[Any, Any], bool]:
+    """ Create a convergence predicate for `loop` which ends the loop once `score(outputs)` reaches the threshold """
+    def until(previous: Any, current: Any) -> bool:
+        return score(current) >= threshold
+    return until
\ No newline at end of file
@@ -0,0 +1,323 @@
+from typing import Any, BinaryIO, Callable, Deque, Dict, Iterator, List, Optional, Tuple, cast
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections import deque
+from dataclasses import dataclass, asdict
+import argparse
+import json
+import mmap
+import os
+import sys
+import time
+
+from tinyagents.loadtest import create_local_invoke
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+@dataclass
+class JobProgress:
+    """ The progress of a job, offsets are stored so that an interrupted job resumes from the first record without an output """
+    records: int = 0
+    failed: int = 0
+    file_index: int = 0
+    offset: int = 0
+    shard: int = 0
+    shard_records: int = 0
+    shard_bytes: int = 0
+    bytes_read: int = 0
+    total_bytes: int = 0
+    elapsed: float = 0.0
+    # the progress when the job was (re)started, so rates aren't skewed by the time a job was stopped for
+    resumed_records: int = 0
+    resumed_bytes: int = 0
+
+    @property
+    def throughput(self) -> float:
+        """ Records per second """
+        return (self.records - self.resumed_records) / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """ The estimated number of seconds until the job finishes, based on the number of bytes read """
+        read = self.bytes_read - self.resumed_bytes
+        if self.elapsed <= 0 or read <= 0:
+            return None
+        return (self.total_bytes - self.bytes_read) / (read / self.elapsed)
+
+    def __str__(self) -> str:
+        eta = f"{self.eta:.0f}s" if self.eta is not None else "unknown"
+        done = self.bytes_read / self.total_bytes if self.total_bytes else 1.0
+        return f"{self.records} records ({self.failed} failed), {done:.1%} of inputs, {self.throughput:.2f} records/s, ETA {eta}"
+
+def read_jsonl(path: str, offset: int = 0) -> Iterator[Tuple[int, bytes]]:
+    """
+    Read the lines of a JSONL file from a byte offset, the file is memory-mapped where possible so lines aren't buffered.
+
+    Yields:
+        Tuple[int, bytes]: The offset after the line, and the line.
+    """
+    with open(path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # empty files and pipes can't be mapped
+            data = None
+
+        if data is None:
+            f.seek(offset)
+            for line in f:
+                offset += len(line)
+                yield offset, line
+            return
+
+        with data:
+            while offset < len(data):
+                end = data.find(b"\n", offset)
+                end = len(data) if end == -1 else end + 1
+                line = data[offset:end]
+                offset = end
+                yield offset, line
+
+class ShardWriter:
+    """ Write outputs to a sequence of JSONL files (`outputs-00000.jsonl`, ...) with at most `shard_size` records each """
+
+    def __init__(self, output_dir: str, shard_size: int, progress: JobProgress):
+        self.output_dir = output_dir
+        self.shard_size = shard_size
+        self.progress = progress
+        self._file: Optional[BinaryIO] = None
+
+    def shard_path(self, shard: int) -> str:
+        return os.path.join(self.output_dir, f"outputs-{shard:05d}.jsonl")
+
+    def remove_shards(self) -> None:
+        """ Remove the shards written by a previous job """
+        for name in os.listdir(self.output_dir):
+            if name.startswith("outputs-") and name.endswith(".jsonl"):
+                os.remove(os.path.join(self.output_dir, name))
+
+    def open(self) -> None:
+        path = self.shard_path(self.progress.shard)
+        self._file = open(path, "ab")
+        # drop outputs written after the last checkpoint, their records are run again
+        self._file.truncate(self.progress.shard_bytes)
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self.progress.shard_records >= self.shard_size:
+            self._current_file().close()
+            self.progress.shard += 1
+            self.progress.shard_records = 0
+            self.progress.shard_bytes = 0
+            self.open()
+
+        line = (json.dumps(record, default=str) + "\n").encode("utf-8")
+        self._current_file().write(line)
+        self.progress.shard_records += 1
+        self.progress.shard_bytes += len(line)
+
+    def flush(self) -> None:
+        file = self._current_file()
+        file.flush()
+        os.fsync(file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+    def _current_file(self) -> BinaryIO:
+        if self._file is None:
+            raise RuntimeError("The shard writer must be opened before outputs are written.")
+        return self._file
+
+def load_checkpoint(output_dir: str, inputs: List[str]) -> Optional[JobProgress]:
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return None
+
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint["inputs"] != inputs:
+        raise ValueError(f"The checkpoint in `{output_dir}` was created for the inputs {checkpoint['inputs']}, not {inputs}.")
+    return JobProgress(**checkpoint["progress"])
+
+def save_checkpoint(output_dir: str, inputs: List[str], progress: JobProgress) -> None:
+    """ Save the progress of a job, replacing the previous checkpoint atomically """
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"inputs": inputs, "progress": asdict(progress)}, f)
+    os.replace(path + ".tmp", path)
+
+@dataclass
+class _Record:
+    """ A record which has been read, blank lines have no output """
+    index: int
+    file_index: int
+    offset: int
+    bytes_read: int
+    output: Optional[Future] = None
+    inputs: Any = None
+
+    def done(self) -> bool:
+        return self.output is None or self.output.done()
+
+def run_job(
+        invoke: Callable[[Any], Any],
+        inputs: List[str],
+        output_dir: str,
+        concurrency: int = 1,
+        shard_size: int = 100_000,
+        checkpoint_interval: int = 1000,
+        include_inputs: bool = False,
+        resume: bool = True,
+        on_progress: Optional[Callable[[JobProgress], None]] = None,
+        progress_interval: float = 10.0
+    ) -> JobProgress:
+    """
+    Run every record of one or more JSONL files through a graph, writing the outputs to sharded JSONL files.
+
+    Records are read as they are needed and at most `2 * concurrency` records are held at once, so memory use doesn't depend on the size of the inputs. Outputs are written in the order of the inputs, each with the `index` of its record and either its `output` or its `error`.
+
+    Args:
+        invoke (Callable[[Any], Any]): Runs a single record (e.g. `runner.invoke`).
+        inputs (List[str]): The JSONL files to read, each line is the input of a record.
+        output_dir (str): The directory for the output shards and the checkpoint.
+        concurrency (int): The maximum number of records run at once.
+        shard_size (int): The maximum number of records in each output file.
+        checkpoint_interval (int): The number of records between checkpoints.
+        include_inputs (bool): Whether to include the input of each record in its output.
+        resume (bool): Whether to continue from the checkpoint in `output_dir` (if there is one), otherwise the job starts again.
+        on_progress (Optional[Callable[[JobProgress], None]]): Called with the progress of the job every `progress_interval` seconds, and once it has finished.
+        progress_interval (float): The number of seconds between progress reports.
+
+    Returns:
+        JobProgress: The progress of the finished job.
+    """
+    inputs = [os.path.abspath(path) for path in inputs]
+    os.makedirs(output_dir, exist_ok=True)
+
+    checkpointed = load_checkpoint(output_dir, inputs) if resume else None
+    progress = checkpointed or JobProgress()
+    progress.total_bytes = sum(os.path.getsize(path) for path in inputs)
+    progress.resumed_records, progress.resumed_bytes = progress.records, progress.bytes_read
+    start = time.perf_counter()
+    last_report = start
+
+    writer = ShardWriter(output_dir, shard_size, progress)
+    if checkpointed is None:
+        writer.remove_shards()
+    writer.open()
+
+    def read() -> Iterator[Tuple[int, int, int, bytes]]:
+        # `bytes_read` counts the bytes of every file read so far
+        previous_bytes = sum(os.path.getsize(path) for path in inputs[:progress.file_index])
+        for file_index in range(progress.file_index, len(inputs)):
+            offset = progress.offset if file_index == progress.file_index else 0
+            for end, line in read_jsonl(inputs[file_index], offset):
+                yield file_index, end, previous_bytes + end, line
+            previous_bytes += os.path.getsize(inputs[file_index])
+
+    def write(record: _Record) -> None:
+        if record.output is not None:
+            error = record.output.exception()
+            output: Dict[str, Any] = {"index": record.index}
+            if include_inputs:
+                output["input"] = record.inputs
+            if error is None:
+                output["output"] = record.output.result()
+            else:
+                output["error"] = f"{type(error).__name__}: {error}"
+                progress.failed += 1
+            writer.write(output)
+            progress.records += 1
+
+        progress.file_index, progress.offset, progress.bytes_read = record.file_index, record.offset, record.bytes_read
+        if record.output is not None and progress.records % checkpoint_interval == 0:
+            checkpoint()
+
+    def checkpoint() -> None:
+        # outputs are written to disk before the checkpoint that covers them
+        writer.flush()
+        save_checkpoint(output_dir, inputs, progress)
+
+    def report(force: bool = False) -> None:
+        nonlocal last_report
+        now = time.perf_counter()
+        progress.elapsed = now - start
+        if on_progress is not None and (force or now - last_report >= progress_interval):
+            last_report = now
+            on_progress(progress)
+
+    pending: Deque[_Record] = deque()
+    index = progress.records
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for file_index, offset, bytes_read, line in read():
+                record = _Record(index, file_index, offset, bytes_read)
+                # blank lines are skipped, but still move the offset forward
+                if line.strip():
+                    try:
+                        inputs_ = json.loads(line)
+                    except ValueError as e:
+                        # invalid lines are recorded as failed records, rather than stopping the job
+                        inputs_ = line.decode("utf-8", "replace").strip()
+                        record.output = Future()
+                        record.output.set_exception(e)
+                    else:
+                        record.output = executor.submit(invoke, inputs_)
+                    record.inputs = inputs_ if include_inputs else None
+                    index += 1
+                pending.append(record)
+
+                # outputs are written in order, so wait for the oldest record once enough records are in flight
+                while pending and (len(pending) >= 2 * concurrency or pending[0].done()):
+                    write(pending.popleft())
+                report()
+
+            while pending:
+                write(pending.popleft())
+                report()
+    finally:
+        checkpoint()
+        writer.close()
+
+    report(force=True)
+    return progress
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="tinyagents-job", description="Run every record of one or more JSONL files through a TinyAgents graph.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--factory", help="The import path of a graph, runner or a function that creates one (e.g. `my_app.graphs:create_graph`)")
+    target.add_argument("--spec", help="A graph spec created using `tinyagents.spec.save_spec`")
+    parser.add_argument("--inputs", required=True, nargs="+", help="The JSONL files to read, each line is the input for a record")
+    parser.add_argument("--output-dir", required=True, help="The directory for the output shards and the checkpoint")
+    parser.add_argument("--concurrency", type=int, default=1, help="The maximum number of records run at once")
+    parser.add_argument("--shard-size", type=int, default=100_000, help="The maximum number of records in each output file")
+    parser.add_argument("--checkpoint-interval", type=int, default=1000, help="The number of records between checkpoints")
+    parser.add_argument("--include-inputs", action="store_true", help="Include the input of each record in its output")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint in the output directory and start again")
+    parser.add_argument("--progress-interval", type=float, default=10.0, help="The number of seconds between progress reports")
+    args = parser.parse_args(argv)
+
+    if args.factory:
+        invoke = create_local_invoke(args.factory)
+    else:
+        from tinyagents.graph import GraphRunner
+        from tinyagents.spec import load_spec
+        # graphs compiled without Ray run locally
+        invoke = cast(GraphRunner, load_spec(args.spec).compile(verbose=False)).invoke
+
+    progress = run_job(
+        invoke,
+        args.inputs,
+        args.output_dir,
+        concurrency=args.concurrency,
+        shard_size=args.shard_size,
+        checkpoint_interval=args.checkpoint_interval,
+        include_inputs=args.include_inputs,
+        resume=not args.restart,
+        on_progress=lambda progress: print(progress, file=sys.stderr),
+        progress_interval=args.progress_interval
+    )
+    print(json.dumps({"records": progress.records, "failed": progress.failed, "shards": progress.shard + 1}))
+
+if __name__ == "__main__":
+    main()
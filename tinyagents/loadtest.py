@@ -0,0 +1,233 @@
+from typing import Any, Callable, Dict, List, Optional, cast
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.request
+
+from tinyagents.callbacks import BaseCallback
+from tinyagents.metrics import percentile
+from tinyagents.utils import load_object
+
+class LatencyCallback(BaseCallback):
+    """ Record the latency of each node """
+    node_latencies: Dict[str, List[float]]
+
+    def __init__(self):
+        self.node_latencies = {}
+        self._started: Dict[tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def node_start(self, inputs: Any, node_name: str, run_id: Optional[str]):
+        with self._lock:
+            self._started.setdefault((run_id, node_name), []).append(time.perf_counter())
+
+    def node_finish(self, outputs: Any, node_name: str, run_id: Optional[str]):
+        now = time.perf_counter()
+        with self._lock:
+            if (run_id, node_name) not in self._started:
+                return
+            self.node_latencies.setdefault(node_name, []).append(now - self._pop_start(node_name, run_id))
+
+    def node_cancel(self, node_name: str, run_id: Optional[str]):
+        with self._lock:
+            if (run_id, node_name) in self._started:
+                self._pop_start(node_name, run_id)
+
+    def _pop_start(self, node_name: str, run_id: Optional[str]) -> float:
+        """ Remove the earliest start time of a node, removing the entry once every call has finished so runs aren't kept """
+        started = self._started[(run_id, node_name)]
+        start = started.pop(0)
+        if not started:
+            del self._started[(run_id, node_name)]
+        return start
+
+@dataclass
+class LoadTestReport:
+    """ The results of a load test """
+    duration: float
+    latencies: List[float]
+    errors: Dict[str, int]
+    node_latencies: Dict[str, List[float]] = field(default_factory=dict)
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies) + sum(self.errors.values())
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "duration_seconds": self.duration,
+            "throughput_rps": len(self.latencies) / self.duration if self.duration > 0 else 0.0,
+            "error_rate": sum(self.errors.values()) / self.requests if self.requests else 0.0,
+            "errors": self.errors,
+            "latency_seconds": _latency_summary(self.latencies),
+            "nodes": {name: _latency_summary(latencies) for name, latencies in self.node_latencies.items()},
+        }
+
+    def __str__(self) -> str:
+        summary = self.summary()
+        lines = [
+            f"Requests: {summary['requests']} in {summary['duration_seconds']:.2f}s ({summary['throughput_rps']:.2f} req/s)",
+            f"Error rate: {summary['error_rate']:.2%} {summary['errors'] if summary['errors'] else ''}".strip(),
+            "",
+            f"{'':<24}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}",
+            _format_row("end-to-end", summary["latency_seconds"]),
+        ]
+        lines.extend(_format_row(name, latencies) for name, latencies in summary["nodes"].items())
+        return "\n".join(lines)
+
+def _latency_summary(latencies: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(latencies),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies) if latencies else 0.0,
+    }
+
+def _format_row(name: str, summary: Dict[str, float]) -> str:
+    times = "".join(f"{summary[key] * 1000:>8.1f}ms" for key in ["p50", "p95", "p99", "max"])
+    return f"{name[:23]:<24}{summary['count']:>8}{times}"
+
+def run_load_test(
+        invoke: Callable[[Any], Any],
+        inputs: List[Any],
+        concurrency: int = 1,
+        rate: Optional[float] = None,
+        num_requests: Optional[int] = None,
+        latency_callback: Optional[LatencyCallback] = None,
+        seed: Optional[int] = None
+    ) -> LoadTestReport:
+    """
+    Send requests to a graph and measure the latency of each request.
+
+    Args:
+        invoke (Callable[[Any], Any]): Sends a single request (e.g. `runner.invoke`).
+        inputs (List[Any]): The inputs to send, these are repeated if `num_requests` is larger.
+        concurrency (int): The maximum number of requests in flight.
+        rate (Optional[float]): The arrival rate (requests per second, as a Poisson process). By default each of the `concurrency` workers sends its next request as soon as the previous one finishes.
+        num_requests (Optional[int]): The number of requests to send, defaults to the number of inputs.
+        latency_callback (Optional[LatencyCallback]): The callback used by the graph, to include node latencies in the report.
+        seed (Optional[int]): The seed used for the arrival times.
+
+    Returns:
+        LoadTestReport: The results of the load test.
+    """
+    if not inputs:
+        raise ValueError("At least one input is required.")
+
+    num_requests = num_requests if num_requests is not None else len(inputs)
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    lock = threading.Lock()
+
+    def send(i: int, scheduled: Optional[float] = None) -> None:
+        # in a closed loop, requests are due when a worker is free
+        scheduled = scheduled if scheduled is not None else time.perf_counter()
+        try:
+            invoke(inputs[i % len(inputs)])
+            # latency is measured from when the request was due, so time spent waiting for a free worker is included
+            latency = time.perf_counter() - scheduled
+            with lock:
+                latencies.append(latency)
+        except Exception as e:
+            with lock:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        if rate is None:
+            for i in range(num_requests):
+                executor.submit(send, i)
+        else:
+            rng = random.Random(seed)
+            scheduled = start
+            for i in range(num_requests):
+                scheduled += rng.expovariate(rate)
+                time.sleep(max(0.0, scheduled - time.perf_counter()))
+                executor.submit(send, i, scheduled)
+
+    return LoadTestReport(
+        duration=time.perf_counter() - start,
+        latencies=latencies,
+        errors=errors,
+        node_latencies=latency_callback.node_latencies if latency_callback else {}
+    )
+
+def create_local_invoke(factory: str, latency_callback: Optional[LatencyCallback] = None) -> Callable[[Any], Any]:
+    """ Create a `GraphRunner` from a factory which returns a `Graph` or a `GraphRunner` """
+    from tinyagents.graph import Graph, GraphRunner
+
+    callbacks: List[BaseCallback] = [latency_callback] if latency_callback is not None else []
+    runner = load_object(factory)
+    if callable(runner) and not isinstance(runner, (Graph, GraphRunner)):
+        runner = runner()
+    if isinstance(runner, Graph):
+        runner = runner.compile(callbacks=callbacks or None, verbose=False)
+    elif isinstance(runner, GraphRunner):
+        runner.callbacks = (runner.callbacks or []) + callbacks or None
+    else:
+        raise TypeError(f"`{factory}` must be (or return) a `Graph` or a `GraphRunner`, not `{type(runner).__name__}`.")
+
+    return runner.invoke
+
+def create_http_invoke(url: str, timeout: float) -> Callable[[Any], Any]:
+    """ Send requests to a running `GraphDeployment` """
+    def invoke(inputs: Any) -> Any:
+        request = urllib.request.Request(
+            url,
+            data=json.dumps(inputs).encode("utf-8"),
+            headers={"Content-Type": "application/json", "Accept": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    return invoke
+
+def read_inputs(path: str) -> List[Any]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="tinyagents-loadtest", description="Load test a TinyAgents graph.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--factory", help="The import path of a graph, runner or a function that creates one (e.g. `my_app.graphs:create_graph`)")
+    target.add_argument("--spec", help="A graph spec created using `tinyagents.spec.save_spec`")
+    target.add_argument("--url", help="The URL of a running GraphDeployment")
+    parser.add_argument("--inputs", required=True, help="A JSONL file where each line is the input for a request")
+    parser.add_argument("--concurrency", type=int, default=1, help="The maximum number of requests in flight")
+    parser.add_argument("--rate", type=float, default=None, help="The arrival rate in requests per second (open loop)")
+    parser.add_argument("--requests", type=int, default=None, help="The number of requests to send (defaults to the number of inputs)")
+    parser.add_argument("--timeout", type=float, default=60, help="The timeout for HTTP requests (in seconds)")
+    parser.add_argument("--seed", type=int, default=None, help="The seed used for the arrival times")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    latency_callback = LatencyCallback()
+    if args.factory:
+        invoke = create_local_invoke(args.factory, latency_callback)
+    elif args.spec:
+        from tinyagents.graph import GraphRunner
+        from tinyagents.spec import load_spec
+        # graphs compiled without Ray run locally
+        invoke = cast(GraphRunner, load_spec(args.spec).compile(callbacks=[latency_callback], verbose=False)).invoke
+    else:
+        invoke = create_http_invoke(args.url, args.timeout)
+
+    report = run_load_test(
+        invoke,
+        read_inputs(args.inputs),
+        concurrency=args.concurrency,
+        rate=args.rate,
+        num_requests=args.requests,
+        latency_callback=latency_callback,
+        seed=args.seed
+    )
+
+    print(json.dumps(report.summary(), indent=2) if args.json else report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+from typing import Any, Dict, Iterator, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import sys
+
+from tinyagents.types import NodeOutput
+
+class MemoryLimitExceeded(MemoryError):
+    """ Raised when the approximate memory held by a run exceeds its limit """
+
+def estimate_size(obj: Any) -> int:
+    """ Estimate the number of bytes held by an object, including the objects it contains """
+    seen = set()
+    stack = [obj]
+    size = 0
+
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+
+        size += sys.getsizeof(obj, 0)
+
+        if isinstance(obj, (str, bytes, bytearray, int, float, bool)) or obj is None:
+            continue
+        elif isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif isinstance(obj, NodeOutput):
+            stack.append(obj.content)
+        elif hasattr(obj, "__dict__"):
+            stack.append(vars(obj))
+
+    return size
+
+class RunMemory:
+    """
+    Tracks the approximate number of bytes held by a single run.
+
+    The estimate covers the inputs of the run, the output of the last top-level node and the outputs held by the node which is running (e.g. the branch outputs of a `Parallel` node). It is checked each time a node or subnode finishes, so it isn't a hard ceiling: the working memory of a node while it runs, and any outputs kept by callbacks, are not counted.
+    """
+    run_id: str
+    max_bytes: Optional[int]
+    node_bytes: Dict[str, int]
+    current_bytes: int
+    peak_bytes: int
+
+    def __init__(self, run_id: str, inputs: Any, max_bytes: Optional[int] = None):
+        """
+        Args:
+            run_id (str): The ID of the run being tracked.
+            inputs (Any): The inputs to the run, these are held by the caller until the run has finished.
+            max_bytes (Optional[int]): The maximum number of bytes the run may hold before it is stopped.
+        """
+        self.run_id = run_id
+        self.max_bytes = max_bytes
+        self.node_bytes = {}
+        self._input_bytes = estimate_size(inputs)
+        self._output_bytes = 0
+        self._held: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.current_bytes = self._input_bytes
+        self.peak_bytes = self._input_bytes
+        self._check()
+
+    def record(self, node_name: str, outputs: Any) -> int:
+        """ Record the outputs of a top-level node, which replace the outputs of the previous node and those held while it ran """
+        node_bytes = estimate_size(outputs)
+        with self._lock:
+            self.node_bytes[node_name] = node_bytes
+            self._output_bytes = node_bytes
+            self._held.clear()
+            self._update(node_name)
+        return node_bytes
+
+    def hold(self, key: str, outputs: Any) -> None:
+        """ Record outputs held by the running node until it finishes, outputs recorded under the same key replace each other """
+        held_bytes = estimate_size(outputs)
+        with self._lock:
+            self._held[key] = held_bytes
+            self._update(key)
+
+    def _update(self, node_name: str) -> None:
+        self.current_bytes = self._input_bytes + self._output_bytes + sum(self._held.values())
+        self.peak_bytes = max(self.peak_bytes, self.current_bytes)
+        self._check(node_name)
+
+    def _check(self, node_name: Optional[str] = None) -> None:
+        if self.max_bytes is None or self.current_bytes <= self.max_bytes:
+            return
+
+        location = f" after node `{node_name}`" if node_name else ""
+        raise MemoryLimitExceeded(
+            f"Run `{self.run_id}` is holding approximately {self.current_bytes} bytes{location}, which exceeds the limit of {self.max_bytes} bytes."
+        )
+
+_run_memory: ContextVar[Optional[RunMemory]] = ContextVar("tinyagents_run_memory", default=None)
+
+@contextmanager
+def use_memory(memory: Optional[RunMemory]) -> Iterator[Optional[RunMemory]]:
+    """ Track the memory of the current run using `memory`, does nothing if `memory` is None """
+    if memory is None:
+        yield None
+        return
+
+    token = _run_memory.set(memory)
+    try:
+        yield memory
+    finally:
+        _run_memory.reset(token)
+
+def hold_outputs(key: str, outputs: Any) -> None:
+    """ Record the outputs of a subnode against the memory of the current run (if it is tracked), raising `MemoryLimitExceeded` if the limit is exceeded """
+    memory = _run_memory.get()
+    if memory is not None:
+        memory.hold(key, outputs)
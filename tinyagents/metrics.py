@@ -0,0 +1,227 @@
+from typing import Dict, List, Optional, Any
+from collections import deque
+from inspect import iscoroutinefunction, isasyncgenfunction
+import functools
+import math
+import os
+import threading
+import time
+
+from ray.util import metrics
+
+_gauges: Dict[str, metrics.Gauge] = {}
+_histograms: Dict[str, metrics.Histogram] = {}
+
+_LATENCY_BOUNDARIES = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+def _get_gauge(name: str, description: str, tag_keys: tuple = ("node", "phase")) -> metrics.Gauge:
+    """ Metrics are created on first use and exported using Ray's metrics agent (e.g. to Prometheus) """
+    if name not in _gauges:
+        _gauges[name] = metrics.Gauge(name, description=description, tag_keys=tag_keys)
+    return _gauges[name]
+
+def _get_histogram(name: str, description: str) -> metrics.Histogram:
+    if name not in _histograms:
+        _histograms[name] = metrics.Histogram(name, description=description, boundaries=_LATENCY_BOUNDARIES, tag_keys=("node",))
+    return _histograms[name]
+
+def record_cold_start(node_name: str, init_seconds: float, warmup_seconds: float) -> None:
+    """ Record the time taken for a node (replica) to be created and warmed up """
+    gauge = _get_gauge("tinyagents_cold_start_seconds", "The time taken to create and warm up a node replica.")
+    gauge.set(init_seconds, tags={"node": node_name, "phase": "init"})
+    gauge.set(warmup_seconds, tags={"node": node_name, "phase": "warmup"})
+
+def percentile(values: List[float], q: float) -> float:
+    """ Get the q-th percentile (0-100) of a list of values using linear interpolation """
+    if not values:
+        return 0.0
+
+    values = sorted(values)
+    rank = (len(values) - 1) * q / 100
+    lower, upper = math.floor(rank), math.ceil(rank)
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+class NodeStats:
+    """ In-flight counts and service time statistics for a node """
+    node_name: str
+    in_flight: int
+    peak_in_flight: int
+    count: int
+    errors: int
+
+    def __init__(self, node_name: str, window: int = 1024):
+        """
+        Args:
+            node_name (str): The name of the node.
+            window (int): The number of recent calls used for the latency and arrival rate statistics.
+        """
+        self.node_name = node_name
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.count = 0
+        self.errors = 0
+        self._latencies: deque = deque(maxlen=window)
+        self._starts: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+        # the number of calls which have been exported as metrics (see `export_node_metrics`)
+        self._exported = 0
+
+    def start(self) -> float:
+        now = time.perf_counter()
+        with self._lock:
+            self.in_flight += 1
+            if self.in_flight > self.peak_in_flight:
+                self.peak_in_flight = self.in_flight
+            self._starts.append(now)
+        return now
+
+    def finish(self, start: float, error: bool = False) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            self.in_flight -= 1
+            self.count += 1
+            if error:
+                self.errors += 1
+            self._latencies.append(now - start)
+
+    def export(self) -> None:
+        """ Export the in-flight count and the service times recorded since the last export as Ray metrics """
+        with self._lock:
+            # only the service times still within the window can be exported
+            new = min(self.count - self._exported, len(self._latencies))
+            latencies = list(self._latencies)[len(self._latencies) - new:]
+            self._exported = self.count
+            in_flight = self.in_flight
+
+        _get_gauge("tinyagents_node_in_flight", "The number of requests being processed by a node.", ("node",)).set(in_flight, tags={"node": self.node_name})
+        histogram = _get_histogram("tinyagents_node_latency_seconds", "The service time of a node.")
+        for latency in latencies:
+            histogram.observe(latency, tags={"node": self.node_name})
+
+    @property
+    def mean_latency(self) -> float:
+        with self._lock:
+            latencies = list(self._latencies)
+        return sum(latencies) / len(latencies) if latencies else 0.0
+
+    def latency_percentile(self, q: float) -> float:
+        with self._lock:
+            latencies = list(self._latencies)
+        return percentile(latencies, q)
+
+    @property
+    def arrival_rate(self) -> float:
+        """ The average number of requests per second over the most recent calls (within the window) """
+        with self._lock:
+            if len(self._starts) < 2 or self._starts[-1] <= self._starts[0]:
+                return 0.0
+            return (len(self._starts) - 1) / (self._starts[-1] - self._starts[0])
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "node_name": self.node_name,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "count": self.count,
+            "errors": self.errors,
+            "arrival_rate": self.arrival_rate,
+            "mean_latency": self.mean_latency,
+            "p50_latency": self.latency_percentile(50),
+            "p95_latency": self.latency_percentile(95),
+        }
+
+_node_stats: Dict[str, NodeStats] = {}
+_node_stats_lock = threading.Lock()
+
+def get_node_stats(node_name: str) -> NodeStats:
+    """ Get the statistics recorded for a node within this process """
+    stats = _node_stats.get(node_name)
+    if stats is not None:
+        return stats
+
+    with _node_stats_lock:
+        if node_name not in _node_stats:
+            _node_stats[node_name] = NodeStats(node_name)
+        return _node_stats[node_name]
+
+def reset_node_stats() -> None:
+    with _node_stats_lock:
+        _node_stats.clear()
+
+def check_metrics_export_enabled() -> bool:
+    return os.environ.get("TINYAGENTS_EXPORT_METRICS", "false") == "true"
+
+def export_node_metrics() -> None:
+    """ Export the statistics of every node as Ray metrics """
+    with _node_stats_lock:
+        node_stats = list(_node_stats.values())
+    for stats in node_stats:
+        stats.export()
+
+_exporter: Optional[threading.Thread] = None
+_exporter_lock = threading.Lock()
+
+def start_metrics_export(interval: Optional[float] = None) -> None:
+    """
+    Export the node statistics as Ray metrics from a background thread, so that nodes only update in-memory counters when they are called.
+
+    Args:
+        interval (Optional[float]): The number of seconds between exports, by default the `TINYAGENTS_METRICS_INTERVAL` environment variable (or 10 seconds).
+    """
+    global _exporter
+    interval = interval if interval is not None else float(os.environ.get("TINYAGENTS_METRICS_INTERVAL", 10.0))
+
+    def export():
+        while True:
+            time.sleep(interval)
+            export_node_metrics()
+
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = threading.Thread(target=export, name="tinyagents-metrics", daemon=True)
+            _exporter.start()
+
+def track_node_stats(func):
+    """ Decorator for recording the in-flight count and service time of a node """
+    if isasyncgenfunction(func):
+        # a streaming call is in flight until its last chunk has been produced
+        @functools.wraps(func)
+        async def async_gen_wrap(cls, inputs, **kwargs):
+            stats = get_node_stats(cls.name)
+            start = stats.start()
+            error = True
+            try:
+                async for chunk in func(cls, inputs, **kwargs):
+                    yield chunk
+                error = False
+            finally:
+                stats.finish(start, error=error)
+        return async_gen_wrap
+
+    if iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrap(cls, inputs, **kwargs):
+            stats = get_node_stats(cls.name)
+            start = stats.start()
+            error = True
+            try:
+                outputs = await func(cls, inputs, **kwargs)
+                error = False
+                return outputs
+            finally:
+                stats.finish(start, error=error)
+        return async_wrap
+
+    @functools.wraps(func)
+    def wrap(cls, inputs, **kwargs):
+        stats = get_node_stats(cls.name)
+        start = stats.start()
+        error = True
+        try:
+            outputs = func(cls, inputs, **kwargs)
+            error = False
+            return outputs
+        finally:
+            stats.finish(start, error=error)
+    return wrap
@@ -0,0 +1,69 @@
+from typing import Any, Callable, Literal, Optional, Union
+import math
+import random
+import threading
+import time
+
+from tinyagents.decorators import chainable
+
+class MockNodeError(Exception):
+    """ Raised by a mock node to simulate a failure """
+
+def mock_node(
+        name: str,
+        latency: float = 0.1,
+        distribution: Literal["constant", "uniform", "exponential", "lognormal"] = "constant",
+        failure_rate: float = 0.0,
+        output: Union[Any, Callable[[Any], Any], None] = None,
+        kind: Literal["tool", "llm", "retriever", "agent", "other"] = "other",
+        seed: Optional[int] = None
+    ):
+    """
+    Create a node which simulates the latency and failures of a real node (e.g. for load testing offline).
+
+    Args:
+        name (str): The name of the node.
+        latency (float): The mean latency (in seconds).
+        distribution (str): The distribution the latency is sampled from, `uniform` samples between 0 and twice the mean and `lognormal` has a long tail.
+        failure_rate (float): The probability that an invocation raises a `MockNodeError`.
+        output (Union[Any, Callable[[Any], Any], None]): The output of the node, or a function of the inputs. By default the inputs are returned.
+        kind (str): The kind of node.
+        seed (Optional[int]): The seed used for sampling latencies and failures.
+
+    Returns:
+        The mock node.
+    """
+    if distribution not in ["constant", "uniform", "exponential", "lognormal"]:
+        raise ValueError(f"`{distribution}` is not a valid distribution, must be one of ['constant', 'uniform', 'exponential', 'lognormal']")
+
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def sample_latency() -> float:
+        if distribution == "constant":
+            return latency
+        with lock:
+            if distribution == "uniform":
+                return rng.uniform(0, 2 * latency)
+            if distribution == "exponential":
+                return rng.expovariate(1 / latency) if latency > 0 else 0.0
+            # a lognormal distribution with the given mean, sigma=1 gives a long tail (p99 ~ 6x the mean)
+            sigma = 1.0
+            return rng.lognormvariate(math.log(latency) - sigma ** 2 / 2, sigma) if latency > 0 else 0.0
+
+    def should_fail() -> bool:
+        with lock:
+            return rng.random() < failure_rate
+
+    @chainable(node_name=name, kind=kind)
+    class MockNode:
+        def run(self, inputs: Any) -> Any:
+            time.sleep(sample_latency())
+            if should_fail():
+                raise MockNodeError(f"Simulated failure in node `{name}`.")
+
+            if output is None:
+                return inputs
+            return output(inputs) if callable(output) else output
+
+    return MockNode()
@@ -1,5 +1,8 @@
 from tinyagents.nodes.node_meta import NodeMeta
-from tinyagents.nodes.parallel import Parallel
+from tinyagents.nodes.parallel import Parallel, ParallelReduce
+from tinyagents.nodes.race import Race, RaceFailed
 from tinyagents.nodes.conditional_branch import ConditionalBranch
-from tinyagents.nodes.recursive import Recursive
-from tinyagents.nodes.subgraph import SubGraph
\ No newline at end of file
+from tinyagents.nodes.recursive import Recursive, get_loop_history
+from tinyagents.nodes.subgraph import SubGraph
+from tinyagents.nodes.map import Map
+from tinyagents.nodes.process import ProcessNode
\ No newline at end of file
@@ -3,6 +3,7 @@ from typing import Optional, Any, Callable, List, Dict
 from tinyagents.nodes import NodeMeta
 from tinyagents.callbacks import BaseCallback
 from tinyagents.types import NodeOutput
+from tinyagents.utils import ainvoke_node
 
 class ConditionalBranch(NodeMeta):
     """ A node which represents a branch in the graph """
@@ -43,10 +44,7 @@ class ConditionalBranch(NodeMeta):
         route = self._get_route(inputs)
         node = self._get_node(route)
 
-        if hasattr(node.ainvoke, "remote"):
-            output = await node.ainvoke.remote(inputs=inputs, callbacks=callbacks, **kwargs)
-        else:
-            output = await node.ainvoke(inputs=inputs, callbacks=callbacks, **kwargs)
+        output = await ainvoke_node(node, inputs, callbacks=callbacks, **kwargs)
 
         if callbacks: [callback.node_finish(outputs=output, node_name=self.name, run_id=run_id) for callback in callbacks]
 
@@ -0,0 +1,138 @@
+from typing import Optional, List, Any, Iterator, AsyncIterator, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+
+from tinyagents.nodes.node_meta import NodeMeta
+from tinyagents.callbacks import BaseCallback
+from tinyagents.types import NodeOutput
+from tinyagents.utils import get_content, ainvoke_node
+from tinyagents.state import RunState, get_state, bind_state, with_state
+from tinyagents.memory import hold_outputs
+from tinyagents.streaming import DEFAULT_BUFFER_SIZE, acollect
+
+class Map(NodeMeta):
+    """ A node which runs a subnode over every item of a list """
+    name: str
+    node: NodeMeta
+    max_concurrency: Optional[int]
+    chunk_size: int
+    ordered: bool
+
+    def __init__(
+            self,
+            node: NodeMeta,
+            max_concurrency: Optional[int] = None,
+            chunk_size: int = 1,
+            ordered: bool = True,
+            name: Optional[str] = None
+        ):
+        """
+        Args:
+            node (NodeMeta): The node to run over each item.
+            max_concurrency (Optional[int]): The maximum number of chunks processed at once.
+            chunk_size (int): The number of items processed (sequentially) by each task.
+            ordered (bool): Whether outputs are returned in input order, or in the order they complete.
+            name (Optional[str]): The name of the node.
+        """
+        if chunk_size < 1:
+            raise ValueError("`chunk_size` must be at least 1.")
+
+        self.node = node
+        self.max_concurrency = max_concurrency
+        self.chunk_size = chunk_size
+        self.ordered = ordered
+
+        if name == None:
+            self.set_name(f"map_{node.name}")
+        else:
+            self.set_name(name)
+
+    def __repr__(self) -> str:
+        return f"Map({self.node.name})"
+
+    def invoke(self, inputs: Any, callbacks: Optional[List[BaseCallback]] = None, **kwargs) -> List[NodeOutput]:
+        run_id = kwargs.get("run_id")
+        if callbacks: [callback.node_start(inputs=inputs, node_name=self.name, run_id=run_id) for callback in callbacks]
+        outputs = list(self.stream(inputs, callbacks=callbacks, **kwargs))
+        if callbacks: [callback.node_finish(outputs=outputs, node_name=self.name, run_id=run_id) for callback in callbacks]
+        return outputs
+
+    async def ainvoke(self, inputs: Any, callbacks: Optional[List[BaseCallback]] = None, **kwargs) -> List[NodeOutput]:
+        run_id = kwargs.get("run_id")
+        if callbacks: [callback.node_start(inputs=inputs, node_name=self.name, run_id=run_id) for callback in callbacks]
+        outputs = [output async for output in self.astream(inputs, callbacks=callbacks, **kwargs)]
+        if callbacks: [callback.node_finish(outputs=outputs, node_name=self.name, run_id=run_id) for callback in callbacks]
+        return outputs
+
+    async def apipe(self, chunks: AsyncIterator[Any], callbacks: Optional[List[BaseCallback]] = None, buffer_size: int = DEFAULT_BUFFER_SIZE, **kwargs) -> AsyncIterator[Any]:
+        """ Stream the output of each item to the next node as it becomes available """
+        run_id = kwargs.get("run_id")
+        inputs = self.collect_input(await acollect(chunks))
+        if callbacks: [callback.node_start(inputs=inputs, node_name=self.name, run_id=run_id) for callback in callbacks]
+        async for output in self.astream(inputs, callbacks=callbacks, **kwargs):
+            yield get_content(output)
+        if callbacks: [callback.node_finish(outputs=None, node_name=self.name, run_id=run_id) for callback in callbacks]
+
+    def stream(self, inputs: Any, callbacks: Optional[List[BaseCallback]] = None, **kwargs) -> Iterator[NodeOutput]:
+        """ Run the subnode over each item using a thread pool, yielding outputs as they become available (the callbacks receive the events of each item) """
+        state = get_state()
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        try:
+            # each chunk writes to its own snapshot of the run state, which is merged as its outputs are yielded
+            refs = {}
+            held = 0
+            for chunk in self._chunk(inputs):
+                snapshot = state.snapshot() if state is not None else None
+                refs[executor.submit(bind_state(snapshot, self._run_chunk), chunk, callbacks=callbacks, **kwargs)] = snapshot
+
+            for ref in (list(refs) if self.ordered else as_completed(refs)):
+                outputs, snapshot = ref.result(), refs[ref]
+                if state is not None and snapshot is not None: state.merge(snapshot)
+                for output in outputs:
+                    hold_outputs(f"{self.name}[{held}]", output)
+                    held += 1
+                    yield output
+        finally:
+            # avoid running the remaining chunks if the consumer stops early
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    async def astream(self, inputs: Any, callbacks: Optional[List[BaseCallback]] = None, **kwargs) -> AsyncIterator[NodeOutput]:
+        """ Run the subnode over each item asynchronously, yielding outputs as they become available (the callbacks receive the events of each item) """
+        state = get_state()
+        semaphore = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+        tasks = [
+            asyncio.ensure_future(self._with_snapshot(state.snapshot() if state is not None else None, self._arun_chunk(chunk, semaphore, callbacks=callbacks, **kwargs)))
+            for chunk in self._chunk(inputs)
+        ]
+        held = 0
+        try:
+            for task in (tasks if self.ordered else asyncio.as_completed(tasks)):
+                snapshot, outputs = await task
+                if state is not None and snapshot is not None: state.merge(snapshot)
+                for output in outputs:
+                    hold_outputs(f"{self.name}[{held}]", output)
+                    held += 1
+                    yield output
+        finally:
+            # wait for the remaining chunks to stop if the consumer stops early
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    async def _with_snapshot(snapshot: Optional[RunState], coro) -> Tuple[Optional[RunState], List[NodeOutput]]:
+        return snapshot, await with_state(snapshot, coro)
+
+    def _chunk(self, inputs: Any) -> List[list]:
+        items = list(get_content(inputs))
+        return [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+
+    def _run_chunk(self, chunk: list, **kwargs) -> List[NodeOutput]:
+        return [self.node.invoke(inputs=item, **kwargs) for item in chunk]
+
+    async def _arun_chunk(self, chunk: list, semaphore: Optional[asyncio.Semaphore], **kwargs) -> List[NodeOutput]:
+        if semaphore is None:
+            return [await ainvoke_node(self.node, item, **kwargs) for item in chunk]
+
+        async with semaphore:
+            return [await ainvoke_node(self.node, item, **kwargs) for item in chunk]
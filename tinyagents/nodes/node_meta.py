@@ -1,21 +1,46 @@
-from typing import Any, Callable, Optional, Dict, Union, Literal, List
-from inspect import iscoroutinefunction
+from typing import Any, AsyncIterator, Callable, Optional, Dict, Union, Literal, List, Tuple, TYPE_CHECKING
+from inspect import iscoroutinefunction, isasyncgenfunction, isgeneratorfunction, isasyncgen, isgenerator
+from contextlib import contextmanager, asynccontextmanager
+import asyncio
+import threading
+import time
 
 from opentelemetry.sdk.trace import Tracer
 
 from tinyagents.graph import Graph
 from tinyagents.handlers import passthrough
-from tinyagents.utils import get_content
-from tinyagents.types import NodeOutput
+from tinyagents.utils import get_content, get_init_args, run_coroutine
+from tinyagents.types import NodeOutput, EncodedPayload
+from tinyagents.codecs import encode_payload, decode_payload
 from tinyagents.callbacks import BaseCallback
-from tinyagents.tracing import trace_node, create_tracer
+from tinyagents.tracing import trace_node, create_tracer, check_tracing_enabled, trace_cold_start
+from tinyagents.metrics import record_cold_start, track_node_stats, check_metrics_export_enabled, start_metrics_export
+from tinyagents.state import ObjectStoreRunState, use_state
+from tinyagents.resources import Resource, get_registry
+from tinyagents.streaming import DEFAULT_BUFFER_SIZE, collect_chunks, acollect, aclose
+
+if TYPE_CHECKING:
+    from tinyagents.cache import SemanticCache
+
+_END = object()
 
 class NodeMeta:
     name: str
     _kind: Optional[Literal["tool", "llm", "retriever", "agent", "other"]]
     _ray_options: Optional[Dict[str, Any]]
+    _process_options: Optional[Dict[str, Any]] = None
+    _warmup_inputs: Optional[List[Any]] = None
+    _cold_start_timings: Optional[Dict[str, float]] = None
+    _semantic_cache: Optional["SemanticCache"] = None
+    _resources: Optional[List[str]] = None
+    _pool_size: Optional[int] = None
+    _streaming_input: bool = False
+    # the class used to create the instances of a pool (i.e. without the cold start of a Ray replica)
+    _node_cls: Optional[type] = None
     _metadata: Dict[str, Any]
     _tracer: Union[Tracer, None]
+    # set on nodes loaded from a graph spec
+    _init_args: Dict[str, Any]
 
     def __truediv__(self, *args) -> "ConditionalBranch":
         from tinyagents.nodes import ConditionalBranch
@@ -42,33 +67,312 @@ class NodeMeta:
     
     def prepare_input(self, inputs: Any) -> Any:
         return get_content(inputs)
+
+    def collect_input(self, chunks: List[Any]) -> Any:
+        """ Combine the chunks streamed by the previous node, when the node doesn't consume streams """
+        return collect_chunks(chunks)
     
     @trace_node
+    @track_node_stats
     def invoke(self, inputs: Any, callbacks: Optional[List[BaseCallback]] = None, **kwargs) -> Union[NodeOutput, Dict[str, NodeOutput]]:
         run_id = kwargs.get("run_id")
         if callbacks: [callback.node_start(inputs=inputs, node_name=self.name, run_id=run_id) for callback in callbacks]
         inputs = self.prepare_input(inputs)
-        output = self.run(inputs)
-        output = self.output_handler(output)
+        output, cache_key = self._cache_lookup(inputs)
+        if output is None:
+            with self._lease_instance() as node, self._lease_resources(callbacks, run_id) as resources:
+                output = node.run(inputs, **resources)
+            output = self.output_handler(output)
+            self._cache_store(cache_key, output)
         if callbacks: [callback.node_finish(outputs=output, node_name=self.name, run_id=run_id) for callback in callbacks]
         return output
     
     @trace_node
+    @track_node_stats
     async def ainvoke(self, inputs: Any, callbacks: Optional[List[BaseCallback]] = None, **kwargs) -> Union[NodeOutput, Dict[str, NodeOutput]]:
         run_id = kwargs.get("run_id")
+        inputs, content_type, remote_state = self._receive(inputs, kwargs)
+
         if callbacks: [callback.node_start(inputs=inputs, node_name=self.name, run_id=run_id) for callback in callbacks]
-        inputs = await self._async_run(self.prepare_input, inputs)
-        output = await self._async_run(self.run, inputs)
-        output = await self._async_run(self.output_handler, output)
+        with use_state(remote_state):
+            inputs = await self._async_run(self.prepare_input, inputs)
+            output, cache_key = await self._acache_lookup(inputs)
+            if output is None:
+                async with self._alease_instance() as node, self._alease_resources(callbacks, run_id) as resources:
+                    output = await self._async_run(node.run, inputs, **resources)
+                output = await self._async_run(self.output_handler, output)
+                self._cache_store(cache_key, output)
         if callbacks: [callback.node_finish(outputs=output, node_name=self.name, run_id=run_id) for callback in callbacks]
-        return output
+
+        return self._reply(output, content_type, remote_state)
+
+    @staticmethod
+    def _receive(inputs: Any, kwargs: dict) -> Tuple[Any, Optional[str], Optional[ObjectStoreRunState]]:
+        """ Decode the inputs and run state sent by another deployment, returns the inputs, their content type (if they were encoded) and the run state """
+        # inputs from another deployment may have been encoded using a wire codec, the output is encoded in the same way
+        content_type = None
+        if isinstance(inputs, EncodedPayload):
+            content_type = inputs.content_type
+            inputs = decode_payload(inputs)
+
+        # deployments receive references to the run state, and return references to the values they write
+        remote_state = ObjectStoreRunState(refs=kwargs["run_state"]) if kwargs.get("run_state") is not None else None
+        return inputs, content_type, remote_state
+
+    @staticmethod
+    def _reply(output: Any, content_type: Optional[str], remote_state: Optional[ObjectStoreRunState]) -> Any:
+        """ Encode an output in the same way as the inputs, and attach the changes made to the run state """
+        if content_type is None and remote_state is None:
+            return output
+
+        output = output if isinstance(output, NodeOutput) else NodeOutput(content=output)
+        return NodeOutput(
+            content=encode_payload(output.content, content_type) if content_type is not None else output.content, 
+            action=output.action, 
+            ref=output.ref,
+            state=remote_state.changes() if remote_state is not None else None
+        )
     
+    async def apipe(self, chunks: AsyncIterator[Any], callbacks: Optional[List[BaseCallback]] = None, buffer_size: int = DEFAULT_BUFFER_SIZE, **kwargs) -> AsyncIterator[Any]:
+        """ Run the node on the stream of chunks produced by the previous node (see `GraphRunner.astream`), yielding the chunks of its output """
+        streams_output = isasyncgenfunction(self.run) or isgeneratorfunction(self.run)
+        if not self._streaming_input and not streams_output:
+            yield await self.ainvoke(self.collect_input(await acollect(chunks)), callbacks=callbacks, **kwargs)
+            return
+
+        # nodes created using `chainable(streaming_input=True)` receive an async iterator of chunks
+        inputs = (get_content(chunk) async for chunk in chunks) if self._streaming_input else self.collect_input(await acollect(chunks))
+        outputs = self._astream(inputs, callbacks=callbacks, **kwargs)
+        try:
+            async for chunk in outputs:
+                yield chunk
+        finally:
+            # the previous nodes are stopped if this node fails or stops early
+            await aclose(outputs, inputs)
+
+    @trace_node
+    @track_node_stats
+    async def _astream(self, inputs: Any, callbacks: Optional[List[BaseCallback]] = None, **kwargs) -> AsyncIterator[Any]:
+        """ The streaming counterpart of `ainvoke`, for nodes which consume or produce streams """
+        run_id = kwargs.get("run_id")
+        inputs, content_type, remote_state = self._receive(inputs, kwargs)
+        if callbacks: [callback.node_start(inputs=None if self._streaming_input else inputs, node_name=self.name, run_id=run_id) for callback in callbacks]
+
+        output = None
+        with use_state(remote_state):
+            # streamed inputs are only known once they have been consumed, so they aren't cached
+            cache_key = None
+            if not self._streaming_input:
+                inputs = await self._async_run(self.prepare_input, inputs)
+                output, cache_key = await self._acache_lookup(inputs)
+
+            if output is not None:
+                yield self._reply(output, content_type, remote_state)
+            else:
+                async with self._alease_instance() as node, self._alease_resources(callbacks, run_id) as resources:
+                    outputs = node.run(inputs, **resources)
+                    if not isasyncgen(outputs) and not isgenerator(outputs):
+                        # nodes which consume a stream may return a single output
+                        output = await self._async_run(self.output_handler, await outputs)
+                        yield self._reply(output, content_type, remote_state)
+                    else:
+                        recorded: Optional[List[Any]] = [] if cache_key is not None else None
+                        chunks = self._run_stream(outputs, recorded)
+                        replies = self._reply_chunks(chunks, content_type, remote_state) if content_type is not None or remote_state is not None else chunks
+                        try:
+                            async for chunk in replies:
+                                yield chunk
+                        finally:
+                            await aclose(replies, chunks)
+
+                        if recorded is not None:
+                            self._cache_store(cache_key, passthrough(get_content(collect_chunks(recorded))))
+
+        # the output of a streaming node isn't collected
+        if callbacks: [callback.node_finish(outputs=output, node_name=self.name, run_id=run_id) for callback in callbacks]
+
     @staticmethod
-    async def _async_run(func: Callable, inputs: Any) -> Any:
+    async def _run_stream(outputs: Any, recorded: Optional[list] = None) -> AsyncIterator[Any]:
+        """ Yield the chunks of a generator returned by `run`, recording them for the semantic cache if `recorded` is given """
+        try:
+            if isasyncgen(outputs):
+                async for chunk in outputs:
+                    if recorded is not None:
+                        recorded.append(chunk)
+                    yield chunk
+            else:
+                # synchronous generators run in a thread, so they don't block the other nodes of the pipeline
+                while (chunk := await asyncio.to_thread(next, outputs, _END)) is not _END:
+                    if recorded is not None:
+                        recorded.append(chunk)
+                    yield chunk
+        finally:
+            if isasyncgen(outputs):
+                await outputs.aclose()
+            else:
+                await asyncio.to_thread(outputs.close)
+
+    async def _reply_chunks(self, chunks: AsyncIterator[Any], content_type: Optional[str], remote_state: Optional[ObjectStoreRunState]) -> AsyncIterator[Any]:
+        """ Encode each chunk, the changes to the run state are attached to the last chunk once the node has finished """
+        previous = _END
+        async for chunk in chunks:
+            if previous is not _END:
+                yield self._reply(previous, content_type, None)
+            previous = chunk
+        if previous is not _END:
+            yield self._reply(previous, content_type, remote_state)
+
+    def _cache_lookup(self, inputs: Any) -> Tuple[Optional[NodeOutput], Any]:
+        """ Look up the inputs in the semantic cache (if enabled), returns the cached output and the key for storing the output """
+        if self._semantic_cache is None:
+            return None, None
+        
+        key = self._semantic_cache.create_key(inputs)
+        return self._semantic_cache.get(key), key
+
+    async def _acache_lookup(self, inputs: Any) -> Tuple[Optional[NodeOutput], Any]:
+        if self._semantic_cache is None:
+            return None, None
+
+        key = await self._semantic_cache.acreate_key(inputs)
+        return self._semantic_cache.get(key), key
+    
+    def _cache_store(self, key: Any, output: Any) -> None:
+        if self._semantic_cache is not None and key is not None and isinstance(output, NodeOutput):
+            self._semantic_cache.put(key, output)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # each process creates its own pool of instances
+        state = self.__dict__.copy()
+        state.pop("_instance_pool", None)
+        state.pop("_instance_pool_lock", None)
+        return state
+
+    def _get_instance_pool(self, warmup: bool = False) -> Resource:
+        """ Get the pool of instances used by `run` (creating every instance on first use) when the node was created using `chainable(pool_size=...)` """
+        pool = self.__dict__.get("_instance_pool")
+        if pool is not None:
+            return pool
+
+        # each node has its own lock, so creating (and warming up) the instances of one node doesn't hold up the others
+        with self.__dict__.setdefault("_instance_pool_lock", threading.Lock()):
+            pool = self.__dict__.get("_instance_pool")
+            if pool is None:
+                # the node is the first instance of the pool, the rest are created using its constructor arguments
+                instances = [self]
+                node_cls, init_args = self._node_cls or type(self), get_init_args(self)
+
+                def setup():
+                    if instances:
+                        return instances.pop()
+                    instance = node_cls(**init_args)
+                    if warmup:
+                        instance.warmup()
+                    return instance
+
+                pool = Resource(self.name, setup=setup, pool_size=self._pool_size)
+                pool.start()
+                self._instance_pool = pool
+        return pool
+
+    @contextmanager
+    def _lease_instance(self):
+        if not self._pool_size:
+            yield self
+            return
+
+        with self._get_instance_pool().lease() as instance:
+            yield instance
+
+    @asynccontextmanager
+    async def _alease_instance(self):
+        if not self._pool_size:
+            yield self
+            return
+
+        async with self._get_instance_pool().alease() as instance:
+            yield instance
+
+    @contextmanager
+    def _lease_resources(self, callbacks: Optional[List[BaseCallback]] = None, run_id: Optional[str] = None):
+        """ Lease the resources used by the node, which are passed to `run` as keyword arguments """
+        if not self._resources:
+            yield {}
+            return
+
+        registry = get_registry()
+        with registry.lease(self._resources) as resources:
+            yield resources
+        self._report_resources(registry, callbacks, run_id)
+
+    @asynccontextmanager
+    async def _alease_resources(self, callbacks: Optional[List[BaseCallback]] = None, run_id: Optional[str] = None):
+        if not self._resources:
+            yield {}
+            return
+
+        registry = get_registry()
+        async with registry.alease(self._resources) as resources:
+            yield resources
+        self._report_resources(registry, callbacks, run_id)
+
+    def _report_resources(self, registry, callbacks: Optional[List[BaseCallback]], run_id: Optional[str]) -> None:
+        if callbacks and self._resources:
+            for resource_name in self._resources:
+                stats = registry.get(resource_name).stats()
+                [callback.resource_usage(resource_name=resource_name, stats=stats, node_name=self.name, run_id=run_id) for callback in callbacks]
+
+    @staticmethod
+    async def _async_run(func: Callable, inputs: Any, **kwargs) -> Any:
         if iscoroutinefunction(func):
-            return await func(inputs)
-        return func(inputs)
+            return await func(inputs, **kwargs)
+        return func(inputs, **kwargs)
     
+    def warmup(self) -> None:
+        """ Run the node using its sample inputs (e.g. to load models, create clients or trigger JIT compilation) """
+        # resources are created up front, so the first request doesn't wait for them
+        if self._resources:
+            get_registry().setup(self._resources)
+
+        for inputs in self._warmup_inputs or []:
+            inputs = self.prepare_input(inputs)
+            with self._lease_resources() as resources:
+                output = self._run_to_completion(self.run, inputs, **resources)
+            self.output_handler(output)
+
+    @staticmethod
+    def _run_to_completion(func: Callable, inputs: Any, **kwargs) -> Any:
+        """ Run a function synchronously, awaiting coroutines and collecting the chunks of generators """
+        if not iscoroutinefunction(func) and not isasyncgenfunction(func):
+            output = func(inputs, **kwargs)
+            return collect_chunks(list(output)) if isgenerator(output) else output
+
+        async def run():
+            if isasyncgenfunction(func):
+                return collect_chunks(await acollect(func(inputs, **kwargs)))
+            return await func(inputs, **kwargs)
+
+        # nodes may be created by an async function, i.e. within a running event loop
+        return run_coroutine(run())
+
+    def _cold_start(self, start_time: int, init_seconds: float) -> None:
+        """ Warm up a newly created replica and report how long it took to become ready """
+        start = time.perf_counter()
+        self.warmup()
+        # the instances of a pool are created (and warmed up) before the replica receives traffic
+        if self._pool_size:
+            self._get_instance_pool(warmup=True)
+        self._cold_start_timings = {"init_seconds": init_seconds, "warmup_seconds": time.perf_counter() - start}
+
+        record_cold_start(self.name, **self._cold_start_timings)
+        if check_metrics_export_enabled():
+            start_metrics_export()
+        if check_tracing_enabled():
+            if getattr(self, "_tracer", None) is None:
+                self._init_tracer()
+            if self._tracer is not None:
+                trace_cold_start(self._tracer, self.name, start_time, self._cold_start_timings)
+
     def as_graph(self) -> Graph:
         graph = Graph()
         graph.next(self)
@@ -78,4 +382,7 @@ class NodeMeta:
         self._tracer = create_tracer()
 
     def _get_meta(self):
-        return self._metadata
\ No newline at end of file
+        return self._metadata
+
+    def _get_cold_start(self) -> Optional[Dict[str, float]]:
+        return self._cold_start_timings
\ No newline at end of file
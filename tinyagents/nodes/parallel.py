@@ -1,10 +1,16 @@
-from typing import Optional, Dict, List, Any
-from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Any, Callable, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import partial
+import asyncio
+import copy
 
 from tinyagents.types import NodeOutput
 from tinyagents.callbacks import BaseCallback
 from tinyagents.nodes.node_meta import NodeMeta
+from tinyagents.handlers import passthrough
+from tinyagents.utils import get_content, ainvoke_node
+from tinyagents.state import RunState, get_state, bind_state, with_state
+from tinyagents.memory import hold_outputs
 
 class Parallel(NodeMeta):
     """ A node which parallelises a set of subnodes """
@@ -33,40 +39,181 @@ class Parallel(NodeMeta):
         self.nodes[other_node.name] = other_node
         return self
     
-    def invoke(self, inputs: Any, callbacks: Optional[List[BaseCallback]] = None, **kwargs) -> Dict[str, NodeOutput]:
+    def invoke(self, inputs: Any, callbacks: Optional[List[BaseCallback]] = None, **kwargs) -> Union[NodeOutput, Dict[str, NodeOutput]]:
         run_id = kwargs.get("run_id")
+        snapshots = self._snapshot_state()
         refs = {}
         outputs = {}
         with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
             for name, node in self.nodes.items():
                 if callbacks: [callback.node_start(inputs=inputs, node_name=name, run_id=run_id) for callback in callbacks]
-                refs[name] = executor.submit(partial(node.invoke, inputs=inputs, **kwargs))
+                refs[name] = executor.submit(bind_state(snapshots.get(name), partial(node.invoke, inputs=inputs, **kwargs)))
 
-            for node_name in refs:
-                output = refs[node_name].result()
+            for node_name, ref in refs.items():
+                output = ref.result()
                 if callbacks: [callback.node_finish(outputs=output, node_name=node_name, run_id=run_id) for callback in callbacks]
                 outputs[node_name] = output
+                hold_outputs(f"{self.name}.{node_name}", output)
 
+        self._merge_state(snapshots)
         return outputs
     
-    async def ainvoke(self, inputs, callbacks: Optional[List[BaseCallback]] = None, **kwargs) -> Dict[str, NodeOutput]:
+    async def ainvoke(self, inputs, callbacks: Optional[List[BaseCallback]] = None, **kwargs) -> Union[NodeOutput, Dict[str, NodeOutput]]:
         run_id = kwargs.get("run_id")
+        snapshots = self._snapshot_state()
         refs = {}
         outputs = {}
         for name, node in self.nodes.items():
             if callbacks: [callback.node_start(inputs=inputs, node_name=name, run_id=run_id) for callback in callbacks]
 
-            if hasattr(node, "remote"):
-                refs[name] = node.invoke.remote(inputs=inputs, callbacks=callbacks, **kwargs)
-            else:
-                refs[name] = node.ainvoke(inputs=inputs, callbacks=callbacks, **kwargs)
+            refs[name] = asyncio.ensure_future(with_state(snapshots.get(name), ainvoke_node(node, inputs, callbacks=callbacks, **kwargs)))
 
-        for node_name in refs:
-            output = await refs[node_name]
+        for node_name, ref in refs.items():
+            output = await ref
             if callbacks: [callback.node_finish(outputs=output, node_name=node_name, run_id=run_id) for callback in callbacks]
             outputs[node_name] = output
+            hold_outputs(f"{self.name}.{node_name}", output)
 
+        self._merge_state(snapshots)
         return outputs
+
+    def _snapshot_state(self) -> Dict[str, RunState]:
+        """ Give each subnode a copy-on-write snapshot of the run state, so subnodes don't see each other's writes """
+        state = get_state()
+        if state is None:
+            return {}
+        return {name: state.snapshot() for name in self.nodes}
+
+    def _merge_state(self, snapshots: Dict[str, RunState], names: Optional[List[str]] = None) -> None:
+        """ Merge the snapshots in the order the subnodes were added (rather than the order they finished), so the result is deterministic """
+        state = get_state()
+        if state is None:
+            return
+        state.merge(*[snapshot for name, snapshot in snapshots.items() if names is None or name in names])
     
     def set_max_workers(self, max_workers: int) -> None:
-        self.max_workers = max_workers
\ No newline at end of file
+        self.num_workers = max_workers
+
+    def reduce(
+            self, 
+            reducer: Callable[[Any, str, Any], Any], 
+            initial: Any = None, 
+            until: Optional[Callable[[Any], bool]] = None
+        ) -> "ParallelReduce":
+        """ Create a `ParallelReduce` node from the subnodes of this node """
+        return ParallelReduce(nodes=dict(self.nodes), reducer=reducer, initial=initial, until=until, num_workers=self.num_workers)
+
+class ParallelReduce(Parallel):
+    """
+    A node which parallelises a set of subnodes and folds their outputs together in the order they complete.
+
+    When invoked synchronously, subnodes which are still running once `until` is satisfied can't be interrupted: they finish in the background and their outputs are discarded.
+    """
+    name: str
+    nodes: dict
+    num_workers: int
+    reducer: Callable[[Any, str, Any], Any]
+    initial: Any
+    until: Optional[Callable[[Any], bool]]
+
+    def __init__(
+            self, 
+            *args, 
+            reducer: Callable[[Any, str, Any], Any], 
+            initial: Any = None, 
+            until: Optional[Callable[[Any], bool]] = None, 
+            nodes: Optional[dict] = None, 
+            name: Optional[str] = None, 
+            num_workers: Optional[int] = None
+        ):
+        """
+        Args:
+            reducer (Callable[[Any, str, Any], Any]): Given the accumulated value, the name of a subnode and its output, returns the new accumulated value.
+            initial (Any): The initial accumulated value (copied for each invocation).
+            until (Optional[Callable[[Any], bool]]): Given the accumulated value, returns True once no further outputs are needed.
+        """
+        super().__init__(*args, nodes=nodes, name=name, num_workers=num_workers)
+        self.reducer = reducer
+        self.initial = initial
+        self.until = until
+
+        if name == None:
+            self.set_name("parallel_reduce_" + "_".join(self.nodes.keys()))
+
+    def __repr__(self) -> str:
+        nodes_str = " ∧ ".join(list(self.nodes.keys()))
+        return f"ParallelReduce({nodes_str})"
+
+    def invoke(self, inputs: Any, callbacks: Optional[List[BaseCallback]] = None, **kwargs) -> NodeOutput:
+        run_id = kwargs.get("run_id")
+        accumulated = copy.deepcopy(self.initial)
+        snapshots = self._snapshot_state()
+        reduced: List[str] = []
+        started: List[str] = []
+        executor = ThreadPoolExecutor(max_workers=self.num_workers)
+        try:
+            refs = {}
+            for name, node in self.nodes.items():
+                if callbacks: [callback.node_start(inputs=inputs, node_name=name, run_id=run_id) for callback in callbacks]
+                started.append(name)
+                refs[executor.submit(bind_state(snapshots.get(name), partial(node.invoke, inputs=inputs, **kwargs)))] = name
+
+            for ref in as_completed(refs):
+                node_name = refs.pop(ref)
+                output = ref.result()
+                reduced.append(node_name)
+                if callbacks: [callback.node_finish(outputs=output, node_name=node_name, run_id=run_id) for callback in callbacks]
+
+                accumulated = self.reducer(accumulated, node_name, get_content(output))
+                hold_outputs(self.name, accumulated)
+                if self.until and self.until(accumulated):
+                    break
+        finally:
+            # don't wait for the remaining subnodes if the reducer has all it needs, running subnodes finish in the background
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._cancel_unreduced(started, reduced, callbacks, run_id)
+
+        # only the subnodes whose outputs were used update the run state
+        self._merge_state(snapshots, reduced)
+        return passthrough(accumulated)
+
+    async def ainvoke(self, inputs: Any, callbacks: Optional[List[BaseCallback]] = None, **kwargs) -> NodeOutput:
+        run_id = kwargs.get("run_id")
+        accumulated = copy.deepcopy(self.initial)
+        snapshots = self._snapshot_state()
+        reduced: List[str] = []
+        tasks = []
+        for name, node in self.nodes.items():
+            if callbacks: [callback.node_start(inputs=inputs, node_name=name, run_id=run_id) for callback in callbacks]
+            # as in `invoke`, this node reports the events of its subnodes, so every subnode which starts also finishes (or is cancelled)
+            tasks.append(asyncio.ensure_future(with_state(snapshots.get(name), self._ainvoke_named(name, node, inputs, **kwargs))))
+
+        try:
+            for task in asyncio.as_completed(tasks):
+                node_name, output = await task
+                reduced.append(node_name)
+                if callbacks: [callback.node_finish(outputs=output, node_name=node_name, run_id=run_id) for callback in callbacks]
+
+                accumulated = self.reducer(accumulated, node_name, get_content(output))
+                hold_outputs(self.name, accumulated)
+                if self.until and self.until(accumulated):
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._cancel_unreduced(list(self.nodes), reduced, callbacks, run_id)
+
+        self._merge_state(snapshots, reduced)
+        return passthrough(accumulated)
+
+    @staticmethod
+    def _cancel_unreduced(started: List[str], reduced: List[str], callbacks: Optional[List[BaseCallback]], run_id: Optional[str]) -> None:
+        """ Tell the callbacks about the subnodes whose outputs weren't needed (or which failed) """
+        for name in started:
+            if name not in reduced:
+                if callbacks: [callback.node_cancel(node_name=name, run_id=run_id) for callback in callbacks]
+
+    @staticmethod
+    async def _ainvoke_named(name: str, node: NodeMeta, inputs: Any, **kwargs) -> Tuple[str, Any]:
+        return name, await ainvoke_node(node, inputs, **kwargs)
\ No newline at end of file
@@ -0,0 +1,191 @@
+from typing import Optional, List, Any, Tuple, Union, Literal
+from concurrent.futures import ProcessPoolExecutor, Future
+from multiprocessing import get_context, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from inspect import iscoroutinefunction, isgeneratorfunction, isasyncgenfunction
+import asyncio
+import os
+import threading
+
+from ray import cloudpickle
+
+from tinyagents.nodes.node_meta import NodeMeta
+from tinyagents.callbacks import BaseCallback
+from tinyagents.types import NodeOutput
+from tinyagents.tracing import trace_node
+from tinyagents.metrics import track_node_stats
+from tinyagents.utils import get_content, get_init_args
+
+Payload = Union[Tuple[Literal["bytes"], bytes], Tuple[Literal["shm"], str, int]]
+
+# the node instance owned by a worker process (created once by `_init_worker`)
+_worker_node: Optional[NodeMeta] = None
+
+def _dump(obj: Any, shared_memory_threshold: int) -> Payload:
+    """ Serialise an object, copying it into shared memory (rather than the pipe of the pool) if it is larger than the threshold """
+    # the block is unlinked once it has been loaded, so buffers aren't passed out-of-band (the loaded object would still reference the block)
+    data = cloudpickle.dumps(obj, protocol=5)
+    if len(data) < shared_memory_threshold:
+        return ("bytes", data)
+
+    shm = SharedMemory(create=True, size=len(data))
+    _buffer(shm)[:len(data)] = data
+    # ownership passes to the receiving process, which unlinks the block once it has been read
+    _untrack(shm.name)
+    shm.close()
+    return ("shm", shm.name, len(data))
+
+def _buffer(shm: SharedMemory) -> memoryview:
+    """ Get the buffer of an open shared memory block """
+    buf = shm.buf
+    if buf is None:
+        raise ValueError(f"The shared memory block `{shm.name}` has been closed.")
+    return buf
+
+def _untrack(name: str) -> None:
+    """ Stop the resource tracker of this process from unlinking a block when the process exits """
+    # the tracker only runs on POSIX, where blocks are registered using their name with a leading slash
+    if os.name == "posix":
+        resource_tracker.unregister("/" + name, "shared_memory")
+
+def _load(payload: Payload) -> Any:
+    """ Deserialise an object created by `_dump`, releasing any shared memory """
+    if payload[0] == "bytes":
+        return cloudpickle.loads(payload[1])
+
+    _, name, size = payload
+    shm = SharedMemory(name=name)
+    try:
+        return cloudpickle.loads(_buffer(shm)[:size])
+    finally:
+        shm.close()
+        shm.unlink()
+
+def _release(payload: Payload) -> None:
+    """ Unlink the shared memory of a payload which won't be loaded (e.g. the call failed or was cancelled) """
+    if payload[0] != "shm":
+        return
+    try:
+        shm = SharedMemory(name=payload[1])
+    except FileNotFoundError:
+        # the payload has already been loaded
+        return
+    shm.close()
+    shm.unlink()
+
+def _release_inputs(payload: Payload):
+    def release(future: Future) -> None:
+        # a worker which failed may not have loaded its inputs
+        if future.cancelled() or future.exception() is not None:
+            _release(payload)
+    return release
+
+def _release_output(future: Future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        _release(future.result())
+
+def _init_worker(node_factory: bytes) -> None:
+    global _worker_node
+    node_cls, args = cloudpickle.loads(node_factory)
+    _worker_node = node_cls(**args)
+
+def _call_worker(payload: Payload, shared_memory_threshold: int) -> Payload:
+    node = _worker_node
+    if node is None:
+        raise RuntimeError("The worker process hasn't created its node.")
+
+    # the node prepares the inputs, leases an instance from its pool and handles the output, as it does in the parent process
+    inputs = _load(payload)
+    if iscoroutinefunction(node.run):
+        output = asyncio.run(node.ainvoke(inputs))
+    else:
+        output = node.invoke(inputs)
+    return _dump(output, shared_memory_threshold)
+
+class ProcessNode(NodeMeta):
+    """ A node which runs another node within a pool of worker processes """
+    name: str
+    node: NodeMeta
+    num_workers: Optional[int]
+    shared_memory_threshold: int
+    start_method: str
+
+    def __init__(self, node: NodeMeta):
+        """
+        Args:
+            node (NodeMeta): The node to run, configured using its `process_options`.
+        """
+        if node._resources:
+            raise ValueError(f"The node `{node.name}` uses resources, which are set up in the process running the graph and can't be used by worker processes.")
+        if isgeneratorfunction(node.run) or isasyncgenfunction(node.run):
+            raise ValueError(f"The node `{node.name}` streams its output, which can't be sent from a worker process.")
+
+        options = node._process_options or {}
+        self.node = node
+        self.name = node.name
+        self.num_workers = options.get("num_workers")
+        self.shared_memory_threshold = options.get("shared_memory_threshold", 1024 * 1024)
+        self.start_method = options.get("start_method", "spawn")
+        self._kind = node._kind
+        self._metadata = node._metadata
+        self._tracer = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return repr(self.node)
+
+    @trace_node
+    @track_node_stats
+    def invoke(self, inputs: Any, callbacks: Optional[List[BaseCallback]] = None, **kwargs) -> NodeOutput:
+        run_id = kwargs.get("run_id")
+        if callbacks: [callback.node_start(inputs=inputs, node_name=self.name, run_id=run_id) for callback in callbacks]
+        output = _load(self._submit(inputs).result())
+        if callbacks: [callback.node_finish(outputs=output, node_name=self.name, run_id=run_id) for callback in callbacks]
+        return output
+
+    @trace_node
+    @track_node_stats
+    async def ainvoke(self, inputs: Any, callbacks: Optional[List[BaseCallback]] = None, **kwargs) -> NodeOutput:
+        run_id = kwargs.get("run_id")
+        if callbacks: [callback.node_start(inputs=inputs, node_name=self.name, run_id=run_id) for callback in callbacks]
+        future = self._submit(inputs)
+        try:
+            payload = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # the call may still finish, its output is released as nobody will load it
+            future.add_done_callback(_release_output)
+            raise
+        output = _load(payload)
+        if callbacks: [callback.node_finish(outputs=output, node_name=self.name, run_id=run_id) for callback in callbacks]
+        return output
+
+    def shutdown(self) -> None:
+        """ Stop the worker processes """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def _submit(self, inputs: Any) -> Future:
+        payload = _dump(get_content(inputs), self.shared_memory_threshold)
+        try:
+            future = self._get_executor().submit(_call_worker, payload, self.shared_memory_threshold)
+        except Exception:
+            _release(payload)
+            raise
+        future.add_done_callback(_release_inputs(payload))
+        return future
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """ Create the worker pool on first use, each worker creates its own instance of the node """
+        with self._lock:
+            if self._executor is None:
+                node_factory = cloudpickle.dumps((type(self.node), get_init_args(self.node)))
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.num_workers or os.cpu_count(),
+                    mp_context=get_context(self.start_method),
+                    initializer=_init_worker,
+                    initargs=(node_factory,)
+                )
+            return self._executor
@@ -0,0 +1,262 @@
+from typing import Optional, Dict, List, Any, Callable, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, asdict
+from functools import partial
+import asyncio
+import threading
+import time
+
+from tinyagents.types import NodeOutput
+from tinyagents.callbacks import BaseCallback
+from tinyagents.nodes.node_meta import NodeMeta
+from tinyagents.nodes.parallel import Parallel
+from tinyagents.utils import get_content, ainvoke_node
+from tinyagents.state import RunState, bind_state, with_state
+
+class RaceFailed(Exception):
+    """ Raised when fewer subnodes than the quorum return an acceptable output """
+
+@dataclass
+class RaceStats:
+    """ The statistics recorded for a subnode of a `Race` """
+    races: int = 0
+    wins: int = 0
+    rejected: int = 0
+    errors: int = 0
+    # exponentially weighted averages, so that the statistics follow recent behaviour
+    win_rate: float = 0.0
+    latency: Optional[float] = None
+
+class Race(Parallel):
+    """
+    A node which runs interchangeable subnodes at once and returns the first acceptable output, cancelling the rest.
+
+    When invoked synchronously, subnodes which are already running can't be interrupted: they finish in the background and their outputs are discarded.
+    """
+    name: str
+    nodes: dict
+    num_workers: int
+    validator: Optional[Callable[[Any], bool]]
+    quorum: int
+    skip_below: Optional[float]
+    min_samples: int
+    probe_interval: int
+
+    def __init__(
+            self,
+            *args,
+            validator: Optional[Callable[[Any], bool]] = None,
+            quorum: int = 1,
+            skip_below: Optional[float] = None,
+            min_samples: int = 20,
+            probe_interval: int = 10,
+            nodes: Optional[dict] = None,
+            name: Optional[str] = None,
+            num_workers: Optional[int] = None
+        ):
+        """
+        Args:
+            validator (Optional[Callable[[Any], bool]]): Given the output of a subnode, returns True if it is acceptable.
+            quorum (int): The number of acceptable outputs to wait for. With a quorum of 1 the winning output is returned, otherwise a dictionary of the first `quorum` outputs is returned.
+            skip_below (Optional[float]): Skip subnodes whose (recent) win rate is below this, once they have been raced `min_samples` times.
+            min_samples (int): The number of races a subnode must take part in before it can be skipped.
+            probe_interval (int): Skipped subnodes still take part in every `probe_interval` races, so that they are used again if they become faster.
+        """
+        super().__init__(*args, nodes=nodes, name=name, num_workers=num_workers)
+        if not 1 <= quorum <= len(self.nodes):
+            raise ValueError(f"`quorum` must be between 1 and the number of subnodes ({len(self.nodes)}).")
+
+        self.validator = validator
+        self.quorum = quorum
+        self.skip_below = skip_below
+        self.min_samples = min_samples
+        self.probe_interval = probe_interval
+        self._reset_stats()
+
+        if name == None:
+            self.set_name("race_" + "_".join(self.nodes.keys()))
+
+    def __repr__(self) -> str:
+        nodes_str = " ∨ ".join(list(self.nodes.keys()))
+        return f"Race({nodes_str})"
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # the statistics belong to the process that recorded them (e.g. a Ray replica)
+        state = self.__dict__.copy()
+        for key in ["_stats", "_races", "_lock"]:
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._reset_stats()
+
+    def _reset_stats(self) -> None:
+        self._stats: Dict[str, RaceStats] = {}
+        self._races = 0
+        self._lock = threading.Lock()
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """ Get the win and latency statistics recorded for each subnode """
+        with self._lock:
+            return {name: asdict(stats) for name, stats in self._stats.items()}
+
+    def invoke(self, inputs: Any, callbacks: Optional[List[BaseCallback]] = None, **kwargs) -> Union[NodeOutput, Dict[str, NodeOutput]]:
+        run_id = kwargs.get("run_id")
+        racers = self._select_racers()
+        snapshots = self._snapshot_state()
+        accepted: Dict[str, NodeOutput] = {}
+        finished: List[str] = []
+        errors: List[BaseException] = []
+        started: List[str] = []
+        executor = ThreadPoolExecutor(max_workers=self.num_workers or len(racers))
+        start = time.perf_counter()
+        try:
+            refs = {}
+            for name in racers:
+                if callbacks: [callback.node_start(inputs=inputs, node_name=name, run_id=run_id) for callback in callbacks]
+                started.append(name)
+                refs[executor.submit(bind_state(snapshots.get(name), partial(self.nodes[name].invoke, inputs=inputs, **kwargs)))] = name
+
+            for ref in as_completed(refs):
+                node_name = refs.pop(ref)
+                error = ref.exception()
+                output = ref.result() if error is None else None
+                if self._collect(node_name, output, error, start, finished, accepted, errors, callbacks, run_id):
+                    break
+        finally:
+            # running subnodes can't be interrupted, so they finish in the background (holding a thread each) and their outputs are discarded
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._cancel_unfinished(started, finished, callbacks, run_id)
+
+        return self._finish(racers, snapshots, finished, accepted, errors)
+
+    async def ainvoke(self, inputs: Any, callbacks: Optional[List[BaseCallback]] = None, **kwargs) -> Union[NodeOutput, Dict[str, NodeOutput]]:
+        run_id = kwargs.get("run_id")
+        racers = self._select_racers()
+        snapshots = self._snapshot_state()
+        accepted: Dict[str, NodeOutput] = {}
+        finished: List[str] = []
+        errors: List[BaseException] = []
+        start = time.perf_counter()
+        tasks = []
+        for name in racers:
+            if callbacks: [callback.node_start(inputs=inputs, node_name=name, run_id=run_id) for callback in callbacks]
+            # as in `invoke`, the race reports the events of its subnodes, so every racer which starts also finishes (or is cancelled)
+            tasks.append(asyncio.ensure_future(with_state(snapshots.get(name), self._ainvoke_named(name, self.nodes[name], inputs, **kwargs))))
+
+        try:
+            for task in asyncio.as_completed(tasks):
+                node_name, output, error = await task
+                if self._collect(node_name, output, error, start, finished, accepted, errors, callbacks, run_id):
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._cancel_unfinished(racers, finished, callbacks, run_id)
+
+        return self._finish(racers, snapshots, finished, accepted, errors)
+
+    @staticmethod
+    async def _ainvoke_named(name: str, node: NodeMeta, inputs: Any, **kwargs) -> Tuple[str, Any, Optional[Exception]]:
+        try:
+            return name, await ainvoke_node(node, inputs, **kwargs), None
+        except Exception as e:
+            return name, None, e
+
+    def _collect(
+            self,
+            node_name: str,
+            output: Any,
+            error: Optional[BaseException],
+            start: float,
+            finished: List[str],
+            accepted: Dict[str, NodeOutput],
+            errors: List[BaseException],
+            callbacks: Optional[List[BaseCallback]],
+            run_id: Optional[str]
+        ) -> bool:
+        """ Record the result of a subnode, returning True once the quorum has been reached """
+        latency = time.perf_counter() - start
+        finished.append(node_name)
+        if error is not None:
+            errors.append(error)
+            self._record(node_name, error=True)
+            if callbacks: [callback.node_cancel(node_name=node_name, run_id=run_id) for callback in callbacks]
+            return False
+
+        if callbacks: [callback.node_finish(outputs=output, node_name=node_name, run_id=run_id) for callback in callbacks]
+
+        if self.validator is not None and not self.validator(get_content(output)):
+            self._record(node_name, latency=latency, rejected=True)
+            return False
+
+        accepted[node_name] = output
+        self._record(node_name, latency=latency, won=True)
+        return len(accepted) >= self.quorum
+
+    @staticmethod
+    def _cancel_unfinished(started: List[str], finished: List[str], callbacks: Optional[List[BaseCallback]], run_id: Optional[str]) -> None:
+        """ Tell the callbacks about the subnodes which were started but lost the race """
+        for name in started:
+            if name not in finished:
+                if callbacks: [callback.node_cancel(node_name=name, run_id=run_id) for callback in callbacks]
+
+    def _finish(
+            self,
+            racers: List[str],
+            snapshots: Dict[str, RunState],
+            finished: List[str],
+            accepted: Dict[str, NodeOutput],
+            errors: List[BaseException]
+        ) -> Union[NodeOutput, Dict[str, NodeOutput]]:
+        # subnodes that were cancelled lost the race
+        for name in racers:
+            if name not in finished:
+                self._record(name)
+
+        if len(accepted) < self.quorum:
+            raise RaceFailed(
+                f"Only {len(accepted)} of the {self.quorum} outputs required by `{self.name}` were acceptable ({len(errors)} subnodes raised an exception)."
+            ) from (errors[-1] if errors else None)
+
+        # only the accepted outputs update the run state
+        self._merge_state(snapshots, list(accepted))
+
+        if self.quorum == 1:
+            return next(iter(accepted.values()))
+        return accepted
+
+    def _record(self, node_name: str, latency: Optional[float] = None, won: bool = False, rejected: bool = False, error: bool = False, alpha: float = 0.1) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(node_name, RaceStats())
+            stats.races += 1
+            stats.wins += int(won)
+            stats.rejected += int(rejected)
+            stats.errors += int(error)
+            stats.win_rate = (1 - alpha) * stats.win_rate + alpha * float(won) if stats.races > 1 else float(won)
+            if latency is not None:
+                stats.latency = latency if stats.latency is None else (1 - alpha) * stats.latency + alpha * latency
+
+    def _select_racers(self) -> List[str]:
+        """ Select the subnodes that take part in the next race, skipping subnodes that rarely win """
+        names = list(self.nodes)
+        with self._lock:
+            self._races += 1
+            if self.skip_below is None or self._races % self.probe_interval == 0:
+                return names
+
+            is_slow = lambda name: (
+                name in self._stats
+                and self._stats[name].races >= self.min_samples
+                and self._stats[name].win_rate < self.skip_below
+            )
+            racers = [name for name in names if not is_slow(name)]
+
+            # always race enough subnodes to reach the quorum, preferring those which win most often
+            if len(racers) < self.quorum:
+                ranked = sorted(names, key=lambda name: self._stats[name].win_rate if name in self._stats else 1.0, reverse=True)
+                racers = [name for name in names if name in ranked[:self.quorum]]
+
+            return racers
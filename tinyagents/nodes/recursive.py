@@ -1,8 +1,28 @@
-from typing import Optional, List, Any
+from typing import Optional, List, Any, AsyncIterator, Callable, Tuple, NamedTuple, Deque
+from collections import deque
+from contextvars import ContextVar
+import time
 
 from tinyagents.nodes import NodeMeta
 from tinyagents.callbacks import BaseCallback
-from tinyagents.utils import check_for_break, get_content
+from tinyagents.types import NodeOutput, Action, ConvergencePredicate
+from tinyagents.utils import check_for_break, get_content, ainvoke_node
+from tinyagents.memory import hold_outputs
+from tinyagents.streaming import DEFAULT_BUFFER_SIZE, acollect, as_chunks, buffered, collect_chunks, pipe_node
+
+class LoopStep(NamedTuple):
+    """ A single step within a loop """
+    iteration: int
+    node_name: str
+    outputs: Any
+
+_NOT_SET = object()
+_loop_history: ContextVar[Optional[deque]] = ContextVar("loop_history", default=None)
+
+def get_loop_history() -> Tuple[LoopStep, ...]:
+    """ Get the most recent steps of the loop that is currently being executed (oldest first) """
+    history = _loop_history.get()
+    return tuple(history) if history is not None else ()
 
 class Recursive(NodeMeta):
     """ A node for looping between two nodes (e.g. a conversation between two agents) """
@@ -10,11 +30,36 @@ class Recursive(NodeMeta):
     node1: NodeMeta
     node2: NodeMeta
     max_iter: int
+    until: Optional[Callable[[Any, Any], bool]]
+    history_size: int
+    timeout: Optional[float]
 
-    def __init__(self, node1, node2, max_iter: int = 3, name: Optional[str] = None):
+    def __init__(
+            self,
+            node1,
+            node2,
+            max_iter: int = 3,
+            name: Optional[str] = None,
+            until: Optional[Callable[[Any, Any], bool]] = None,
+            history_size: int = 0,
+            timeout: Optional[float] = None
+        ):
+        """
+        Args:
+            node1: The first node in the loop.
+            node2: The second node in the loop.
+            max_iter (int): The maximum number of rounds (a round runs `node1` then `node2`).
+            name (Optional[str]): The name of the node.
+            until (Optional[Callable[[Any, Any], bool]]): A predicate given the outputs of the previous (None after the first round) and current rounds, the loop ends once it returns True.
+            history_size (int): The number of steps kept in the loop history (see `get_loop_history`).
+            timeout (Optional[float]): The maximum number of seconds the loop may run for, checked after each step.
+        """
         self.node1 = node1
         self.node2 = node2
         self.max_iter = max_iter
+        self.until = until
+        self.history_size = history_size
+        self.timeout = timeout
 
         if name == None:
             self.set_name(f"recursive_{node1.name}_{node2.name}")
@@ -23,49 +68,131 @@ class Recursive(NodeMeta):
 
     def __repr__(self):
         return f"Recursive({self.node1.name}, {self.node2.name})"
-    
-    def invoke(self, inputs: Any, callbacks: Optional[List[BaseCallback]] = None, **kwargs):
-        response = None
-        n = 0
+
+    def invoke(self, inputs: Any, callbacks: Optional[List[BaseCallback]] = None, **kwargs) -> Any:
+        run_id = kwargs.get("run_id")
+        if callbacks: [callback.node_start(inputs=inputs, node_name=self.name, run_id=run_id) for callback in callbacks]
+
+        history: Deque[LoopStep] = deque(maxlen=self.history_size)
+        token = _loop_history.set(history)
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        previous = _NOT_SET
         x = inputs
-        while not response and n <= self.max_iter:
-            for node in [self.node1, self.node2]:
-                x = get_content(x)
+        try:
+            for iteration in range(self.max_iter):
+                for node in [self.node1, self.node2]:
+                    x = node.invoke(inputs=get_content(x), callbacks=callbacks, **kwargs)
+                    history.append(LoopStep(iteration, node.name, get_content(x)))
+                    hold_outputs(self.name, x)
 
-                if callbacks: [callback.node_start(node.name, x) for callback in callbacks]
-                x = node.invoke(inputs=x, callbacks=callbacks, **kwargs)
-                if callbacks: [callback.node_finish(node.name, x) for callback in callbacks]
+                    stop = check_for_break(x) or self._out_of_time(deadline)
+                    if stop:
+                        break
 
-                stop = check_for_break(x)
-                if stop:
-                    response = x
+                if stop or self._converged(previous, x):
                     break
-            n += 1
+                previous = get_content(x)
+        finally:
+            _loop_history.reset(token)
+
+        output = self._finalise(x)
+        if callbacks: [callback.node_finish(outputs=output, node_name=self.name, run_id=run_id) for callback in callbacks]
+        return output
 
-        return x
-    
-    async def ainvoke(self, inputs: Any, callbacks: Optional[List[BaseCallback]] = None, **kwargs):
-        response = None
-        n = 0
+    async def ainvoke(self, inputs: Any, callbacks: Optional[List[BaseCallback]] = None, **kwargs) -> Any:
+        run_id = kwargs.get("run_id")
+        if callbacks: [callback.node_start(inputs=inputs, node_name=self.name, run_id=run_id) for callback in callbacks]
+
+        history: Deque[LoopStep] = deque(maxlen=self.history_size)
+        token = _loop_history.set(history)
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        previous = _NOT_SET
         x = inputs
-        while not response and n <= self.max_iter:
-            for node in [self.node1, self.node2]:
-                x = get_content(x)
-
-                if callbacks: [callback.node_start(node.name, input) for callback in callbacks]
-                
-                if hasattr(node.invoke, "remote"):
-                    x = await node.ainvoke.remote(inputs=x, callbacks=callbacks, **kwargs)
-                else:
-                    x = await node.ainvoke(inputs=x, callbacks=callbacks, **kwargs)
-
-                if callbacks: [callback.node_finish(node.name, x) for callback in callbacks]
-
-                stop = check_for_break(x)
-                if stop:
-                    response = x
+        try:
+            for iteration in range(self.max_iter):
+                for node in [self.node1, self.node2]:
+                    x = await ainvoke_node(node, get_content(x), callbacks=callbacks, **kwargs)
+                    history.append(LoopStep(iteration, node.name, get_content(x)))
+                    hold_outputs(self.name, x)
+
+                    stop = check_for_break(x) or self._out_of_time(deadline)
+                    if stop:
+                        break
+
+                if stop or self._converged(previous, x):
                     break
-            n += 1
+                previous = get_content(x)
+        finally:
+            _loop_history.reset(token)
+
+        output = self._finalise(x)
+        if callbacks: [callback.node_finish(outputs=output, node_name=self.name, run_id=run_id) for callback in callbacks]
+        return output
+
+    async def apipe(self, chunks: AsyncIterator[Any], callbacks: Optional[List[BaseCallback]] = None, buffer_size: int = DEFAULT_BUFFER_SIZE, **kwargs) -> AsyncIterator[Any]:
+        """ Run the loop with `node2` consuming the output of `node1` as it is produced, the timeout is checked after each round """
+        yield await self._apipe_loop(chunks, callbacks, buffer_size, **kwargs)
+
+    async def _apipe_loop(self, chunks: AsyncIterator[Any], callbacks: Optional[List[BaseCallback]], buffer_size: int, **kwargs) -> Any:
+        run_id = kwargs.get("run_id")
+        if callbacks: [callback.node_start(inputs=None, node_name=self.name, run_id=run_id) for callback in callbacks]
+
+        history: Deque[LoopStep] = deque(maxlen=self.history_size)
+        token = _loop_history.set(history)
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        previous = _NOT_SET
+        x = None
+        try:
+            for iteration in range(self.max_iter):
+                # the output of `node1` is only kept when it is added to the loop history
+                node1_chunks: Optional[List[Any]] = [] if self.history_size else None
+                stage1 = buffered(self._record(pipe_node(self.node1, chunks, callbacks=callbacks, buffer_size=buffer_size, **kwargs), node1_chunks), buffer_size)
+                x = collect_chunks(await acollect(pipe_node(self.node2, stage1, callbacks=callbacks, buffer_size=buffer_size, **kwargs)))
+
+                if node1_chunks is not None:
+                    node1_output = collect_chunks(node1_chunks)
+                    history.append(LoopStep(iteration, self.node1.name, get_content(node1_output)))
+                    # `node2` doesn't run if `node1` stopped the loop
+                    if not check_for_break(node1_output):
+                        history.append(LoopStep(iteration, self.node2.name, get_content(x)))
+
+                hold_outputs(self.name, x)
+                stop = check_for_break(x) or self._out_of_time(deadline)
+                if stop or self._converged(previous, x):
+                    break
+                previous = get_content(x)
+                chunks = as_chunks(get_content(x))
+        finally:
+            _loop_history.reset(token)
+
+        output = self._finalise(x)
+        if callbacks: [callback.node_finish(outputs=output, node_name=self.name, run_id=run_id) for callback in callbacks]
+        return output
+
+    @staticmethod
+    async def _record(chunks: AsyncIterator[Any], recorded: Optional[list]) -> AsyncIterator[Any]:
+        async for chunk in chunks:
+            if recorded is not None:
+                recorded.append(chunk)
+            yield chunk
+
+    def _converged(self, previous: Any, outputs: Any) -> bool:
+        """ Check whether the loop has converged, `previous` is None after the first round """
+        if self.until is None:
+            return False
+        # predicates which compare rounds (e.g. `identical_outputs`) are only checked once there is a previous round
+        if previous is _NOT_SET and isinstance(self.until, ConvergencePredicate) and self.until.requires_previous:
+            return False
+        return self.until(None if previous is _NOT_SET else previous, get_content(outputs))
+
+    @staticmethod
+    def _out_of_time(deadline: Optional[float]) -> bool:
+        return deadline is not None and time.monotonic() >= deadline
+
+    @staticmethod
+    def _finalise(outputs: Any) -> Any:
+        """ `end_loop` only exits the loop, so the graph should continue from the output """
+        if isinstance(outputs, NodeOutput) and outputs.action in [Action.EndLoop, Action.EndLoop.value]:
+            return NodeOutput(content=outputs.content)
 
-        return x
-    
\ No newline at end of file
+        return outputs
@@ -1,10 +1,11 @@
-from typing import Optional, List, Any
+from typing import Optional, List, Any, AsyncIterator
 
 from tinyagents.nodes import NodeMeta
 from tinyagents.graph import Graph
 from tinyagents.callbacks import BaseCallback
-from tinyagents.utils import check_for_break, get_content
+from tinyagents.utils import check_for_break, get_content, ainvoke_node
 from tinyagents.types import NodeOutput
+from tinyagents.streaming import DEFAULT_BUFFER_SIZE, pipe_nodes
 
 class SubGraph(NodeMeta):
     """ A node which contains a graph """
@@ -33,11 +34,13 @@ class SubGraph(NodeMeta):
         x = inputs
         for node in self._state:
             x = get_content(x)
-            if hasattr(node, "remote"):
-                x = await node.ainvoke.remote(inputs=x, callbacks=callbacks, **kwargs)
-            else:
-                x = node.ainvoke(inputs=x, callbacks=callbacks, **kwargs)
+            x = await ainvoke_node(node, x, callbacks=callbacks, **kwargs)
             stop = check_for_break(x)
             if stop:
                 break
-        return x
\ No newline at end of file
+        return x
+
+    async def apipe(self, chunks: AsyncIterator[Any], callbacks: Optional[List[BaseCallback]] = None, buffer_size: int = DEFAULT_BUFFER_SIZE, **kwargs) -> AsyncIterator[Any]:
+        """ Run the nodes of the subgraph as a pipeline """
+        async for chunk in pipe_nodes(self._state, chunks, callbacks=callbacks, buffer_size=buffer_size, **kwargs):
+            yield chunk
\ No newline at end of file
@@ -0,0 +1,36 @@
+import copy
+import tinyagents.nodes as nodes
+
+def nodes_to_process_nodes(graph_nodes: list) -> list:
+    return [convert_node_to_process_node(node) for node in graph_nodes]
+
+def convert_node_to_process_node(node):
+    """ Convert the subnodes of a composite node, which is copied so the node given to the graph isn't changed """
+    if isinstance(node, nodes.Parallel):
+        node = copy.copy(node)
+        node.nodes = {name: convert_node_to_process_node(node_) for name, node_ in node.nodes.items()}
+    elif isinstance(node, nodes.ConditionalBranch):
+        node = copy.copy(node)
+        node.branches = {name: convert_node_to_process_node(node_) for name, node_ in node.branches.items()}
+    elif isinstance(node, nodes.Recursive):
+        node = copy.copy(node)
+        node.node1 = convert_node_to_process_node(node.node1)
+        node.node2 = convert_node_to_process_node(node.node2)
+    elif isinstance(node, nodes.Map):
+        node = copy.copy(node)
+        node.node = convert_node_to_process_node(node.node)
+    elif isinstance(node, nodes.SubGraph):
+        node = copy.copy(node)
+        node._state = nodes_to_process_nodes(node._state)
+    else:
+        return node_to_process_node(node)
+    return node
+
+def node_to_process_node(node):
+    """ Run the node in a pool of worker processes if it has been given `process_options` """
+    # Ray deployment handles return a value for any attribute, so only local nodes are checked for options
+    if not isinstance(node, nodes.NodeMeta) or isinstance(node, nodes.ProcessNode):
+        return node
+    if not isinstance(node._process_options, dict) or not node._process_options:
+        return node
+    return nodes.ProcessNode(node)
@@ -0,0 +1,353 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from contextlib import contextmanager, asynccontextmanager, ExitStack, AsyncExitStack
+from contextvars import ContextVar
+import asyncio
+import queue
+import threading
+import time
+
+# the longest time an async lease waits before checking the pool again
+_MAX_POLL_INTERVAL = 0.05
+
+class _Reserved:
+    """ Holds a place in a pool while an instance is created """
+
+class Resource:
+    """ A long-lived resource (e.g. a connection pool, model or tokenizer) which is created once and shared by node invocations """
+    name: str
+    pool_size: Optional[int]
+
+    def __init__(
+            self,
+            name: str,
+            setup: Callable[[], Any],
+            teardown: Optional[Callable[[Any], None]] = None,
+            pool_size: Optional[int] = None,
+            health_check: Optional[Callable[[Any], bool]] = None
+        ):
+        """
+        Args:
+            name (str): The name used to inject the resource into nodes.
+            setup (Callable[[], Any]): Creates an instance of the resource.
+            teardown (Optional[Callable[[Any], None]]): Releases an instance of the resource (e.g. closes a connection).
+            pool_size (Optional[int]): By default a single instance is shared by every invocation (e.g. for thread-safe clients). Otherwise up to `pool_size` instances are created and each invocation leases one.
+            health_check (Optional[Callable[[Any], bool]]): Checked before an instance is leased, unhealthy instances are torn down and replaced.
+        """
+        if pool_size is not None and pool_size < 1:
+            raise ValueError("`pool_size` must be at least 1.")
+
+        self.name = name
+        self.setup = setup
+        self.teardown = teardown
+        self.pool_size = pool_size
+        self.health_check = health_check
+        self._reset()
+
+    def _reset(self) -> None:
+        self._instances: List[Any] = []
+        self._available: "queue.Queue[Any]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._creation_lock = threading.Lock()
+        self._in_use = 0
+        self._leases = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+        self._replaced = 0
+        self._setup_errors = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # instances belong to the process that created them, e.g. each Ray replica creates its own
+        return {key: getattr(self, key) for key in ["name", "setup", "teardown", "pool_size", "health_check"]}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._reset()
+
+    @property
+    def max_size(self) -> int:
+        return self.pool_size or 1
+
+    def stats(self) -> Dict[str, Any]:
+        """ The size and health of the pool """
+        with self._lock:
+            return {
+                "size": len(self._instances),
+                "max_size": self.max_size,
+                "in_use": self._in_use,
+                "leases": self._leases,
+                "waits": self._waits,
+                "wait_seconds": self._wait_seconds,
+                "replaced": self._replaced,
+                "setup_errors": self._setup_errors,
+            }
+
+    def start(self) -> None:
+        """ Create the instances up front, rather than on first use """
+        with self._lock:
+            missing = self.max_size - len(self._instances)
+        for _ in range(missing):
+            instance = self._create()
+            # the pool may have been filled by invocations in the meantime
+            if instance is not None and self.pool_size is not None:
+                self._available.put(instance)
+
+    def close(self) -> None:
+        """ Tear down every instance """
+        with self._lock:
+            instances, self._instances = self._instances, []
+            self._available = queue.Queue()
+        for instance in instances:
+            if self.teardown is not None and not isinstance(instance, _Reserved):
+                self.teardown(instance)
+
+    def _index(self, instance: Any) -> Optional[int]:
+        """ The position of an instance in the pool (compared by identity), must be called while holding the lock """
+        return next((index for index, instance_ in enumerate(self._instances) if instance_ is instance), None)
+
+    def _create(self) -> Any:
+        """ Create an instance if the pool isn't full, returns None otherwise """
+        with self._lock:
+            if len(self._instances) >= self.max_size:
+                return None
+            # reserve a place in the pool while the instance is created
+            reserved = _Reserved()
+            self._instances.append(reserved)
+        return self._setup(reserved)
+
+    def _setup(self, reserved: _Reserved) -> Any:
+        """ Create an instance in a reserved place """
+        try:
+            instance = self.setup()
+        except Exception:
+            with self._lock:
+                index = self._index(reserved)
+                if index is not None:
+                    self._instances.pop(index)
+                self._setup_errors += 1
+            raise
+
+        with self._lock:
+            index = self._index(reserved)
+            if index is None:
+                # the pool was closed while the instance was created
+                raise RuntimeError(f"The resource `{self.name}` was closed while an instance was being created.")
+            self._instances[index] = instance
+        return instance
+
+    def _replace_if_unhealthy(self, instance: Any) -> Any:
+        """ Replace an unhealthy pooled instance, which is only used by the current lease """
+        if self.health_check is None or self.health_check(instance):
+            return instance
+
+        # the replacement takes the place of the instance, so it can't be taken by another lease
+        reserved = _Reserved()
+        with self._lock:
+            index = self._index(instance)
+            if index is not None:
+                self._instances[index] = reserved
+                self._replaced += 1
+        if index is None:
+            raise RuntimeError(f"The resource `{self.name}` was closed while an instance was being leased.")
+        if self.teardown is not None:
+            self.teardown(instance)
+        return self._setup(reserved)
+
+    def _first(self) -> Any:
+        with self._lock:
+            return next((instance for instance in self._instances if not isinstance(instance, _Reserved)), None)
+
+    def _get_shared(self) -> Any:
+        """ Lease the shared instance, an unhealthy instance is only replaced once no other invocation is using it """
+        replaced = False
+        while True:
+            instance = self._first()
+            if instance is None:
+                # creation is serialised so that only one instance is shared
+                with self._creation_lock:
+                    if self._first() is None:
+                        self._create()
+                continue
+
+            # the replacement is leased even if it is unhealthy, rather than replacing it again
+            if not replaced and self.health_check is not None and not self.health_check(instance):
+                with self._lock:
+                    index = self._index(instance) if self._in_use == 0 else None
+                    if index is not None:
+                        self._instances.pop(index)
+                        self._replaced += 1
+                if index is not None:
+                    replaced = True
+                    if self.teardown is not None:
+                        self.teardown(instance)
+                    continue
+
+            with self._lock:
+                # the instance may have been replaced by another invocation since it was checked
+                if self._index(instance) is not None:
+                    self._in_use += 1
+                    self._leases += 1
+                    return instance
+
+    def _try_get_pooled(self) -> Any:
+        """ Get an available (or new) instance without waiting, returns None if the pool is exhausted """
+        try:
+            return self._available.get_nowait()
+        except queue.Empty:
+            return self._create()
+
+    def _record_lease(self, wait_seconds: Optional[float]) -> None:
+        with self._lock:
+            self._in_use += 1
+            self._leases += 1
+            if wait_seconds is not None:
+                self._waits += 1
+                self._wait_seconds += wait_seconds
+
+    def _release(self, instance: Any) -> None:
+        with self._lock:
+            self._in_use -= 1
+            pooled = self.pool_size is not None and self._index(instance) is not None
+        if pooled:
+            self._available.put(instance)
+
+    async def _await_available(self) -> Any:
+        """ Wait for a pooled instance to be released, polling the pool so that a cancelled lease never takes an instance """
+        delay = 0.001
+        while True:
+            try:
+                return self._available.get_nowait()
+            except queue.Empty:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _MAX_POLL_INTERVAL)
+
+    @contextmanager
+    def lease(self) -> Iterator[Any]:
+        """ Lease an instance, waiting for one to be released if the pool is exhausted """
+        if self.pool_size is None:
+            instance = self._get_shared()
+        else:
+            wait_seconds = None
+            instance = self._try_get_pooled()
+            if instance is None:
+                start = time.perf_counter()
+                instance = self._available.get()
+                wait_seconds = time.perf_counter() - start
+            instance = self._replace_if_unhealthy(instance)
+            self._record_lease(wait_seconds)
+
+        try:
+            yield instance
+        finally:
+            self._release(instance)
+
+    @asynccontextmanager
+    async def alease(self):
+        """ Lease an instance without blocking the event loop """
+        if self.pool_size is None:
+            instance = self._get_shared()
+        else:
+            wait_seconds = None
+            instance = self._try_get_pooled()
+            if instance is None:
+                start = time.perf_counter()
+                instance = await self._await_available()
+                wait_seconds = time.perf_counter() - start
+            instance = self._replace_if_unhealthy(instance)
+            self._record_lease(wait_seconds)
+
+        try:
+            yield instance
+        finally:
+            self._release(instance)
+
+class ResourceRegistry:
+    """ A set of named resources, which are injected into nodes created using `chainable(resources=[...])` """
+    resources: Dict[str, Resource]
+
+    def __init__(self):
+        self.resources = {}
+
+    def register(
+            self,
+            name: str,
+            setup: Callable[[], Any],
+            teardown: Optional[Callable[[Any], None]] = None,
+            pool_size: Optional[int] = None,
+            health_check: Optional[Callable[[Any], bool]] = None
+        ) -> Resource:
+        """ Register a resource, see `Resource` for the arguments """
+        self.resources[name] = Resource(name, setup, teardown=teardown, pool_size=pool_size, health_check=health_check)
+        return self.resources[name]
+
+    def resource(
+            self,
+            name: Optional[str] = None,
+            teardown: Optional[Callable[[Any], None]] = None,
+            pool_size: Optional[int] = None,
+            health_check: Optional[Callable[[Any], bool]] = None
+        ):
+        """ Register a function which creates a resource, using the name of the function by default """
+        def decorator(setup: Callable[[], Any]) -> Callable[[], Any]:
+            self.register(name or setup.__name__, setup, teardown=teardown, pool_size=pool_size, health_check=health_check)
+            return setup
+        return decorator
+
+    def get(self, name: str) -> Resource:
+        if name not in self.resources:
+            raise KeyError(f"The resource `{name}` has not been registered, available resources: {list(self.resources)}")
+        return self.resources[name]
+
+    def setup(self, names: Optional[List[str]] = None) -> None:
+        """ Create the resources (all of them by default) up front """
+        for name in (names if names is not None else list(self.resources)):
+            self.get(name).start()
+
+    def teardown(self, names: Optional[List[str]] = None) -> None:
+        """ Tear down the resources (all of them by default) """
+        for name in (names if names is not None else list(self.resources)):
+            self.get(name).close()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: resource.stats() for name, resource in self.resources.items()}
+
+    @contextmanager
+    def lease(self, names: List[str]) -> Iterator[Dict[str, Any]]:
+        """ Lease an instance of each resource """
+        with ExitStack() as stack:
+            yield {name: stack.enter_context(self.get(name).lease()) for name in names}
+
+    @asynccontextmanager
+    async def alease(self, names: List[str]):
+        async with AsyncExitStack() as stack:
+            yield {name: await stack.enter_async_context(self.get(name).alease()) for name in names}
+
+    def __enter__(self) -> "ResourceRegistry":
+        self.setup()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.teardown()
+
+# resources registered when a module is imported are available in every process that imports it (e.g. Ray replicas)
+default_registry = ResourceRegistry()
+register_resource = default_registry.register
+resource = default_registry.resource
+
+_registry: ContextVar[Optional[ResourceRegistry]] = ContextVar("tinyagents_resource_registry", default=None)
+
+def get_registry() -> ResourceRegistry:
+    """ Get the registry of the current run, or the default registry """
+    return _registry.get() or default_registry
+
+@contextmanager
+def use_registry(registry: Optional[ResourceRegistry]) -> Iterator[ResourceRegistry]:
+    """ Use `registry` for the current run, does nothing if `registry` is None """
+    if registry is None:
+        yield get_registry()
+        return
+
+    token = _registry.set(registry)
+    try:
+        yield registry
+    finally:
+        _registry.reset(token)
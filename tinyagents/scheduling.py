@@ -0,0 +1,127 @@
+from typing import Dict, Literal, Optional, Deque, Tuple
+from collections import deque
+from contextlib import asynccontextmanager
+import asyncio
+import time
+
+class PriorityScheduler:
+    """ Grants a limited number of concurrent slots to waiting requests according to their priority class """
+    slots: int
+    weights: Dict[str, float]
+    policy: Literal["weighted_fair", "strict"]
+    max_wait: Optional[float]
+    default_priority: str
+
+    def __init__(
+            self,
+            slots: int,
+            weights: Optional[Dict[str, float]] = None,
+            policy: Literal["weighted_fair", "strict"] = "weighted_fair",
+            max_wait: Optional[float] = 30.0,
+            default_priority: str = "default"
+        ):
+        """
+        Args:
+            slots (int): The number of requests which can run at once.
+            weights (Optional[Dict[str, float]]): The weight of each priority class (e.g. `{"interactive": 10, "batch": 1}`), classes without a weight have a weight of 1.
+            policy (str): `weighted_fair` shares slots between waiting classes in proportion to their weights. `strict` always serves the highest weighted class first.
+            max_wait (Optional[float]): When using the `strict` policy, requests which have waited longer than this (in seconds) are served first so that they aren't starved.
+            default_priority (str): The priority class used for requests without one.
+        """
+        if policy not in ["weighted_fair", "strict"]:
+            raise ValueError(f"`{policy}` is not a valid policy, must be one of ['weighted_fair', 'strict']")
+
+        self.slots = slots
+        self.weights = weights or {}
+        self.policy = policy
+        self.max_wait = max_wait
+        self.default_priority = default_priority
+        self._available = slots
+        self._waiting: Dict[str, Deque[Tuple[float, asyncio.Future]]] = {}
+        # the virtual time of each class, which advances by 1 / weight each time the class is granted a slot
+        self._virtual_time: Dict[str, float] = {}
+
+    def __getstate__(self) -> dict:
+        # waiting requests aren't copied when the scheduler is sent to a Ray replica
+        state = self.__dict__.copy()
+        state.update(_available=self.slots, _waiting={}, _virtual_time={})
+        return state
+
+    @property
+    def num_waiting(self) -> int:
+        return sum(len(waiting) for waiting in self._waiting.values())
+
+    def _weight(self, priority: str) -> float:
+        return self.weights.get(priority, 1.0)
+
+    async def acquire(self, priority: Optional[str] = None) -> None:
+        """ Wait until a slot has been granted """
+        priority = priority or self.default_priority
+
+        if self._available > 0 and self.num_waiting == 0:
+            self._available -= 1
+            self._granted(priority)
+            return
+
+        if not self._waiting.get(priority):
+            self._activate(priority)
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(priority, deque()).append((time.monotonic(), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # the slot was granted after the request was cancelled
+                self.release()
+            else:
+                self._waiting[priority] = deque(entry for entry in self._waiting[priority] if entry[1] is not future)
+            raise
+
+    def release(self) -> None:
+        """ Release a slot, granting it to the next waiting request """
+        while True:
+            priority = self._select()
+            if priority is None:
+                self._available += 1
+                return
+
+            _, future = self._waiting[priority].popleft()
+            if not future.done():
+                self._granted(priority)
+                future.set_result(None)
+                return
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[str] = None):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _activate(self, priority: str) -> None:
+        """ A class that becomes active again can't use the time it was idle to take more than its share of slots """
+        active = [self._virtual_time[p] for p, waiting in self._waiting.items() if waiting and p in self._virtual_time]
+        floor = min(active) if active else max(self._virtual_time.values(), default=0.0)
+        self._virtual_time[priority] = max(self._virtual_time.get(priority, 0.0), floor)
+
+    def _granted(self, priority: str) -> None:
+        self._virtual_time[priority] = self._virtual_time.get(priority, 0.0) + 1 / self._weight(priority)
+
+    def _select(self) -> Optional[str]:
+        """ Select the priority class which should receive the next slot """
+        waiting = [priority for priority, queue in self._waiting.items() if queue]
+        if not waiting:
+            return None
+
+        if self.policy == "weighted_fair":
+            return min(waiting, key=lambda priority: self._virtual_time.get(priority, 0.0))
+
+        if self.max_wait is not None:
+            now = time.monotonic()
+            oldest = min(waiting, key=lambda priority: self._waiting[priority][0][0])
+            if now - self._waiting[oldest][0][0] >= self.max_wait:
+                return oldest
+
+        return max(waiting, key=self._weight)
@@ -0,0 +1,289 @@
+from typing import Any, Dict
+from inspect import isclass
+import copy
+import json
+
+import tinyagents.nodes as nodes
+from tinyagents.graph import Graph
+from tinyagents.decorators import Function
+from tinyagents.autoscaling import recommend_options
+from tinyagents.utils import get_init_args, get_init_arg_names, load_object
+
+SPEC_VERSION = 1
+
+class GraphSpecError(Exception):
+    """ Raised when a graph can't be exported to, or loaded from, a spec """
+
+def get_import_path(obj: Any) -> str:
+    """ Get the import path of a class or function, e.g. `my_package.nodes:MyNode` """
+    path = f"{obj.__module__}:{obj.__qualname__}"
+    if "<locals>" in path:
+        raise GraphSpecError(f"`{path}` is defined inside a function, so it can't be imported when the spec is loaded.")
+    return path
+
+def _node_import_path(node) -> str:
+    """ Get the import path of the class or function decorated using `chainable` """
+    decorated = type(node).__mro__[1]
+    if issubclass(decorated, Function):
+        path = get_import_path(decorated.run)
+        # decorated functions are replaced by an instance of the node (nodes loaded from a spec are copies of it)
+        if type(load_object(path)) is not type(node):
+            raise GraphSpecError(f"`{path}` doesn't resolve to the node `{node.name}`.")
+    else:
+        path = get_import_path(decorated)
+        if load_object(path) is not type(node):
+            raise GraphSpecError(f"`{path}` doesn't resolve to the class of the node `{node.name}`.")
+    return path
+
+def _encode_value(value: Any, context: str) -> Any:
+    """ Encode an argument as JSON, functions are stored as import paths """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_encode_value(item, context) for item in value]
+    if isinstance(value, dict):
+        if not all(isinstance(key, str) for key in value):
+            raise GraphSpecError(f"{context}: only dictionaries with string keys can be stored in a spec.")
+        return {key: _encode_value(item, context) for key, item in value.items()}
+    if callable(value) and not isinstance(value, nodes.NodeMeta):
+        return {"$import": get_import_path(value)}
+    raise GraphSpecError(f"{context}: values of type `{type(value).__name__}` can't be stored in a spec.")
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_decode_value(item) for item in value]
+    if isinstance(value, dict):
+        if set(value) == {"$import"}:
+            return load_object(value["$import"])
+        return {key: _decode_value(item) for key, item in value.items()}
+    return value
+
+def node_to_spec(node, precompile: bool = False, autoscale: bool = False) -> Dict[str, Any]:
+    """ Create the spec for a node (and any nodes it contains) """
+    to_spec = lambda node_: node_to_spec(node_, precompile, autoscale)
+
+    if isinstance(node, nodes.ParallelReduce):
+        return {
+            "type": "parallel_reduce",
+            "name": node.name,
+            "nodes": [to_spec(node_) for node_ in node.nodes.values()],
+            "num_workers": node.num_workers,
+            "reducer": _encode_value(node.reducer, node.name),
+            "initial": _encode_value(node.initial, node.name),
+            "until": _encode_value(node.until, node.name),
+        }
+    if isinstance(node, nodes.Race):
+        return {
+            "type": "race",
+            "name": node.name,
+            "nodes": [to_spec(node_) for node_ in node.nodes.values()],
+            "num_workers": node.num_workers,
+            "validator": _encode_value(node.validator, node.name),
+            "quorum": node.quorum,
+            "skip_below": node.skip_below,
+            "min_samples": node.min_samples,
+            "probe_interval": node.probe_interval,
+        }
+    if isinstance(node, nodes.Parallel):
+        return {
+            "type": "parallel",
+            "name": node.name,
+            "nodes": [to_spec(node_) for node_ in node.nodes.values()],
+            "num_workers": node.num_workers,
+        }
+    if isinstance(node, nodes.ConditionalBranch):
+        return {
+            "type": "conditional_branch",
+            "name": node.name,
+            "branches": [to_spec(node_) for node_ in node.branches.values()],
+            "router": _encode_value(node.router, node.name),
+        }
+    if isinstance(node, nodes.Recursive):
+        return {
+            "type": "recursive",
+            "name": node.name,
+            "node1": to_spec(node.node1),
+            "node2": to_spec(node.node2),
+            "max_iter": node.max_iter,
+            "until": _encode_value(node.until, node.name),
+            "history_size": node.history_size,
+            "timeout": node.timeout,
+        }
+    if isinstance(node, nodes.Map):
+        return {
+            "type": "map",
+            "name": node.name,
+            "node": to_spec(node.node),
+            "max_concurrency": node.max_concurrency,
+            "chunk_size": node.chunk_size,
+            "ordered": node.ordered,
+        }
+    if isinstance(node, nodes.SubGraph):
+        return {"type": "subgraph", "name": node.name, "nodes": [to_spec(node_) for node_ in node._state]}
+    if not isinstance(node, nodes.NodeMeta):
+        raise GraphSpecError(f"`{node!r}` is not a node, only nodes created using `chainable` can be stored in a spec.")
+
+    ray_options = dict(node._ray_options or {})
+    # resolve the autoscaling config now, so that it doesn't depend on the statistics recorded by the process loading the spec
+    if precompile and autoscale and "num_replicas" not in ray_options and "autoscaling_config" not in ray_options:
+        ray_options = {**recommend_options(node), **ray_options}
+
+    return {
+        "type": "node",
+        "name": node.name,
+        "import_path": _node_import_path(node),
+        "args": _encode_value(get_init_args(node), node.name),
+        "kind": node._kind,
+        "ray_options": _encode_value(ray_options, node.name),
+        "process_options": _encode_value(node._process_options or {}, node.name),
+        "metadata": _encode_value(node._metadata, node.name),
+        "warmup": _encode_value(node._warmup_inputs, node.name),
+        "semantic_cache": _encode_value(_semantic_cache_config(node._semantic_cache), node.name),
+        "resources": _encode_value(node._resources, node.name),
+        "pool_size": node._pool_size,
+        "streaming_input": node._streaming_input,
+    }
+
+def _semantic_cache_config(cache) -> Any:
+    if cache is None:
+        return None
+    return {"embed": cache.embed, "threshold": cache.threshold, "max_entries": cache.max_entries, "ttl": cache.ttl}
+
+def node_from_spec(spec: Dict[str, Any], precompiled: bool = False):
+    """ Create a node (and any nodes it contains) from its spec """
+    from_spec = lambda spec_: node_from_spec(spec_, precompiled)
+    node_type = spec["type"]
+
+    if node_type == "parallel_reduce":
+        return nodes.ParallelReduce(
+            nodes={node.name: node for node in map(from_spec, spec["nodes"])},
+            reducer=_decode_value(spec["reducer"]),
+            initial=_decode_value(spec["initial"]),
+            until=_decode_value(spec["until"]),
+            name=spec["name"],
+            num_workers=spec["num_workers"]
+        )
+    if node_type == "race":
+        return nodes.Race(
+            nodes={node.name: node for node in map(from_spec, spec["nodes"])},
+            validator=_decode_value(spec["validator"]),
+            quorum=spec["quorum"],
+            skip_below=spec["skip_below"],
+            min_samples=spec["min_samples"],
+            probe_interval=spec["probe_interval"],
+            name=spec["name"],
+            num_workers=spec["num_workers"]
+        )
+    if node_type == "parallel":
+        return nodes.Parallel(nodes={node.name: node for node in map(from_spec, spec["nodes"])}, name=spec["name"], num_workers=spec["num_workers"])
+    if node_type == "conditional_branch":
+        return nodes.ConditionalBranch(
+            branches={node.name: node for node in map(from_spec, spec["branches"])},
+            router=_decode_value(spec["router"]),
+            name=spec["name"]
+        )
+    if node_type == "recursive":
+        return nodes.Recursive(
+            from_spec(spec["node1"]),
+            from_spec(spec["node2"]),
+            max_iter=spec["max_iter"],
+            name=spec["name"],
+            until=_decode_value(spec["until"]),
+            history_size=spec["history_size"],
+            timeout=spec["timeout"]
+        )
+    if node_type == "map":
+        return nodes.Map(
+            from_spec(spec["node"]),
+            max_concurrency=spec["max_concurrency"],
+            chunk_size=spec["chunk_size"],
+            ordered=spec["ordered"],
+            name=spec["name"]
+        )
+    if node_type == "subgraph":
+        graph = Graph()
+        graph._state = [from_spec(spec_) for spec_ in spec["nodes"]]
+        return nodes.SubGraph(graph, name=spec["name"])
+    if node_type != "node":
+        raise GraphSpecError(f"`{node_type}` is not a valid node type.")
+
+    obj = load_object(spec["import_path"])
+    args = _decode_value(spec["args"])
+
+    if isclass(obj) and issubclass(obj, nodes.NodeMeta):
+        # precompiled specs were validated when they were exported
+        if not precompiled:
+            unexpected = set(args) - set(get_init_arg_names(obj))
+            if unexpected:
+                raise GraphSpecError(f"The node `{spec['name']}` doesn't accept the arguments {sorted(unexpected)}.")
+        node = obj(**args)
+    elif isinstance(obj, nodes.NodeMeta):
+        # function nodes are module-level instances, which are copied so the options of the spec don't change them
+        node = copy.copy(obj)
+    else:
+        raise GraphSpecError(f"`{spec['import_path']}` is not a node.")
+
+    # options in the spec override the options given to `chainable`
+    if node.name != spec["name"]:
+        node.set_name(spec["name"])
+    node._kind = spec["kind"]
+    node._ray_options = _decode_value(spec["ray_options"])
+    node._process_options = _decode_value(spec["process_options"])
+    node._metadata = _decode_value(spec["metadata"])
+    # specs exported before these options were stored use the options given to `chainable`
+    if "warmup" in spec:
+        node._warmup_inputs = _decode_value(spec["warmup"])
+        node._semantic_cache = _load_semantic_cache(spec["semantic_cache"])
+        node._resources = _decode_value(spec["resources"])
+        node._pool_size = spec["pool_size"]
+        node._streaming_input = spec["streaming_input"]
+    node._init_args = args
+    return node
+
+def _load_semantic_cache(config: Any):
+    if config is None:
+        return None
+    # numpy is only needed if a node uses a semantic cache
+    from tinyagents.cache import SemanticCache
+    return SemanticCache(**_decode_value(config))
+
+def graph_to_spec(graph: Any, precompile: bool = False, autoscale: bool = False) -> Dict[str, Any]:
+    """
+    Export a graph to a declarative spec, which can be stored as JSON.
+
+    Args:
+        graph (Graph): The graph (or a single node) to export.
+        precompile (bool): Whether to create a precompiled spec, which is loaded without validating the constructor arguments of each node.
+        autoscale (bool): When precompiling, whether to store the autoscaling config of nodes which don't set `num_replicas` or `autoscaling_config`.
+
+    Returns:
+        Dict[str, Any]: The spec.
+    """
+    if not isinstance(graph, Graph):
+        graph_ = Graph()
+        graph_.next(graph)
+        graph = graph_
+
+    return {
+        "version": SPEC_VERSION,
+        "precompiled": precompile,
+        "nodes": [node_to_spec(node, precompile, autoscale) for node in graph._state],
+    }
+
+def graph_from_spec(spec: Dict[str, Any]) -> Graph:
+    """ Create a graph from a spec created using `graph_to_spec` """
+    if spec.get("version") != SPEC_VERSION:
+        raise GraphSpecError(f"Spec version `{spec.get('version')}` is not supported, expected version {SPEC_VERSION}.")
+
+    graph = Graph()
+    graph._state = [node_from_spec(node_spec, spec.get("precompiled", False)) for node_spec in spec["nodes"]]
+    return graph
+
+def save_spec(graph: Graph, path: str, precompile: bool = False, autoscale: bool = False) -> None:
+    """ Save the spec of a graph as JSON (with sorted keys, so that versions of a graph can be diffed) """
+    with open(path, "w") as f:
+        json.dump(graph_to_spec(graph, precompile, autoscale), f, indent=2, sort_keys=True)
+
+def load_spec(path: str) -> Graph:
+    with open(path) as f:
+        return graph_from_spec(json.load(f))
@@ -0,0 +1,175 @@
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Literal, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+
+import ray
+
+class _Deleted:
+    """ Marks a key deleted by a snapshot, so the deletion is applied when the snapshot is merged """
+    def __repr__(self) -> str:
+        return "<deleted>"
+
+    def __reduce__(self) -> str:
+        # keep a single instance when a deletion is sent to (or from) a Ray deployment
+        return "_DELETED"
+
+_DELETED = _Deleted()
+_MISSING = object()
+
+_run_state: ContextVar[Optional["RunState"]] = ContextVar("tinyagents_run_state", default=None)
+
+def get_state() -> Optional["RunState"]:
+    """ Get the state of the current run (None outside of a run) """
+    return _run_state.get()
+
+@contextmanager
+def use_state(state: Optional["RunState"]) -> Iterator[Optional["RunState"]]:
+    """ Make `state` the state of the current run, does nothing if `state` is None """
+    if state is None:
+        yield get_state()
+        return
+
+    token = _run_state.set(state)
+    try:
+        yield state
+    finally:
+        _run_state.reset(token)
+
+class RunState:
+    """ A key-value store shared by the nodes of a run, use `get_state()` within a node to access it """
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            data (Optional[Dict[str, Any]]): The initial state.
+        """
+        self._base: Dict[str, Any] = {}
+        self._writes: Dict[str, Any] = {}
+        for key, value in (data or {}).items():
+            self.set(key, value)
+
+    def _store(self, value: Any) -> Any:
+        return value
+
+    def _load(self, stored: Any) -> Any:
+        return stored
+
+    def _lookup(self, key: str) -> Any:
+        stored = self._writes.get(key, _MISSING)
+        return self._base.get(key, _MISSING) if stored is _MISSING else stored
+
+    def get(self, key: str, default: Any = None) -> Any:
+        stored = self._lookup(key)
+        if stored is _MISSING or stored is _DELETED:
+            return default
+        return self._load(stored)
+
+    def set(self, key: str, value: Any) -> None:
+        """ Set the value of a key, values are shared with other snapshots so they should be replaced rather than modified """
+        self._writes[key] = self._store(value)
+
+    def delete(self, key: str) -> None:
+        self._writes[key] = _DELETED
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.set(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self.delete(key)
+
+    def __contains__(self, key: str) -> bool:
+        stored = self._lookup(key)
+        return stored is not _MISSING and stored is not _DELETED
+
+    def keys(self) -> List[str]:
+        return [key for key in {**self._base, **self._writes} if key in self]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self.get(key) for key in self.keys()}
+
+    def snapshot(self) -> "RunState":
+        """ Create a copy-on-write snapshot, values are shared (not copied) until the snapshot replaces them """
+        snapshot = self._empty()
+        snapshot._base = {**self._base, **self._writes}
+        return snapshot
+
+    def _empty(self) -> "RunState":
+        return type(self)()
+
+    def changes(self) -> Dict[str, Any]:
+        """ The keys written (or deleted) in this snapshot, in their stored form """
+        return dict(self._writes)
+
+    def apply(self, changes: Dict[str, Any]) -> None:
+        """ Apply the changes made by a snapshot (see `changes`) """
+        self._writes.update(changes)
+
+    def merge(self, *snapshots: "RunState") -> None:
+        """ Merge the changes made by snapshots, when snapshots write the same key the last snapshot wins """
+        for snapshot in snapshots:
+            self.apply(snapshot._writes)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.keys()})"
+
+class ObjectStoreRunState(RunState):
+    """ A run state whose values are kept in the Ray object store, so deployments only receive references and fetch the keys they read """
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None, refs: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            data (Optional[Dict[str, Any]]): The initial state.
+            refs (Optional[Dict[str, Any]]): The references to the values of a state created in another process (see `to_refs`).
+        """
+        self._cache: Dict[ray.ObjectRef, Any] = {}
+        super().__init__(data)
+        self._base = dict(refs or {})
+
+    def _store(self, value: Any) -> ray.ObjectRef:
+        ref = ray.put(value)
+        self._cache[ref] = value
+        return ref
+
+    def _load(self, ref: ray.ObjectRef) -> Any:
+        if ref not in self._cache:
+            self._cache[ref] = ray.get(ref)
+        return self._cache[ref]
+
+    def _empty(self) -> "ObjectStoreRunState":
+        snapshot = type(self)()
+        snapshot._cache = self._cache
+        return snapshot
+
+    def to_refs(self) -> Dict[str, Any]:
+        """ The references to the value of every key, which can be sent to a deployment """
+        return {key: stored for key, stored in {**self._base, **self._writes}.items() if stored is not _DELETED}
+
+def create_state(data: Optional[Dict[str, Any]] = None, store: Literal["local", "ray"] = "local") -> RunState:
+    if store not in ["local", "ray"]:
+        raise ValueError(f"`{store}` is not a valid state store, must be one of ['local', 'ray']")
+    return ObjectStoreRunState(data) if store == "ray" else RunState(data)
+
+def bind_state(state: Optional[RunState], func: Callable) -> Callable:
+    """ Bind a function to a run state (and the rest of the current context, e.g. the resource registry) before submitting it to a thread pool, as threads don't inherit the context """
+    context = copy_context()
+
+    def run(*args, **kwargs):
+        with use_state(state):
+            return func(*args, **kwargs)
+
+    def bound(*args, **kwargs):
+        return context.run(run, *args, **kwargs)
+    return bound
+
+async def with_state(state: Optional[RunState], coro: Awaitable) -> Any:
+    """ Await a coroutine using the given run state, e.g. as a task (tasks copy the state of their creator) """
+    with use_state(state):
+        return await coro
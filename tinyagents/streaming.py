@@ -0,0 +1,123 @@
+from typing import Any, AsyncIterator, List, Optional
+import asyncio
+
+from tinyagents.callbacks import BaseCallback
+from tinyagents.types import NodeOutput
+from tinyagents.utils import check_for_break, get_content, ainvoke_node
+
+# the number of chunks a stage can produce before it waits for the next stage to consume them
+DEFAULT_BUFFER_SIZE = 8
+
+_END = object()
+
+class _Failure:
+    """ An exception raised by a stage, which is raised again by the consumer """
+    def __init__(self, error: Exception):
+        self.error = error
+
+def collect_chunks(chunks: List[Any]) -> Any:
+    """
+    Combine the chunks of a stream into a single input, for nodes which don't consume streams.
+
+    The output of a node which doesn't stream is a single `NodeOutput`, which is returned as it is. Otherwise strings (e.g. tokens) and bytes are concatenated, and other chunks are returned as a list.
+    """
+    if len(chunks) == 1 and isinstance(chunks[0], NodeOutput):
+        return chunks[0]
+
+    chunks = [get_content(chunk) for chunk in chunks]
+    if chunks and all(isinstance(chunk, str) for chunk in chunks):
+        return "".join(chunks)
+    if chunks and all(isinstance(chunk, bytes) for chunk in chunks):
+        return b"".join(chunks)
+    return chunks
+
+async def acollect(chunks: AsyncIterator[Any]) -> List[Any]:
+    return [chunk async for chunk in chunks]
+
+async def as_chunks(inputs: Any) -> AsyncIterator[Any]:
+    """ Create a stream from an input, async iterators are already streams and other inputs are sent whole (as a single `NodeOutput`) """
+    if hasattr(inputs, "__aiter__"):
+        async for chunk in inputs:
+            yield chunk
+    else:
+        yield inputs if isinstance(inputs, NodeOutput) else NodeOutput(content=inputs)
+
+async def aclose(*iterators: Any) -> None:
+    """ Close async generators which may not have been consumed, so that the stages (and tasks) feeding them stop """
+    for iterator in iterators:
+        if hasattr(iterator, "aclose"):
+            await iterator.aclose()
+
+async def _prepend(first: Any, chunks: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    yield first
+    async for chunk in chunks:
+        yield chunk
+
+async def _pump(chunks: AsyncIterator[Any], queue: asyncio.Queue) -> None:
+    try:
+        async for chunk in chunks:
+            await queue.put(chunk)
+    except Exception as e:
+        await queue.put(_Failure(e))
+        return
+    finally:
+        await aclose(chunks)
+    await queue.put(_END)
+
+async def buffered(chunks: AsyncIterator[Any], buffer_size: int = DEFAULT_BUFFER_SIZE) -> AsyncIterator[Any]:
+    """
+    Consume a stream in a separate task, so that it produces chunks while they are being processed.
+
+    At most `buffer_size` chunks are held, once the buffer is full the producer waits (i.e. backpressure). The producer is cancelled if the consumer stops early.
+    """
+    queue: asyncio.Queue[Any] = asyncio.Queue(maxsize=buffer_size)
+    task = asyncio.ensure_future(_pump(chunks, queue))
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        task.cancel()
+
+async def pipe_node(node, chunks: AsyncIterator[Any], callbacks: Optional[List[BaseCallback]] = None, buffer_size: int = DEFAULT_BUFFER_SIZE, **kwargs) -> AsyncIterator[Any]:
+    """ Run a node on a stream, yielding the chunks of its output """
+    upstream = chunks
+    try:
+        first: Any = await anext(chunks, _END)
+
+        # the graph has been stopped by a previous node (e.g. using `respond`)
+        if first is not _END and check_for_break(first):
+            yield first
+            return
+
+        chunks = _prepend(first, chunks) if first is not _END else chunks
+
+        # Ray deployments receive the collected stream
+        if hasattr(node.ainvoke, "remote"):
+            yield await ainvoke_node(node, collect_chunks(await acollect(chunks)), callbacks=callbacks, **kwargs)
+            return
+
+        outputs = node.apipe(chunks, callbacks=callbacks, buffer_size=buffer_size, **kwargs)
+        try:
+            async for chunk in outputs:
+                yield chunk
+        finally:
+            await aclose(outputs)
+    finally:
+        # the previous stage is stopped if this node fails or stops early
+        await aclose(chunks, upstream)
+
+async def pipe_nodes(nodes: list, chunks: AsyncIterator[Any], callbacks: Optional[List[BaseCallback]] = None, buffer_size: int = DEFAULT_BUFFER_SIZE, **kwargs) -> AsyncIterator[Any]:
+    """ Run a sequence of nodes as a pipeline, where each node runs as soon as the previous node produces a chunk """
+    for node in nodes:
+        chunks = buffered(pipe_node(node, chunks, callbacks=callbacks, buffer_size=buffer_size, **kwargs), buffer_size)
+
+    try:
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        await aclose(chunks)
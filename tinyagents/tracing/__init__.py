@@ -1,2 +1,3 @@
 from tinyagents.tracing.decorators import trace_flow, trace_node
-from tinyagents.tracing.utils import create_tracer, init_all_tracers, check_tracing_enabled
\ No newline at end of file
+from tinyagents.tracing.utils import create_tracer, init_all_tracers, check_tracing_enabled, trace_cold_start
+from tinyagents.tracing.exporters import FileSpanExporter, replay_spans
\ No newline at end of file
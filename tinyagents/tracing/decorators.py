@@ -1,81 +1,162 @@
 import functools
-from typing import TYPE_CHECKING
+from typing import Any, Dict, Optional, TYPE_CHECKING
+from contextlib import contextmanager
+from inspect import iscoroutinefunction, isasyncgenfunction
 
-from opentelemetry import baggage
+from opentelemetry import baggage, propagate
+from opentelemetry.context import Context
+from opentelemetry.trace import Span, Tracer
 from openinference.semconv.trace import SpanAttributes
 from openinference.semconv.trace import OpenInferenceSpanKindValues
 
+from tinyagents.types import NodeOutput
 from tinyagents.utils import convert_to_string, create_run_id
+from tinyagents.streaming import collect_chunks
 
 if TYPE_CHECKING:
     from tinyagents.nodes import NodeMeta
 
+def inject_trace_context(context: Context) -> Dict[str, str]:
+    """ Serialise a trace context as W3C `traceparent`, `tracestate` and `baggage` headers, which can be sent to another process """
+    carrier: Dict[str, str] = {}
+    propagate.inject(carrier, context=context)
+    return carrier
+
+def _get_parent_context(kwargs: dict) -> Optional[Context]:
+    """ Get the parent context of a span, either passed locally or received from another process as W3C trace context """
+    parent_ctx = kwargs.get("parent_context")
+    if parent_ctx is None and kwargs.get("trace_context"):
+        parent_ctx = propagate.extract(kwargs["trace_context"])
+    return parent_ctx
+
+def _set_value_attributes(span: Span, value_attribute: str, mime_type_attribute: str, value: Any) -> None:
+    span.set_attribute(value_attribute, convert_to_string(value))
+    span.set_attribute(mime_type_attribute, "application/json" if type(value) in [list, dict] else "text/plain") # either text/plain or application/json
+
+@contextmanager
+def _flow_span(cls, inputs, kwargs: dict):
+    """ Start the flow span, updating `kwargs` with the context and run ID that are passed to the nodes """
+    # use the run ID and trace context of the caller (e.g. a request from another service) when they are given
+    run_id = kwargs.pop("run_id", None) or create_run_id()
+    trace_context = kwargs.pop("trace_context", None)
+    context = propagate.extract(trace_context) if trace_context else None
+
+    with cls._tracer.start_as_current_span("flow", context=context, attributes={"run_id": run_id}) as flow:
+        parent_ctx = baggage.set_baggage("context", "flow")
+        parent_ctx = baggage.set_baggage("run_id", run_id, context=parent_ctx)
+        flow.set_attribute(SpanAttributes.OPENINFERENCE_SPAN_KIND, "CHAIN")
+        _set_value_attributes(flow, SpanAttributes.INPUT_VALUE, SpanAttributes.INPUT_MIME_TYPE, inputs)
+
+        kwargs.update(parent_context=parent_ctx, run_id=run_id)
+        yield flow
+
 def trace_flow(func):
     """ Decorator for tracing the execution of a flow """
+    if iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrap(cls, inputs, **kwargs):
+            if cls._tracer is None:
+                kwargs.pop("trace_context", None)
+                return await func(cls, inputs, **kwargs)
+
+            with _flow_span(cls, inputs, kwargs) as flow:
+                outputs = await func(cls, inputs, **kwargs)
+                _set_value_attributes(flow, SpanAttributes.OUTPUT_VALUE, SpanAttributes.OUTPUT_MIME_TYPE, outputs)
+
+            return outputs
+        return async_wrap
+
     @functools.wraps(func)
     def wrap(cls, inputs, **kwargs):
         if cls._tracer is None:
+            kwargs.pop("trace_context", None)
             return func(cls, inputs, **kwargs)
-        
-        run_id = create_run_id()
-        
-        with cls._tracer.start_as_current_span("flow", attributes={"run_id": run_id}) as flow:
-            parent_ctx = baggage.set_baggage("context", "flow")
-            flow.set_attribute(SpanAttributes.OPENINFERENCE_SPAN_KIND, "CHAIN")
-            flow.set_attribute(SpanAttributes.INPUT_VALUE, convert_to_string(inputs))
-            flow.set_attribute(SpanAttributes.INPUT_MIME_TYPE, "application/json" if type(inputs) in [list, dict] else "text/plain")
 
-            outputs = func(cls, inputs, parent_context=parent_ctx, run_id=run_id, **kwargs)
-
-            flow.set_attribute(SpanAttributes.OUTPUT_VALUE, convert_to_string(outputs)) # The output value of an operation
-            flow.set_attribute(SpanAttributes.OUTPUT_MIME_TYPE, "application/json" if type(outputs) in [list, dict] else "text/plain") # either text/plain or application/json
+        with _flow_span(cls, inputs, kwargs) as flow:
+            outputs = func(cls, inputs, **kwargs)
+            _set_value_attributes(flow, SpanAttributes.OUTPUT_VALUE, SpanAttributes.OUTPUT_MIME_TYPE, outputs)
 
         return outputs
     return wrap
 
-def trace_node(func):
-    """ Decorator for tracing the execution of a node """
-    @functools.wraps(func)
-    def wrap(cls: "NodeMeta", inputs, **kwargs):
-        if cls._tracer is None:
-            return func(cls, inputs, **kwargs)
-        
-        run_id = kwargs.get("run_id")
+@contextmanager
+def _node_span(cls: "NodeMeta", tracer: Tracer, inputs, kwargs: dict):
+    run_id = kwargs.get("run_id")
 
-        parent_ctx = kwargs.get("parent_context")
+    with tracer.start_as_current_span(cls.name, attributes={"run_id": run_id}, context=_get_parent_context(kwargs)) as span:
+        kind = cls._kind.upper() if cls._kind is not None else None
 
-        with cls._tracer.start_as_current_span(cls.name, attributes={"run_id": run_id}, context=parent_ctx) as span:
-            kind = cls._kind.upper() if cls._kind is not None else None
-            
-            span.set_attribute(SpanAttributes.OPENINFERENCE_SPAN_KIND, kind if hasattr(OpenInferenceSpanKindValues, kind) else "UNKNOWN")
-            span.set_attribute(SpanAttributes.INPUT_VALUE, convert_to_string(inputs))
-            span.set_attribute(SpanAttributes.INPUT_MIME_TYPE, "application/json" if type(inputs) in [list, dict] else "text/plain")
-            span.set_attribute(SpanAttributes.METADATA, convert_to_string(cls._metadata) if cls._metadata else "")
+        span.set_attribute(SpanAttributes.OPENINFERENCE_SPAN_KIND, kind if hasattr(OpenInferenceSpanKindValues, kind) else "UNKNOWN")
+        _set_value_attributes(span, SpanAttributes.INPUT_VALUE, SpanAttributes.INPUT_MIME_TYPE, inputs)
+        span.set_attribute(SpanAttributes.METADATA, convert_to_string(cls._metadata) if cls._metadata else "")
+        yield span
 
-            outputs = func(cls, inputs, **kwargs)
+def _set_node_outputs(cls: "NodeMeta", span: Span, outputs) -> None:
+    kind = cls._kind.upper() if cls._kind is not None else None
 
-            # set attributes for documents
-            if kind == "RETRIEVER":
-                docs = outputs.content
+    # set attributes for documents
+    if kind == "RETRIEVER":
+        docs = outputs.content
 
-                if isinstance(docs, str):
-                    docs = [docs]
+        if isinstance(docs, str):
+            docs = [docs]
 
-                if isinstance(docs, list) and len(docs) > 0:
-                    if isinstance(docs[0], str):
-                        docs = [dict(id=i, content=doc) for i, doc in enumerate(docs)]
-
-                    if isinstance(docs[0], dict):
-                        for i, doc in enumerate(docs):
-                            for key, value in doc.items():
-                                if key in ["id", "content", "score", "metadata"]:
-                                    span.set_attribute(f"retrieval.documents.{i}.document.{key}", convert_to_string(value))
-                    else:
-                        span.set_attribute(SpanAttributes.OUTPUT_VALUE, convert_to_string(docs)) # The output value of an operation
+        if isinstance(docs, list) and len(docs) > 0:
+            if isinstance(docs[0], str):
+                docs = [dict(id=i, content=doc) for i, doc in enumerate(docs)]
 
+            if isinstance(docs[0], dict):
+                for i, doc in enumerate(docs):
+                    for key, value in doc.items():
+                        if key in ["id", "content", "score", "metadata"]:
+                            span.set_attribute(f"retrieval.documents.{i}.document.{key}", convert_to_string(value))
             else:
-                span.set_attribute(SpanAttributes.OUTPUT_VALUE, convert_to_string(outputs))
-                span.set_attribute(SpanAttributes.OUTPUT_MIME_TYPE, "application/json" if type(outputs) in [list, dict] else "text/plain") # either text/plain or application/json 
+                span.set_attribute(SpanAttributes.OUTPUT_VALUE, convert_to_string(docs)) # The output value of an operation
+
+    else:
+        _set_value_attributes(span, SpanAttributes.OUTPUT_VALUE, SpanAttributes.OUTPUT_MIME_TYPE, outputs)
+
+def trace_node(func):
+    """ Decorator for tracing the execution of a node """
+    if isasyncgenfunction(func):
+        @functools.wraps(func)
+        async def async_gen_wrap(cls: "NodeMeta", inputs, **kwargs):
+            if cls._tracer is None:
+                async for chunk in func(cls, inputs, **kwargs):
+                    yield chunk
+                return
+
+            # the span covers the whole stream, streamed inputs aren't recorded as they are consumed by the node
+            chunks = []
+            with _node_span(cls, cls._tracer, "<stream>" if hasattr(inputs, "__aiter__") else inputs, kwargs) as span:
+                async for chunk in func(cls, inputs, **kwargs):
+                    chunks.append(chunk)
+                    yield chunk
+                outputs = collect_chunks(chunks)
+                _set_node_outputs(cls, span, outputs if isinstance(outputs, NodeOutput) else NodeOutput(content=outputs))
+        return async_gen_wrap
+
+    if iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrap(cls: "NodeMeta", inputs, **kwargs):
+            if cls._tracer is None:
+                return await func(cls, inputs, **kwargs)
+
+            with _node_span(cls, cls._tracer, inputs, kwargs) as span:
+                outputs = await func(cls, inputs, **kwargs)
+                _set_node_outputs(cls, span, outputs)
+
+            return outputs
+        return async_wrap
+
+    @functools.wraps(func)
+    def wrap(cls: "NodeMeta", inputs, **kwargs):
+        if cls._tracer is None:
+            return func(cls, inputs, **kwargs)
+
+        with _node_span(cls, cls._tracer, inputs, kwargs) as span:
+            outputs = func(cls, inputs, **kwargs)
+            _set_node_outputs(cls, span, outputs)
 
         return outputs
     return wrap
\ No newline at end of file
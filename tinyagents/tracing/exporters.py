@@ -0,0 +1,236 @@
+from typing import Any, Dict, Optional, Sequence, Iterator, List, TextIO
+import base64
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+import urllib.request
+
+from google.protobuf import json_format
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import ExportTraceServiceRequest
+
+_SHUTDOWN = object()
+_ID_FIELDS = ("traceId", "spanId", "parentSpanId")
+
+logger = logging.getLogger(__name__)
+
+def _convert_ids(request: Dict[str, Any], convert) -> Dict[str, Any]:
+    """ Convert the trace and span IDs of the spans (and their links) in an OTLP request """
+    for resource_spans in request.get("resourceSpans", []):
+        for scope_spans in resource_spans.get("scopeSpans", []):
+            for span in scope_spans.get("spans", []):
+                for item in [span, *span.get("links", [])]:
+                    for field in _ID_FIELDS:
+                        if item.get(field):
+                            item[field] = convert(item[field])
+    return request
+
+def _to_hex(value: str) -> str:
+    # protobuf writes bytes as base64, but OTLP/JSON requires lowercase hex IDs
+    return base64.b64decode(value).hex()
+
+def _from_hex(value: str) -> str:
+    return base64.b64encode(bytes.fromhex(value)).decode("ascii")
+
+class FileSpanExporter(SpanExporter):
+    """ Exports spans to disk as newline-delimited OTLP JSON using a background writer thread """
+
+    def __init__(
+            self,
+            directory: str,
+            max_bytes: int = 64 * 1024 * 1024,
+            compress: bool = True,
+            max_queue_size: int = 4096
+        ):
+        """
+        Initializes the exporter and starts the writer thread.
+
+        Args:
+            directory (str): The directory the span files are written to.
+            max_bytes (int): The size at which the current file is closed and a new one is started.
+            compress (bool): Whether to gzip files once they have been rotated.
+            max_queue_size (int): The maximum number of pending exports, further exports are dropped.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.dropped_spans = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._file: Optional[TextIO] = None
+        self._file_path: Optional[str] = None
+        self._file_index = 0
+        self._closed = False
+
+        os.makedirs(directory, exist_ok=True)
+        self._writer = threading.Thread(target=self._write_loop, name="tinyagents-span-writer", daemon=True)
+        self._writer.start()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        """ Queue the spans for writing, this is the only work done on the calling thread """
+        if self._closed:
+            return SpanExportResult.FAILURE
+
+        try:
+            self._queue.put_nowait(list(spans))
+        except queue.Full:
+            self.dropped_spans += len(spans)
+            return SpanExportResult.FAILURE
+
+        return SpanExportResult.SUCCESS
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """ Block until all queued spans have been written to disk """
+        flushed = threading.Event()
+        try:
+            self._queue.put(flushed, timeout=timeout_millis / 1000)
+        except queue.Full:
+            return False
+        return flushed.wait(timeout_millis / 1000)
+
+    def shutdown(self) -> None:
+        """ Write any remaining spans, close the current file and stop the writer thread """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_SHUTDOWN)
+        self._writer.join()
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch: List[ReadableSpan] = []
+            events = []
+            stop = False
+
+            # drain everything that is already queued so it can be written in a single request
+            while True:
+                if item is _SHUTDOWN:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    events.append(item)
+                else:
+                    batch.extend(item)
+
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            # a failed write drops the batch, but the writer keeps running so later spans are still written
+            try:
+                if batch:
+                    self._write_batch(batch)
+                if self._file is not None:
+                    self._file.flush()
+            except Exception as e:
+                self.dropped_spans += len(batch)
+                logger.exception("Failed to write %d spans to %s", len(batch), self.directory)
+                if isinstance(e, OSError):
+                    # the next batch is written to a new file
+                    self._discard_file()
+            finally:
+                for event in events:
+                    event.set()
+
+            if stop:
+                try:
+                    self._close_file()
+                except Exception:
+                    logger.exception("Failed to close the span file %s", self._file_path)
+                return
+
+    def _write_batch(self, spans: List[ReadableSpan]) -> None:
+        request = encode_spans(spans)
+        line = json.dumps(_convert_ids(json_format.MessageToDict(request), _to_hex), separators=(",", ":")) + "\n"
+
+        file = self._file if self._file is not None else self._open_file()
+        file.write(line)
+
+        if file.tell() >= self.max_bytes:
+            self._close_file()
+
+    def _open_file(self) -> TextIO:
+        self._file_index += 1
+        file_name = f"spans-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._file_index:05d}.jsonl"
+        self._file_path = os.path.join(self.directory, file_name)
+        self._file = open(self._file_path, "a", encoding="utf-8")
+        return self._file
+
+    def _discard_file(self) -> None:
+        try:
+            if self._file is not None:
+                self._file.close()
+        except OSError:
+            pass
+        self._file = None
+
+    def _close_file(self) -> None:
+        if self._file is None or self._file_path is None:
+            return
+
+        self._file.close()
+        self._file = None
+
+        if self.compress:
+            with open(self._file_path, "rb") as src, gzip.open(self._file_path + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(self._file_path)
+
+def read_span_files(path: str) -> Iterator[ExportTraceServiceRequest]:
+    """ Read the OTLP requests stored in a span file, or in every span file within a directory """
+    if os.path.isdir(path):
+        files = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.endswith(".jsonl") or name.endswith(".jsonl.gz")
+        )
+    else:
+        files = [path]
+
+    for file_path in files:
+        opener = gzip.open if file_path.endswith(".gz") else open
+        with opener(file_path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json_format.ParseDict(_convert_ids(json.loads(line), _from_hex), ExportTraceServiceRequest())
+
+def replay_spans(path: str, endpoint: Optional[str] = None, timeout: float = 10) -> int:
+    """
+    Send spans captured by the `FileSpanExporter` to an OTLP collector (e.g. Phoenix).
+
+    Args:
+        path (str): A span file or a directory containing span files.
+        endpoint (Optional[str]): The OTLP/HTTP traces endpoint, defaults to the collector used by `create_tracer`.
+        timeout (float): The timeout (in seconds) for each request.
+
+    Returns:
+        int: The number of spans that were sent.
+    """
+    from tinyagents.tracing.utils import get_collector_endpoint
+
+    endpoint = endpoint if endpoint else get_collector_endpoint()
+    n_spans = 0
+
+    for request in read_span_files(path):
+        http_request = urllib.request.Request(
+            endpoint,
+            data=request.SerializeToString(),
+            headers={"Content-Type": "application/x-protobuf"},
+            method="POST"
+        )
+        # non-2xx responses raise an `HTTPError`
+        with urllib.request.urlopen(http_request, timeout=timeout):
+            pass
+        n_spans += sum(
+            len(scope_spans.spans)
+            for resource_spans in request.resource_spans
+            for scope_spans in resource_spans.scope_spans
+        )
+
+    return n_spans
@@ -8,18 +8,41 @@ from opentelemetry.trace import Tracer
 from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor, SpanExporter
 from openinference.semconv.resource import ResourceAttributes
+from openinference.semconv.trace import SpanAttributes
+
+from tinyagents.tracing.exporters import FileSpanExporter
+
+def get_collector_endpoint() -> str:
+    """ Get the OTLP/HTTP endpoint that traces should be sent to """
+    collector_endpoint = os.environ.get("COLLECTOR_ENDPOINT")
+    if not collector_endpoint:
+        from phoenix.config import get_env_host, get_env_port
+        collector_endpoint = f"http://{get_env_host()}:{get_env_port()}/v1/traces"
+    return collector_endpoint
+
+def create_span_exporter() -> SpanExporter:
+    """ Create the span exporter selected using the `TINYAGENTS_TRACE_EXPORTER` environment variable """
+    exporter_type = os.environ.get("TINYAGENTS_TRACE_EXPORTER", "otlp")
+
+    if exporter_type == "file":
+        return FileSpanExporter(
+            directory=os.environ.get("TINYAGENTS_TRACE_DIR", "tinyagents_traces"),
+            max_bytes=int(os.environ.get("TINYAGENTS_TRACE_MAX_BYTES", 64 * 1024 * 1024)),
+            compress=os.environ.get("TINYAGENTS_TRACE_COMPRESS", "true").lower() == "true"
+        )
+    
+    if exporter_type != "otlp":
+        raise ValueError(f"`{exporter_type}` is not a valid trace exporter, must be one of ['otlp', 'file']")
+
+    return OTLPSpanExporter(endpoint=get_collector_endpoint())
 
 def create_tracer() -> Tracer:
     """Create a tracer for logging traces using OpenTelemtry """
     resource = Resource(attributes={
         ResourceAttributes.PROJECT_NAME: os.environ.get("PHOENIX_PROJECT_NAME", "default")
     })
-    collector_endpoint = os.environ.get("COLLECTOR_ENDPOINT")
-    if not collector_endpoint:
-        from phoenix.config import get_env_host, get_env_port
-        collector_endpoint = f"http://{get_env_host()}:{get_env_port()}/v1/traces"
  
     # checking if a global tracer already exists - avoids override issues
     _existing_provider = trace.get_tracer_provider()
@@ -29,11 +52,19 @@ def create_tracer() -> Tracer:
     tracer_provider = TracerProvider(resource=resource)
     trace.set_tracer_provider(tracer_provider)
     tracer = trace.get_tracer(__name__)
-    span_exporter = OTLPSpanExporter(endpoint=collector_endpoint)
+    span_exporter = create_span_exporter()
     simple_span_processor = SimpleSpanProcessor(span_exporter=span_exporter)
     trace.get_tracer_provider().add_span_processor(simple_span_processor)
     return tracer
 
+def trace_cold_start(tracer: Tracer, node_name: str, start_time: int, timings: dict) -> None:
+    """ Record a span covering the creation and warm up of a node replica """
+    span = tracer.start_span(f"{node_name}.cold_start", start_time=start_time, attributes={
+        SpanAttributes.OPENINFERENCE_SPAN_KIND: "UNKNOWN",
+        **{f"cold_start.{key}": value for key, value in timings.items()}
+    })
+    span.end()
+
 def check_tracing_enabled():
     return os.environ.get("TINYAGENTS_ENABLE_TRACING", "false") == "true"
 
@@ -59,7 +90,8 @@ def _handle_remote_node(node):
 def _init_node_tracer(node):
     node_type = type(node).__name__
 
-    if node_type == "ChainableNode":
+    # nodes converted to Ray Deployments are handles, whatever their original type
+    if isinstance(node, DeploymentHandle) or node_type in ["ChainableNode", "ProcessNode"]:
         _handle_remote_node(node)
 
     elif node_type == "Recursive":
@@ -68,7 +100,10 @@ def _init_node_tracer(node):
     elif node_type == "ConditionalBranch":
         init_all_tracers(list(node.branches.values()))
 
-    elif node_type == "Parallel":
+    elif node_type in ["Parallel", "ParallelReduce", "Race"]:
         init_all_tracers(list(node.nodes.values()))
 
+    elif node_type == "Map":
+        init_all_tracers([node.node])
+
 
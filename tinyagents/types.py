@@ -1,6 +1,7 @@
 from enum import Enum
 from dataclasses import dataclass
-from typing import Any, Optional
+from functools import update_wrapper
+from typing import Any, Callable, Dict, Optional
 
 class Action(Enum):
     Respond = "respond"
@@ -11,10 +12,36 @@ class NodeOutput:
     content: Any
     action: Optional[Action] = None
     ref: Optional[str] = None
+    # the run state written by a node deployed using Ray, see `tinyagents.state`
+    state: Optional[Dict[str, Any]] = None
 
     def to_dict(self):
-        dict_ = self.__dict__
+        dict_ = dict(self.__dict__)
         if isinstance(self.action, Action):
             dict_["action"] = self.action.value
 
         return dict_
+
+@dataclass
+class EncodedPayload:
+    data: bytes
+    content_type: str
+
+class ConvergencePredicate:
+    """ A convergence predicate for loops, given the outputs of the previous and current rounds """
+    predicate: Callable[[Any, Any], bool]
+    requires_previous: bool
+
+    def __init__(self, predicate: Callable[[Any, Any], bool], requires_previous: bool = False):
+        """
+        Args:
+            predicate (Callable[[Any, Any], bool]): Given the outputs of the previous and current rounds, returns True once the loop has converged.
+            requires_previous (bool): Whether the predicate is only checked once there is a previous round (rather than given None after the first round).
+        """
+        self.predicate = predicate
+        self.requires_previous = requires_previous
+        # keep the import path of the predicate, so loops using it can be stored in a spec
+        update_wrapper(self, predicate)
+
+    def __call__(self, previous: Any, current: Any) -> bool:
+        return self.predicate(previous, current)
@@ -1,11 +1,18 @@
-from typing import Union, List, Any
+from typing import Union, List, Any, Dict, Coroutine, Type
 from uuid import uuid4
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+import asyncio
+import importlib
+import inspect
 import json
 import os
 
 import ray
 
-from tinyagents.types import NodeOutput
+from tinyagents.types import NodeOutput, Action, EncodedPayload
+from tinyagents.codecs import encode_payload, decode_payload
+from tinyagents.state import get_state, ObjectStoreRunState
 
 COLOUR_MAP = {
     "blue": "36;1",
@@ -28,7 +35,11 @@ def check_for_break(outputs: Union[NodeOutput, List[NodeOutput]]):
         outputs = [outputs]
 
     for output in outputs:
-        if output.action in ["respond", "end_loop"]:
+        action = getattr(output, "action", None)
+        if isinstance(action, Action):
+            action = action.value
+
+        if action in ["respond", "end_loop"]:
             return True
 
     return False
@@ -39,15 +50,69 @@ def get_content(x):
         return [output.content if isinstance(output, NodeOutput) else output for output in x]
             
     elif isinstance(x, dict):
-        for key, value in x.items():
-            if isinstance(value, NodeOutput):
-                x[key] = value.content
+        # a new dictionary is returned, as the outputs may be shared (e.g. with callbacks)
+        return {key: value.content if isinstance(value, NodeOutput) else value for key, value in x.items()}
         
     elif isinstance(x, NodeOutput):
         return x.content
     
     return x
 
+def get_nested_content(x):
+    """ Extract the content from outputs, including the outputs nested within them (e.g. by parallel nodes) """
+    if isinstance(x, NodeOutput):
+        return get_nested_content(x.content)
+    elif isinstance(x, dict):
+        return {key: get_nested_content(value) for key, value in x.items()}
+    elif isinstance(x, (list, tuple)):
+        return [get_nested_content(value) for value in x]
+
+    return x
+
+def run_coroutine(coro: Coroutine) -> Any:
+    """ Run a coroutine to completion from synchronous code """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    # `asyncio.run` can't be used within a running event loop (e.g. synchronous code called by an async function), so the coroutine runs on a separate thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(copy_context().run, asyncio.run, coro).result()
+
+async def ainvoke_node(node, inputs: Any, **kwargs) -> Any:
+    """ Asynchronously invoke a node, whether it is local or a Ray Deployment """
+    if not hasattr(node.ainvoke, "remote"):
+        return await node.ainvoke(inputs=inputs, **kwargs)
+
+    # the trace context can't be sent to another process, so the deployment receives it as W3C trace context headers
+    parent_context = kwargs.pop("parent_context", None)
+    if parent_context is not None:
+        from tinyagents.tracing.decorators import inject_trace_context
+        kwargs["trace_context"] = inject_trace_context(parent_context)
+
+    # deployments receive references to the values in the run state, rather than the values
+    state = get_state()
+    if isinstance(state, ObjectStoreRunState):
+        kwargs["run_state"] = state.to_refs()
+
+    # payloads sent to deployments can be encoded using a codec (e.g. msgpack) rather than pickled
+    wire_codec = kwargs.get("wire_codec")
+    if wire_codec is not None:
+        inputs = encode_payload(inputs, wire_codec)
+
+    output = await node.ainvoke.remote(inputs=inputs, **kwargs)
+    if not isinstance(output, NodeOutput):
+        return output
+
+    if wire_codec is not None and isinstance(output.content, EncodedPayload):
+        output.content = decode_payload(output.content)
+    if output.state is not None:
+        if state is not None:
+            state.apply(output.state)
+        output.state = None
+    return output
+
 def convert_to_string(x: Any) -> str:
     x = get_content(x)
 
@@ -58,4 +123,37 @@ def convert_to_string(x: Any) -> str:
 
 def create_run_id() -> str:
     return str(uuid4())
-    
\ No newline at end of file
+
+_init_arg_names: Dict[type, tuple] = {}
+
+def get_init_arg_names(node_cls: Type[Any]) -> tuple:
+    """ Get the names of the arguments passed to the constructor of a node class """
+    arg_names = _init_arg_names.get(node_cls)
+    if arg_names is None:
+        arg_names = tuple(arg for arg in inspect.signature(node_cls.__init__).parameters if arg not in {"args", "kwargs", "self"})
+        _init_arg_names[node_cls] = arg_names
+    return arg_names
+
+def get_init_args(node) -> Dict[str, Any]:
+    """ Get the arguments needed to recreate a node, these must be stored as attributes of the node """
+    # nodes loaded from a graph spec already know their arguments
+    init_args = node.__dict__.get("_init_args")
+    if init_args is not None:
+        return dict(init_args)
+
+    argnames = get_init_arg_names(type(node))
+    try:
+        return {anno: getattr(node, anno) for anno in argnames}
+    except AttributeError:
+        raise Exception(f"In order to recreate the node `{node.name}` (e.g. when compiling the graph using Ray), arguments that are passed to the constructor must be stored as attributes of the class.")
+
+def load_object(path: str) -> Any:
+    """ Load an object using its import path, e.g. `my_package.graphs:create_graph` """
+    module_name, _, attr = path.partition(":")
+    if not attr:
+        raise ValueError(f"`{path}` is not a valid import path, expected `module:attribute`.")
+
+    obj = importlib.import_module(module_name)
+    for name in attr.split("."):
+        obj = getattr(obj, name)
+    return obj
\ No newline at end of file